@@ -0,0 +1,215 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from models import BootstrapMethod, BootstrapSettings, BootstrapIntervals, ConfidenceInterval, RegressionMethod
+from analysis.regression import solve_normal_equations, huber_rows, fit_rows
+from analysis.robust import huber_coefficients, theil_sen_line
+import numpy as np
+
+CHUNK_ELEMENTS = 2 ** 22    # resampled design values held at once per chunk (32 MB of float64)
+MAX_WORKERS = 8
+
+def _replicate_chunk(
+    design: np.ndarray,
+    response: np.ndarray,
+    method: BootstrapMethod,
+    n_replicates: int,
+    seed: np.random.SeedSequence,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> np.ndarray:
+    """
+    Coefficients of n_replicates bootstrap regressions of response on design,
+    all drawn as one (replicates, readings) index array and solved together.
+
+    RESIDUAL keeps the design: every replicate is the fitted line plus
+    resampled residuals (inflated by sqrt(n / (n - p)) for the fitted
+    coefficients), so all replicates share the design's pseudo-inverse and
+    are solved by one matrix product. PAIRS resamples whole readings: the
+    times each reading was drawn weight its row of the normal equations, so
+    the (replicates, p, p) stack of them comes from one matrix product of the
+    draw counts with the rows' outer products, and is solved in one batched
+    call. Replicates whose resample is (nearly) rank deficient, e.g. every
+    pick from one step, are returned as NaN.
+
+    A robust regression_method refits every replicate with the same
+    estimator as the point estimate, the whole chunk at once (_robust_rows),
+    and RESIDUAL resamples the residuals about the robust line.
+    """
+    rng = np.random.default_rng(seed)
+    n, p = design.shape
+    picks = rng.integers(0, n, size=(n_replicates, n))
+    if regression_method != RegressionMethod.LEAST_SQUARES:
+        if method == BootstrapMethod.RESIDUAL:
+            fitted = design @ _robust_coefficients(design, response, regression_method)
+            residuals = (response - fitted) * np.sqrt(n / max(n - p, 1))
+            return _robust_rows(design, fitted + residuals[picks], regression_method)
+        return _robust_rows(design[picks], response[picks], regression_method)
+    if method == BootstrapMethod.RESIDUAL:
+        pseudo_inverse = np.linalg.pinv(design)
+        fitted = design @ (pseudo_inverse @ response)
+        residuals = (response - fitted) * np.sqrt(n / max(n - p, 1))
+        return (fitted + residuals[picks]) @ pseudo_inverse.T
+
+    offsets = n * np.arange(n_replicates)[:, None]
+    counts = np.bincount((picks + offsets).ravel(), minlength=n_replicates * n).reshape(n_replicates, n)
+    counts = counts.astype(np.float64)
+    outer = (design[:, :, None] * design[:, None, :]).reshape(n, p * p)
+    gram = (counts @ outer).reshape(n_replicates, p, p)
+    moment = counts @ (design * response[:, None])
+    return solve_normal_equations(gram, moment)
+
+def _robust_coefficients(design: np.ndarray, response: np.ndarray, method: RegressionMethod) -> np.ndarray:
+    """ Robust coefficients of one fit; THEIL_SEN takes a design [x, constant]. """
+    if method == RegressionMethod.HUBER:
+        return huber_coefficients(design, response)
+    slope, intercept = theil_sen_line(design[:, 0], response)
+    return np.array([slope, intercept / design[0, 1]])
+
+def _robust_rows(design: np.ndarray, response: np.ndarray, method: RegressionMethod) -> np.ndarray:
+    """
+    Robust coefficients of every replicate at once: design (n, p) shared or
+    (replicates, n, p), response (replicates, n). THEIL_SEN takes designs
+    [x, constant].
+    """
+    if method == RegressionMethod.HUBER:
+        return huber_rows(design, response)
+    slope, intercept = fit_rows(design[..., 0], response, method)
+    return np.column_stack([slope, intercept / design[..., 0, 1]])
+
+def bootstrap_coefficients(
+    design: np.ndarray,
+    response: np.ndarray,
+    settings: BootstrapSettings,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> np.ndarray:
+    """
+    Bootstrap replicates of the coefficients of response ≈ design @ c, fitted
+    by least squares or by the robust regression_method of the point estimate.
+
+    Replicates are drawn and solved in chunks of at most CHUNK_ELEMENTS
+    resampled values, each chunk in a single batched solve (see
+    _replicate_chunk). Every chunk has its own child of the settings' seed,
+    so the replicates are the same whether the chunks run in this process or
+    are spread over settings.workers processes.
+
+    Args:
+        design:   (readings, p) design matrix.
+        response: (readings,) observed values.
+        settings: Number of replicates, resampling method, seed and workers.
+        regression_method: Estimator refitted to every replicate. THEIL_SEN
+                  fits a line, so the design must be [x, constant].
+
+    Returns:
+        (n_replicates, p) array of coefficients; NaN rows for degenerate resamples.
+
+    Raises:
+        ValueError: If there are no more readings than coefficients, or
+                    THEIL_SEN is asked for with any other design than a line.
+    """
+    design = np.asarray(design, dtype=np.float64)
+    response = np.asarray(response, dtype=np.float64)
+    n, p = design.shape
+    if n <= p:
+        raise ValueError(f"Bootstrap needs more readings than fitted coefficients, got {n} for {p}.")
+    if regression_method == RegressionMethod.THEIL_SEN and (p != 2 or np.ptp(design[:, 1]) != 0 or design[0, 1] == 0):
+        raise ValueError("Theil-Sen fits a straight line only; the bootstrap design must be [x, constant].")
+
+    # Columns scaled to unit norm so the normal equations of the pairs bootstrap stay well conditioned
+    scale = np.linalg.norm(design, axis=0)
+    scale[scale == 0] = 1.0
+    scaled = design / scale
+
+    # Theil-Sen lists the n²/2 pairwise slopes of each replicate
+    row_elements = n * n if regression_method == RegressionMethod.THEIL_SEN else n * p
+    chunk = max(1, CHUNK_ELEMENTS // row_elements)
+    sizes = [min(chunk, settings.n_replicates - i) for i in range(0, settings.n_replicates, chunk)]
+    seeds = np.random.SeedSequence(settings.seed).spawn(len(sizes))
+    args = (
+        [scaled] * len(sizes), [response] * len(sizes), [settings.method] * len(sizes), sizes, seeds,
+        [regression_method] * len(sizes),
+    )
+
+    workers = min(settings.workers or 1, MAX_WORKERS, os.cpu_count() or 1, len(sizes))
+    if workers <= 1:
+        chunks = list(map(_replicate_chunk, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(_replicate_chunk, *args))
+    return np.concatenate(chunks) / scale
+
+def critical_yield(B: np.ndarray, C: np.ndarray) -> np.ndarray:
+    """
+    Critical yield B/C of each replicate or sample; inf where C <= 0, since
+    well losses that do not grow with Q never catch up with the aquifer losses
+    (no finite critical yield). NaN where B or C is.
+    """
+    critical = np.divide(B, C, out=np.full_like(B, np.inf), where=C > 0)
+    return np.where(np.isnan(B) | np.isnan(C), np.nan, critical)
+
+def percentile_interval(values: np.ndarray, confidence: float) -> ConfidenceInterval:
+    """
+    Two-sided percentile interval of the values (NaN bounds if there are none).
+
+    NaN and -inf values are left out. +inf values (an unbounded quantity,
+    e.g. the critical yield of a replicate with C <= 0) rank above every
+    finite one, so a bound that reaches into them is inf.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values) | (values == np.inf)]
+    if len(values) == 0:
+        return ConfidenceInterval(lower=float("nan"), upper=float("nan"))
+    finite = values[np.isfinite(values)]
+    largest = finite.max() if len(finite) else -np.inf
+    tail = 50 * (1 - confidence)
+    bounds = np.percentile(np.minimum(values, np.finfo(np.float64).max), [tail, 100 - tail])
+    lower, upper = np.where(bounds > largest, np.inf, bounds)
+    return ConfidenceInterval(lower=float(lower), upper=float(upper))
+
+def bootstrap_intervals(
+    design: np.ndarray,
+    response: np.ndarray,
+    settings: BootstrapSettings,
+    quantities: Callable[[np.ndarray], dict[str, np.ndarray]],
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> BootstrapIntervals:
+    """
+    Percentile confidence intervals on values derived from a linear fit.
+
+    Args:
+        design:     (readings, p) design matrix of the fit.
+        response:   (readings,) observed values.
+        settings:   Bootstrap request.
+        quantities: Maps the (replicates, p) coefficient array to each result
+                    value, keyed by its result field name, as arrays over the
+                    replicates; physically meaningless replicates (e.g. a
+                    non-positive slope for T) should be NaN.
+        regression_method: Estimator of the point estimate, refitted to
+                    every replicate (see bootstrap_coefficients).
+
+    Returns:
+        BootstrapIntervals with one interval per quantity.
+    """
+    coeffs = bootstrap_coefficients(design, response, settings, regression_method)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        samples = quantities(coeffs)
+    return BootstrapIntervals(
+        method=settings.method,
+        n_replicates=settings.n_replicates,
+        confidence=settings.confidence,
+        intervals={name: percentile_interval(values, settings.confidence) for name, values in samples.items()},
+    )
+
+def semilog_design(
+    time_axis: np.ndarray, response: np.ndarray, start: int, end: Optional[int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Design [ln t, 1] and response of a Cooper-Jacob fit window [start, end),
+    leaving out readings the PrefixRegression fit also skips (non-positive or
+    non-finite time, non-finite response).
+    """
+    window = slice(*slice(start, end).indices(len(time_axis)))
+    time_axis = np.asarray(time_axis, dtype=np.float64)[window]
+    response = np.asarray(response, dtype=np.float64)[window]
+    valid = (time_axis > 0) & np.isfinite(time_axis) & np.isfinite(response)
+    log_time = np.log(time_axis[valid])
+    return np.column_stack([log_time, np.ones_like(log_time)]), response[valid]
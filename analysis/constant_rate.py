@@ -1,4 +1,12 @@
-from models import PumpingTest, ConstantRateResult, DrawdownFit
+from models import PumpingTest, ConstantRateResult, DrawdownFit, FitWindowMode, BootstrapSettings, BootstrapIntervals, MonteCarloSettings, RegressionMethod
+from analysis.regression import PrefixRegression
+from analysis.window_search import search_fit_windows
+from analysis.derivative import diagnose_derivative
+from analysis.segmentation import segment_semilog
+from analysis.theis import fit_theis
+from analysis.type_curves import fit_type_curve
+from analysis.bootstrap import bootstrap_intervals, semilog_design
+from analysis.monte_carlo import propagate_constant_rate
 from typing import Optional
 import numpy as np
 
@@ -7,12 +15,44 @@ MACDONALD_YIELD_COEFFICIENT = 4.0
 COOPER_JACOB_COEFF = 0.183  # ln(10) / (4π), dimensionless
 HOURS_PER_DAY = 24.0
 
+def cooper_jacob_intervals(
+    time_axis: np.ndarray,
+    response: np.ndarray,
+    start: int,
+    end: Optional[int],
+    flowrate_m3day: float,
+    settings: BootstrapSettings,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> BootstrapIntervals:
+    """
+    Bootstrap intervals on T and the McDonald yield of the Cooper-Jacob fit
+    over [start, end) (analysis.bootstrap), each replicate refitted with the
+    fit's regression_method. Replicates with a non-positive slope give no T
+    and are left out.
+    """
+    design, values = semilog_design(time_axis, response, start, end)
+
+    def quantities(coeffs: np.ndarray) -> dict[str, np.ndarray]:
+        ds = coeffs[:, 0] * np.log(10)
+        T = np.where(ds > 0, COOPER_JACOB_COEFF * flowrate_m3day / ds, np.nan)
+        return {"transmissivity_m2day": T, "estimated_yield_m3day": MACDONALD_YIELD_COEFFICIENT * T}
+
+    return bootstrap_intervals(design, values, settings, quantities, regression_method)
+
 def analyse_constant_rate(
     test: PumpingTest,
     fit_start_idx: int = 1, # Skip t=0 (log(0) is undefined)
     fit_end_idx: Optional[int] = None,  # If None, will use all remaining points
     fit2_start_idx: Optional[int] = None,   # None = no second fit
     fit2_end_idx: Optional[int] = None,
+    window_mode: FitWindowMode = FitWindowMode.MANUAL,
+    radius_m: Optional[float] = None,   # storativity in AUTO mode; needed by the Theis and type-curve fits
+    max_segments: Optional[int] = None, # None = no piecewise segmentation
+    theis: bool = False,
+    type_curve: Optional[str] = None,   # None = no atlas type-curve fit
+    bootstrap: Optional[BootstrapSettings] = None,  # None = no confidence intervals
+    monte_carlo: Optional[MonteCarloSettings] = None,   # None = inputs taken as exact
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
 ) -> ConstantRateResult:
     """
     Analyse a constant-rate pumping test using the Cooper-Jacob straight-line method.
@@ -28,13 +68,38 @@ def analyse_constant_rate(
                        Defaults to 1 to skip t=0 where log is undefined.
         fit_end_idx:   Index of the last measurement (exclusive). Defaults to
                        all remaining points.
+        window_mode:   AUTO replaces fit_start_idx/fit_end_idx with the best
+                       window from analysis.window_search (u < 0.05 enforced);
+                       the ranked candidates are kept on the result. DERIVATIVE
+                       uses the longest radial-flow plateau of the Bourdet
+                       derivative (analysis.derivative), kept on the result.
+        radius_m:      Borehole radius, for the storativity of the candidates
+                       and as the radius of the Theis and type-curve fits.
+        max_segments:  If given, also split the whole curve into up to this many
+                       straight lines (analysis.segmentation) to show flow regimes.
+        theis:         Also fit the Theis curve to every reading (analysis.theis).
+        type_curve:    Also fit this family of the type-curve atlas to every
+                       reading (analysis.type_curves), e.g. "hantush_jacob".
+        bootstrap:     If given, percentile confidence intervals on T and the
+                       yield of the main fit from bootstrap replicates
+                       (analysis.bootstrap), kept on the result.
+        monte_carlo:   If given, distributions of T and the yield of the main
+                       fit under the flowrate error (analysis.monte_carlo),
+                       kept on the result.
+        regression_method: Estimator of the Cooper-Jacob lines (analysis.robust);
+                       the automatic search and segmentation then weight down
+                       spikes. The bootstrap replicates and Monte Carlo samples
+                       are refitted with the same estimator.
 
     Returns:
         ConstantRateResult with transmissivity, estimated yield, and fit details.
 
     Raises:
         ValueError: If the fit window contains fewer than 2 points,
-                    or if any time value in the window is <= 0.
+                    or if any time value in the window is <= 0,
+                    or if no window passes the AUTO search, or if the
+                    derivative shows no radial-flow plateau, or if a curve
+                    fit is requested without radius_m.
 
     Note:
         The Cooper-Jacob approximation is only valid when u = r²S/(4Tt) < 0.05.
@@ -46,11 +111,11 @@ def analyse_constant_rate(
     # Get drawdown series and time series
     drawdown = test.drawdown_series
     time = test.time_series
+    regression = PrefixRegression.semilog(time, drawdown, regression_method)
 
     def _compute_fit(start: int, end: Optional[int]) -> tuple[DrawdownFit, float, float]:
         """Inner helper — compute fit, T, and yield for one window."""
         fit_time = time[start:end]
-        fit_drawdown = drawdown[start:end]
 
         if len(fit_time) < 2:
             raise ValueError(
@@ -60,36 +125,68 @@ def analyse_constant_rate(
         if np.any(fit_time <= 0):
             raise ValueError("Fit window contains non-positive time values.")
 
-        log_time = np.log(fit_time)
-        slope, intercept = np.polyfit(log_time, fit_drawdown, 1)
-
-        y_pred = slope * log_time + intercept
-        ss_res = np.sum((fit_drawdown - y_pred) ** 2)
-        ss_tot = np.sum((fit_drawdown - np.mean(fit_drawdown)) ** 2)
-        r_squared = float(1 - ss_res / ss_tot) if ss_tot > 0 else 0.0
-
-        ds = slope * np.log(10)
+        fit = regression.fit(start, end)
+        ds = fit.drawdown_per_log_cycle
+        if ds <= 0:
+            raise ValueError(
+                f"Drawdown does not increase over the fit window (ds = {ds:.4f} m per log cycle). "
+                f"Adjust fit_start_idx ({start}) and fit_end_idx ({end})."
+            )
         flowrate_m3day = test.flowrate_m3h * HOURS_PER_DAY
         T = COOPER_JACOB_COEFF * flowrate_m3day / ds
         estimated_yield = MACDONALD_YIELD_COEFFICIENT * T
 
-        fit = DrawdownFit(
-            slope=slope,
-            intercept=intercept,
-            drawdown_per_log_cycle=ds,
-            n_points_used=len(fit_time),
-            r_squared=r_squared,
-        )
         return fit, T, estimated_yield
 
-    fit, T, estimated_yield = _compute_fit(fit_start_idx, fit_end_idx)
     flowrate_m3day = test.flowrate_m3h * HOURS_PER_DAY
+    candidates = []
+    derivative = None
+    if window_mode == FitWindowMode.AUTO:
+        candidates = search_fit_windows(
+            time, drawdown, flowrate_m3day, check_u=True, radius_m=radius_m, regression_method=regression_method
+        )
+        if not candidates:
+            raise ValueError(
+                "No fit window passes the automatic search (minimum points, log-cycle span, "
+                "u < 0.05). Choose the fit window manually."
+            )
+        fit_start_idx, fit_end_idx = candidates[0].start_idx, candidates[0].end_idx
+    elif window_mode == FitWindowMode.DERIVATIVE:
+        derivative = diagnose_derivative(time, drawdown, flowrate_m3day)
+        if not derivative.plateaus:
+            raise ValueError(
+                "The drawdown derivative shows no radial-flow plateau. "
+                "Choose the fit window manually or use the automatic search."
+            )
+        fit_start_idx, fit_end_idx = derivative.plateaus[0].start_idx, derivative.plateaus[0].end_idx
+
+    fit, T, estimated_yield = _compute_fit(fit_start_idx, fit_end_idx)
 
     # Second fit — only if both start indices are provided
     fit2, T2, yield2 = None, None, None
     if fit2_start_idx is not None:
         fit2, T2, yield2 = _compute_fit(fit2_start_idx, fit2_end_idx)
 
+    segmentation = None
+    if max_segments is not None:
+        segmentation = segment_semilog(
+            time, drawdown, flowrate_m3day, max_segments=max_segments, regression_method=regression_method
+        )
+
+    if (theis or type_curve) and radius_m is None:
+        raise ValueError("The Theis and type-curve fits need the casing diameter (borehole diameter_mm).")
+    theis_fit = fit_theis(test, radius_m) if theis else None
+    type_curve_fit = fit_type_curve(test, type_curve, radius_m) if type_curve else None
+
+    confidence = None
+    if bootstrap is not None:
+        confidence = cooper_jacob_intervals(
+            time, drawdown, fit_start_idx, fit_end_idx, flowrate_m3day, bootstrap, regression_method
+        )
+    propagated = None
+    if monte_carlo is not None:
+        propagated = propagate_constant_rate(test, fit_start_idx, fit_end_idx, monte_carlo, regression_method)
+
     return ConstantRateResult(
         fit=fit,
         transmissivity_m2day=T,
@@ -98,4 +195,12 @@ def analyse_constant_rate(
         fit2=fit2,
         transmissivity2_m2day=T2,
         estimated_yield2_m3day=yield2,
+        window_candidates=candidates,
+        segmentation=segmentation,
+        theis=theis_fit,
+        type_curve=type_curve_fit,
+        derivative=derivative,
+        confidence=confidence,
+        monte_carlo=propagated,
+        regression_method=regression_method,
     )
@@ -0,0 +1,91 @@
+from dataclasses import replace
+from models import PumpingTest, MeasurementTable, DecimationMethod, OPTIONAL_CHANNELS
+import numpy as np
+
+DEFAULT_BINS_PER_LOG_CYCLE = 20
+BIN_EDGE_TOLERANCE = 1e-9   # keeps readings exactly on a bin edge (e.g. t = 10) out of the bin below
+
+def _group_median(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """ Median of each run of consecutive values, ignoring NaN (NaN if a run has no readings). """
+    group = np.repeat(np.arange(len(starts)), counts)
+    ordered = values[np.lexsort((values, group))]   # sorted within each run, NaN last
+    n_valid = np.add.reduceat((~np.isnan(values)).astype(np.int64), starts)
+    lower = starts + np.maximum(n_valid - 1, 0) // 2
+    upper = starts + n_valid // 2
+    return (ordered[lower] + ordered[upper]) / 2
+
+def _group_mean(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """ Mean of each run of consecutive values, ignoring NaN (NaN if a run has no readings). """
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    n_valid = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n_valid > 0, sums / n_valid, np.nan)
+
+def decimate_log(
+    test: PumpingTest,
+    bins_per_log_cycle: int = DEFAULT_BINS_PER_LOG_CYCLE,
+    method: DecimationMethod = DecimationMethod.MEDIAN,
+) -> PumpingTest:
+    """
+    Resample a test onto bins of equal width in log time.
+
+    A logger sampling at a fixed rate puts almost all of its readings in the
+    last log cycle, which slows the semi-log fits and plots and gives the late
+    data far more weight than the early data in the straight-line fit. Here
+    every log cycle is split into bins_per_log_cycle bins (anchored at powers of
+    ten, so bins are the same across tests) and the readings in each bin are
+    combined into one row. Bins holding a single reading are kept unchanged, so
+    sparse early-time data is not touched; readings at t <= 0 are kept as they are.
+
+    Level and the optional channels are combined with method. Time is combined
+    in log space: the median time, or the geometric mean time for MEAN.
+
+    Args:
+        test:               Test to resample.
+        bins_per_log_cycle: Number of bins per factor of ten in time.
+        method:             DecimationMethod.MEDIAN (robust to spikes) or MEAN.
+
+    Returns:
+        A copy of the test whose measurements record in point_counts how many
+        raw readings were folded into each row.
+
+    Raises:
+        ValueError: If bins_per_log_cycle is not a positive integer.
+    """
+    if bins_per_log_cycle < 1:
+        raise ValueError(f"Bins per log cycle must be a positive integer, got {bins_per_log_cycle}.")
+
+    table = test.measurements
+    time = table.time_min
+    positive = time > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_time = np.log10(np.where(positive, time, 1.0))
+    bin_index = np.floor(log_time * bins_per_log_cycle + BIN_EDGE_TOLERANCE)
+
+    # Time is strictly increasing, so each bin is a run of consecutive rows
+    new_run = np.ones(len(time), dtype=bool)
+    new_run[1:] = (bin_index[1:] != bin_index[:-1]) | ~positive[1:] | ~positive[:-1]
+    starts = np.flatnonzero(new_run)
+    counts = np.diff(np.append(starts, len(time)))
+    single = counts == 1
+
+    aggregate = _group_median if method == DecimationMethod.MEDIAN else _group_mean
+    if method == DecimationMethod.MEDIAN:
+        binned_time = _group_median(time, starts, counts)
+    else:
+        binned_time = 10.0 ** _group_mean(log_time, starts, counts)
+    binned_time = np.where(single, time[starts], binned_time)
+
+    point_counts = counts if table.point_counts is None else np.add.reduceat(table.point_counts, starts)
+    decimated = MeasurementTable(
+        time_min=binned_time,
+        level_mbd=aggregate(table.level_mbd, starts, counts),
+        **{
+            name: None if getattr(table, name) is None else aggregate(getattr(table, name), starts, counts)
+            for name in OPTIONAL_CHANNELS
+        },
+        timestamp=None if table.timestamp is None else table.timestamp[starts + (counts - 1) // 2],
+        point_counts=point_counts,
+    )
+    return replace(test, measurements=decimated)
@@ -0,0 +1,146 @@
+from models import DerivativeDiagnostic, RadialFlowPlateau
+from analysis.regression import PrefixRegression
+import numpy as np
+
+DEFAULT_SMOOTHING = 0.3     # Bourdet L, in ln units of the time axis
+DEFAULT_FLAT_TOLERANCE = 0.2    # |d ln s' / d ln t| below this counts as flat
+DEFAULT_FLAT_HALF_WIDTH = 0.25  # log cycles either side of a reading over which flatness is judged
+DEFAULT_MIN_POINTS = 5
+DEFAULT_MIN_LOG_CYCLES = 0.5
+
+def bourdet_derivative(time_axis: np.ndarray, drawdown: np.ndarray, smoothing: float = DEFAULT_SMOOTHING) -> np.ndarray:
+    """
+    Bourdet derivative ds/d ln(x) of drawdown against a time axis x.
+
+    For each reading the left and right points are the nearest readings at
+    least `smoothing` away in ln(x), found for all readings at once with
+    searchsorted; where the record ends before that distance the end reading
+    is used, and where there is no reading on one side the other slope is used
+    alone. The two slopes are weighted by the opposite distances:
+        s' = (Δs_l/ΔX_l · ΔX_r + Δs_r/ΔX_r · ΔX_l) / (ΔX_l + ΔX_r)
+
+    Readings at x <= 0 (or NaN) get NaN and are left out of the windows. The
+    axis need not be increasing: t/t' for recovery is sorted internally, and the
+    result is returned in the order of the readings.
+    """
+    if smoothing < 0:
+        raise ValueError(f"Derivative smoothing must be non-negative, got {smoothing}.")
+    time_axis = np.asarray(time_axis, dtype=np.float64)
+    drawdown = np.asarray(drawdown, dtype=np.float64)
+    out = np.full(time_axis.shape, np.nan)
+
+    valid = np.flatnonzero(time_axis > 0)
+    order = valid[np.argsort(time_axis[valid], kind="stable")]
+    x = np.log(time_axis[order])
+    s = drawdown[order]
+    n = len(x)
+    if n < 2:
+        return out
+
+    i = np.arange(n)
+    left = np.clip(np.minimum(np.searchsorted(x, x - smoothing, side="right") - 1, i - 1), 0, n - 1)
+    right = np.clip(np.maximum(np.searchsorted(x, x + smoothing, side="left"), i + 1), 0, n - 1)
+    dx_left = x - x[left]
+    dx_right = x[right] - x
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope_left = np.where(dx_left > 0, (s - s[left]) / dx_left, np.nan)
+        slope_right = np.where(dx_right > 0, (s[right] - s) / dx_right, np.nan)
+        weighted = (slope_left * dx_right + slope_right * dx_left) / (dx_left + dx_right)
+    out[order] = np.where(
+        np.isnan(slope_left), slope_right, np.where(np.isnan(slope_right), slope_left, weighted)
+    )
+    return out
+
+def diagnose_derivative(
+    time_axis: np.ndarray,
+    drawdown: np.ndarray,
+    flowrate_m3day: float,
+    smoothing: float = DEFAULT_SMOOTHING,
+    flat_tolerance: float = DEFAULT_FLAT_TOLERANCE,
+    flat_half_width: float = DEFAULT_FLAT_HALF_WIDTH,
+    min_points: int = DEFAULT_MIN_POINTS,
+    min_log_cycles: float = DEFAULT_MIN_LOG_CYCLES,
+) -> DerivativeDiagnostic:
+    """
+    Bourdet derivative of a test, with its radial-flow plateaus flagged.
+
+    In infinite-acting radial flow s = Q/(4πT) ln t + c, so the derivative is
+    flat at Q/(4πT) whatever the units of t. A reading is flagged flat when the
+    log-log slope of the derivative, fitted by least squares over the readings
+    within flat_half_width log cycles of it, is within flat_tolerance of zero.
+    The windows come from searchsorted and are all fitted in one pass over
+    prefix sums, so the noise of single derivative points averages out. Runs
+    of consecutive flat readings holding at least min_points readings and
+    spanning min_log_cycles become plateaus, each with the T of its median
+    derivative. Wellbore storage (unit slope)
+    and boundaries (rising or falling derivative) are never flagged; a second,
+    higher plateau after the first suggests a no-flow boundary.
+
+    Args:
+        time_axis:      Elapsed time [min] for constant-rate, t/t' for recovery
+                        (readings in time order; x <= 0 is left out).
+        drawdown:       Drawdown [m], same length as time_axis.
+        flowrate_m3day: Pumping rate used for T [m³/day].
+        smoothing:      Bourdet L in ln units (0 = nearest neighbours).
+        flat_tolerance: Largest |d ln s' / d ln t| treated as flat.
+        flat_half_width: Half-width of the flatness window in log cycles.
+        min_points:     Minimum readings in a plateau (at least 3).
+        min_log_cycles: Minimum span of a plateau in log cycles.
+
+    Returns:
+        DerivativeDiagnostic; its plateaus are ranked by span, longest first.
+
+    Raises:
+        ValueError: On invalid settings.
+    """
+    if flat_tolerance <= 0:
+        raise ValueError(f"Flatness tolerance must be positive, got {flat_tolerance}.")
+    if flat_half_width <= 0:
+        raise ValueError(f"Flatness window half-width must be positive, got {flat_half_width}.")
+    if min_points < 3:
+        raise ValueError(f"Minimum points per plateau must be at least 3, got {min_points}.")
+
+    time_axis = np.asarray(time_axis, dtype=np.float64)
+    derivative = bourdet_derivative(time_axis, drawdown, smoothing)
+    order = np.flatnonzero(time_axis > 0)
+    order = order[np.argsort(time_axis[order], kind="stable")]
+    log_axis = np.log10(time_axis[order])
+
+    # Log-log slope of the derivative around each reading, in order along the time axis
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_derivative = np.log(np.where(derivative[order] > 0, derivative[order], np.nan))
+    starts = np.searchsorted(log_axis, log_axis - flat_half_width, side="left")
+    ends = np.searchsorted(log_axis, log_axis + flat_half_width, side="right")
+    fits = PrefixRegression.semilog(time_axis[order], log_derivative).fit_windows(starts, ends)
+    flat_sorted = (np.abs(fits.slope) < flat_tolerance) & (fits.n_points >= 3)
+    flat = np.zeros(time_axis.shape, dtype=bool)
+    flat[order] = flat_sorted
+
+    # Runs of flat readings
+    edges = np.diff(np.concatenate(([0], flat_sorted.astype(np.int8), [0])))
+    run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    plateaus = []
+    for a, b in zip(run_starts, run_ends):
+        log_cycles = log_axis[b - 1] - log_axis[a]
+        if b - a < min_points or log_cycles < min_log_cycles:
+            continue
+        indices = order[a:b]
+        level = float(np.median(derivative[indices]))
+        plateaus.append(RadialFlowPlateau(
+            start_idx=int(indices.min()),
+            end_idx=int(indices.max()) + 1,
+            n_points=int(b - a),
+            log_cycles=float(log_cycles),
+            derivative_m=level,
+            transmissivity_m2day=flowrate_m3day / (4 * np.pi * level),
+        ))
+    plateaus.sort(key=lambda p: p.log_cycles, reverse=True)
+
+    return DerivativeDiagnostic(
+        smoothing=smoothing,
+        derivative_m=derivative,
+        flat=flat,
+        plateaus=plateaus,
+    )
@@ -1,4 +1,39 @@
-from models import ConstantRateResult, RecoveryResult, StepDrawdownResult
+from models import ConstantRateResult, RecoveryResult, StepDrawdownResult, SemilogSegmentation, TypeCurveFit, DerivativeDiagnostic, RecoveryMethod, BootstrapIntervals, ConfidenceInterval, MonteCarloResult, ErrorDistribution, RegressionMethod, QCResult, QCCheck
+from analysis.type_curves import type_curve_family
+import numpy as np
+
+SLOPE_CHANGE_RATIO = 1.5    # slope ratio across a breakpoint treated as a real change of regime
+MAX_SPECIFIC_YIELD = 0.5    # above this a fitted delayed-yield Sy is not physical
+RECOVERY_METHOD_NAMES = {
+    RecoveryMethod.THEIS: "Theis recovery",
+    RecoveryMethod.AGARWAL: "Agarwal equivalent-time",
+    RecoveryMethod.RESIDUAL: "residual-drawdown",
+}
+REGRESSION_METHOD_NAMES = {
+    RegressionMethod.THEIL_SEN: "Theil-Sen (median of pairwise slopes)",
+    RegressionMethod.HUBER: "Huber",
+}
+QC_CHECK_NAMES = {  # (singular, plural) of a rejected reading
+    QCCheck.SPIKE: ("spike", "spikes"),
+    QCCheck.FLATLINE: ("flat-lined reading", "flat-lined readings"),
+    QCCheck.BELOW_PUMP: ("level below the pump intake", "levels below the pump intake"),
+}
+COOPER_JACOB_INTERVALS = [  # (result field, label, format, units) quoted in the interval notes
+    ("transmissivity_m2day", "T", ".1f", "m²/day"),
+    ("estimated_yield_m3day", "yield", ".0f", "m³/day"),
+]
+MONTE_CARLO_INPUTS = {
+    "flowrate_pct": "{:g}% on the flowrate",
+    "static_level_m": "{:g} m on the static level",
+    "end_of_pumping_min": "{:g} min on the end of pumping",
+    "step_time_min": "{:g} min on the step end times",
+}
+STEP_DRAWDOWN_INTERVALS = [
+    ("aquifer_loss_coeff", "B", ".4f", "m/(m³/h)"),
+    ("well_loss_coeff", "C", ".4f", "m/(m³/h)²"),
+    ("critical_yield_m3h", "critical yield", ".1f", "m³/h"),
+    ("transmissivity_m2day", "T", ".1f", "m²/day"),
+]
 
 def _transmissivity_class(T: float) -> str:
     if T < 1:
@@ -18,6 +53,176 @@ def _fit_quality(r2: float) -> str:
     else:
         return f"poor (R² = {r2:.3f}) — the straight-line assumption may not hold; consider adjusting the fit window or reviewing the data"
 
+def _type_curve_note(fit: TypeCurveFit, flowrate_m3day: float) -> str:
+    """ One paragraph on a type-curve fit, with what its shape parameters mean. """
+    label = type_curve_family(fit.family).description.split(":")[0]
+    text = (
+        f"Fitting the {label} type curve to all readings gives "
+        f"T = **{fit.transmissivity_m2day:.1f} m²/day** and S = {fit.storativity:.1e} "
+        f"(R² = {fit.r_squared:.3f}, RMSE = {fit.rmse_m:.2f} m)."
+    )
+    if fit.family == "hantush_jacob":
+        text += (
+            f" The leakage factor r/B = {fit.parameters['r_over_b']:.2g}; the flattening it describes "
+            "can also come from a recharge boundary, which the drawdown alone cannot tell apart."
+        )
+    elif fit.family == "boulton":
+        specific_yield = fit.storativity / fit.parameters["sigma"]
+        text += f" The storage ratio S/Sy = {fit.parameters['sigma']:.2g} implies a specific yield of about {specific_yield:.2f}"
+        text += (
+            ", which is not physically plausible, so delayed yield does not explain this curve."
+            if specific_yield > MAX_SPECIFIC_YIELD else ", consistent with delayed drainage from an unconfined aquifer."
+        )
+    elif fit.family == "papadopulos_cooper":
+        text += " Early drawdown is dominated by water drawn from the casing (wellbore storage)."
+    elif fit.family in ("warren_root", "moench"):
+        text += (
+            f" The fissures hold about {100 * fit.parameters['omega']:.2g}% of the storage, and the "
+            f"interporosity coefficient λ = {fit.parameters['lambda']:.2g} sets when the matrix blocks start "
+            "to feed them; drawdown from a fissured aquifer flattens between two parallel semi-log lines."
+        )
+    elif fit.family == "wellbore_storage_skin":
+        skin = fit.parameters["skin"]
+        skin_loss = skin * flowrate_m3day / (2 * np.pi * fit.transmissivity_m2day)
+        text += (
+            f" The skin factor of {skin:.1f} adds about **{skin_loss:.2f} m** of drawdown across a damaged zone "
+            "around the well; development or rehabilitation may recover it."
+            if skin > 1 else f" The skin factor of {skin:.1f} shows no significant well damage."
+        )
+    if fit.storativity > MAX_SPECIFIC_YIELD:
+        text += (
+            f" A storativity of {fit.storativity:.2g} is more than any aquifer releases, so this "
+            "family does not describe the curve; treat its T as indicative only."
+        )
+    elif not fit.converged:
+        text += " The fit did not fully converge; treat it as indicative only."
+    return text
+
+def _derivative_note(diagnostic: DerivativeDiagnostic) -> str:
+    """ How the derivative chose the fit window, and what its other plateaus suggest. """
+    first, *others = diagnostic.plateaus
+    text = (
+        f"The fit window is the longest flat stretch of the derivative ds/d ln t (readings "
+        f"{first.start_idx}–{first.end_idx - 1}, {first.log_cycles:.1f} log cycles), the signature of "
+        f"radial flow; its level alone gives T = {first.transmissivity_m2day:.1f} m²/day."
+    )
+    if others:
+        levels = ", ".join(f"{p.transmissivity_m2day:.1f}" for p in others)
+        text += (
+            f" The derivative also levels off elsewhere (T = {levels} m²/day); plateaus at different "
+            "levels point to boundaries or changes in the aquifer."
+        )
+    return text
+
+def _interval_list(intervals: dict[str, ConfidenceInterval], values: list[tuple[str, str, str, str]]) -> str:
+    """ The intervals present, given as (result field, label, format, units), joined by semicolons. """
+    parts = []
+    for key, label, fmt, units in values:
+        interval = intervals.get(key)
+        if interval is not None:
+            if np.isinf(interval.upper):
+                parts.append(f"{label} at least {interval.lower:{fmt}} {units}, with no upper bound".rstrip())
+            else:
+                parts.append(f"{label} {interval.lower:{fmt}}–{interval.upper:{fmt}} {units}".rstrip())
+    return "; ".join(parts)
+
+def _confidence_note(confidence: BootstrapIntervals, values: list[tuple[str, str, str, str]]) -> str:
+    """ One sentence listing the bootstrap intervals. """
+    return (
+        f"From {confidence.n_replicates} bootstrap replicates ({confidence.method.value} resampling), "
+        f"the {confidence.confidence:.0%} confidence intervals are: {_interval_list(confidence.intervals, values)}."
+    )
+
+def _monte_carlo_note(
+    monte_carlo: MonteCarloResult, values: list[tuple[str, str, str, str]], inputs: list[str]
+) -> str:
+    """ Describe the spread of the results under the errors on the given field inputs (MonteCarloSettings fields). """
+    settings = monte_carlo.settings
+    errors = [
+        description.format(getattr(settings, field))
+        for field, description in MONTE_CARLO_INPUTS.items()
+        if field in inputs and getattr(settings, field) > 0
+    ]
+    spread = "half-width" if settings.distribution == ErrorDistribution.UNIFORM else "standard deviation"
+    assumed = f"errors ({spread}) of {', '.join(errors)}" if errors else "no field-input errors"
+    return (
+        f"Propagating {assumed} through {settings.n_samples} Monte Carlo samples, "
+        f"{settings.confidence:.0%} of the results fall within: {_interval_list(monte_carlo.intervals, values)}."
+    )
+
+def _regression_note(method: RegressionMethod) -> str:
+    """ A sentence naming a robust line estimator; empty for least squares. """
+    if method == RegressionMethod.LEAST_SQUARES:
+        return ""
+    return (
+        f" The lines are fitted by {REGRESSION_METHOD_NAMES[method]} regression, which resists spikes "
+        "in the logger record; R² is still measured against the fitted line, so isolated spikes lower it."
+    )
+
+def _segmentation_note(segmentation: SemilogSegmentation) -> str:
+    """ Describe the flow regimes suggested by the piecewise semi-log fit. """
+    segments = segmentation.segments
+    if len(segments) < 2:
+        return (
+            "Piecewise analysis finds a **single straight line** over the whole test, "
+            "consistent with radial flow throughout."
+        )
+
+    breaks = ", ".join(f"{t:.1f}" for t in segmentation.breakpoints_min)
+    T_values = ", ".join(
+        f"{seg.transmissivity_m2day:.1f}" if seg.fit.slope > 0 else "n/a" for seg in segments
+    )
+    text = (
+        f"Piecewise analysis splits the drawdown curve into **{len(segments)} straight-line segments** "
+        f"(breaks at t = {breaks} min), with transmissivities of {T_values} m²/day."
+    )
+    for i, (before, after) in enumerate(zip(segments, segments[1:])):
+        t_break = segmentation.breakpoints_min[i]
+        ratio = after.fit.slope / before.fit.slope if before.fit.slope > 0 else float("inf")
+        if after.fit.slope <= 0 or ratio < 1 / SLOPE_CHANGE_RATIO:
+            if i == 0:
+                text += (
+                    f" The flatter slope after {t_break:.1f} min is consistent with early-time "
+                    "wellbore storage giving way to radial flow; the later segments better represent the aquifer."
+                )
+            else:
+                text += (
+                    f" The drawdown flattens after {t_break:.1f} min, consistent with a recharge "
+                    "or leakage boundary."
+                )
+        elif ratio > SLOPE_CHANGE_RATIO:
+            text += (
+                f" The drawdown steepens after {t_break:.1f} min (slope × {ratio:.1f}), consistent "
+                "with a no-flow (barrier) boundary or dewatering of the aquifer."
+            )
+        else:
+            text += f" The slope changes only slightly at {t_break:.1f} min (× {ratio:.2f})."
+    return text
+
+def interpret_quality(qc: QCResult) -> str:
+    """ Summary of the quality-control checks on the raw record, for the report. """
+    rejected = int((~qc.mask).sum())
+    found = [
+        f"{count} {QC_CHECK_NAMES[check][count > 1]}"
+        for check, count in qc.counts.items() if count > 0
+    ]
+    if found:
+        text = (
+            f"Quality control rejected **{rejected} of {len(qc.mask)} readings** ({', '.join(found)}); "
+            "they are left out of the analysis and shown separately on the plots."
+        )
+    else:
+        checked = " or ".join(QC_CHECK_NAMES[check][1] for check in qc.flags) or "problems"
+        text = f"Quality control found no {checked} among the {len(qc.mask)} readings."
+    if qc.gaps:
+        longest = max(qc.gaps, key=lambda gap: gap.end_min - gap.start_min)
+        text += (
+            f" The record has {len(qc.gaps)} gap(s) much longer than the sampling around them, the longest "
+            f"{longest.end_min - longest.start_min:.0f} min from {longest.start_min:g} min; "
+            "the readings either side are kept, but a fit across a gap rests on fewer readings than it seems."
+        )
+    return text
+
 def interpret_constant_rate(result: ConstantRateResult, borehole_name: str = "") -> str:
     name = f"Borehole {borehole_name}" if borehole_name else "The borehole"
     has_fit2 = result.fit2 is not None
@@ -32,6 +237,7 @@ def interpret_constant_rate(result: ConstantRateResult, borehole_name: str = "")
         f"({result.estimated_yield_m3day / 24:.1f} m³/h). "
         f"The Cooper-Jacob straight-line fit quality is "
         f"{_fit_quality(result.fit.r_squared)}."
+        f"{_regression_note(result.regression_method)}"
     )
 
     # Second fit paragraph — only if present
@@ -65,6 +271,36 @@ def interpret_constant_rate(result: ConstantRateResult, borehole_name: str = "")
             f"{agreement_note}"
         )
 
+    if result.theis is not None:
+        theis = result.theis
+        ratio = theis.transmissivity_m2day / result.transmissivity_m2day
+        agreement = (
+            "in good agreement with" if 1 / 1.5 < ratio < 1.5 else "noticeably different from"
+        )
+        text += (
+            f"\n\nA Theis type-curve fit to all readings gives T = **{theis.transmissivity_m2day:.1f} m²/day** "
+            f"and S = {theis.storativity:.1e} (R² = {theis.r_squared:.3f}, RMSE = {theis.rmse_m:.2f} m), "
+            f"{agreement} the Cooper-Jacob value."
+        )
+        if not theis.converged:
+            text += " The Theis fit did not fully converge; treat it as indicative only."
+
+    if result.type_curve is not None:
+        text += f"\n\n{_type_curve_note(result.type_curve, result.flowrate_m3day)}"
+
+    if result.derivative is not None:
+        text += f"\n\n{_derivative_note(result.derivative)}"
+
+    if result.segmentation is not None:
+        text += f"\n\n{_segmentation_note(result.segmentation)}"
+
+    if result.confidence is not None:
+        text += "\n\n" + _confidence_note(result.confidence, COOPER_JACOB_INTERVALS) + (
+            " They reflect the scatter about the Fit 1 line only, not the choice of fit window."
+        )
+    if result.monte_carlo is not None:
+        text += "\n\n" + _monte_carlo_note(result.monte_carlo, COOPER_JACOB_INTERVALS, ["flowrate_pct"])
+
     return text
 
 def interpret_recovery(result: RecoveryResult, borehole_name: str = "") -> str:
@@ -76,13 +312,33 @@ def interpret_recovery(result: RecoveryResult, borehole_name: str = "") -> str:
     )
     if result.recovery_pcg < 80:
         recovery_note += "This incomplete recovery may indicate low aquifer productivity or insufficient recovery time. "
-    return (
+    text = (
         f"{name} has an estimated transmissivity of **{T:.1f} m²/day** from recovery analysis, "
         f"indicating {_transmissivity_class(T)}. "
         f"Estimated sustainable yield is approximately **{result.estimated_yield_m3day:.0f} m³/day**. "
         f"{recovery_note}"
-        f"The Theis recovery fit quality is {_fit_quality(result.fit.r_squared)}."
+        f"The {RECOVERY_METHOD_NAMES[result.method]} fit quality is {_fit_quality(result.fit.r_squared)}."
+        f"{_regression_note(result.regression_method)}"
     )
+    if result.method == RecoveryMethod.AGARWAL:
+        text += (
+            " Plotting the recovery against Agarwal's equivalent time removes the effect of the "
+            "pumping duration, so the curve can be read as a drawdown curve."
+        )
+    elif result.method == RecoveryMethod.RESIDUAL:
+        text += (
+            " The residual drawdown is fitted against the time since pumping stopped, which holds "
+            "only while that time is short compared with the pumping period."
+        )
+    if result.derivative is not None:
+        text += f"\n\n{_derivative_note(result.derivative)}"
+    if result.confidence is not None:
+        text += "\n\n" + _confidence_note(result.confidence, COOPER_JACOB_INTERVALS)
+    if result.monte_carlo is not None:
+        text += "\n\n" + _monte_carlo_note(
+            result.monte_carlo, COOPER_JACOB_INTERVALS, ["flowrate_pct", "end_of_pumping_min"]
+        )
+    return text
 
 def interpret_step_drawdown(result: StepDrawdownResult, borehole_name: str = "") -> str:
     name = f"Borehole {borehole_name}" if borehole_name else "The borehole"
@@ -96,6 +352,28 @@ def interpret_step_drawdown(result: StepDrawdownResult, borehole_name: str = "")
         else:
             eff_note = f"Well efficiency at the highest tested rate is only **{eff:.0f}%**, indicating significant non-linear losses — the well construction should be reviewed."
 
+    superposition_note = ""
+    if result.superposition is not None:
+        fit = result.superposition
+        superposition_note = (
+            f" Fitting all {fit.n_points_used} readings with superposition of the pumping steps (Eden-Hazel) "
+            f"also gives a transmissivity of **{fit.transmissivity_m2day:.1f} m²/day**; B is quoted for a "
+            f"step of {fit.reference_duration_min:.0f} min."
+        )
+
+    confidence_note = ""
+    if result.confidence is not None:
+        confidence_note = "\n\n" + _confidence_note(result.confidence, STEP_DRAWDOWN_INTERVALS)
+        C = result.confidence.intervals.get("well_loss_coeff")
+        if C is not None and C.lower <= 0 <= C.upper:
+            confidence_note += (
+                " The interval on C includes zero: the well losses are not resolved by these steps."
+            )
+    if result.monte_carlo is not None:
+        confidence_note += "\n\n" + _monte_carlo_note(
+            result.monte_carlo, STEP_DRAWDOWN_INTERVALS, ["flowrate_pct", "static_level_m", "step_time_min"]
+        )
+
     return (
         f"{name} step-drawdown analysis yields an aquifer loss coefficient "
         f"B = **{result.aquifer_loss_coeff:.4f} m/(m³/h)** and well loss coefficient "
@@ -105,4 +383,7 @@ def interpret_step_drawdown(result: StepDrawdownResult, borehole_name: str = "")
         f"**{result.critical_yield_m3h * 0.8:.1f} m³/h** (80% of critical) is recommended. "
         f"{eff_note} "
         f"Fit quality is {_fit_quality(result.r_squared)}."
+        f"{_regression_note(result.regression_method)}"
+        f"{superposition_note}"
+        f"{confidence_note}"
     )
\ No newline at end of file
@@ -0,0 +1,56 @@
+from analysis.laplace import TypeCurveFamily, TypeCurveParameter
+from analysis.special import bessel_k
+import numpy as np
+
+# Laplace-domain models with no closed form in time, in t' = Tt/(r²S) like the
+# atlas families. They are inverted directly when evaluated (not tabulated):
+# their parameters span many decades, and skin is not a log-scaled quantity.
+
+def _warren_root_laplace(p, omega, lam):
+    # Pseudo-steady matrix-to-fissure flow: storage factor f(p) goes from ω (early) to 1 (late)
+    f = (omega * (1 - omega) * p + lam) / ((1 - omega) * p + lam)
+    return 2 * bessel_k(0, np.sqrt(p * f)) / p
+
+def _moench_laplace(p, omega, lam):
+    # Transient diffusion into slab matrix blocks (no fracture skin)
+    root = np.sqrt(3 * (1 - omega) * p / lam)
+    f = omega + (1 - omega) * np.tanh(root) / root
+    return 2 * bessel_k(0, np.sqrt(p * f)) / p
+
+def _wellbore_storage_skin_laplace(p, storage, skin):
+    # Agarwal et al. (1970): finite well of radius r with storage C_D = C/(2π S r²) and skin
+    root = np.sqrt(p)
+    k0 = bessel_k(0, root)
+    k1 = bessel_k(1, root)
+    face = k0 + skin * root * k1
+    return 2 * face / (p * (root * k1 + storage * p * face))
+
+_OMEGA = TypeCurveParameter("omega", 1e-4, 0.5, 10, "fissure share of total storage, S_f / (S_f + S_m)")
+_LAMBDA = TypeCurveParameter("lambda", 1e-8, 10.0, 10, "interporosity flow coefficient at r")
+
+LAPLACE_MODEL_FAMILIES = (
+    TypeCurveFamily(
+        name="warren_root",
+        description="Warren-Root: dual-porosity fissured aquifer, pseudo-steady matrix flow",
+        laplace=_warren_root_laplace,
+        parameters=(_OMEGA, _LAMBDA),
+        tabulated=False,
+    ),
+    TypeCurveFamily(
+        name="moench",
+        description="Moench: dual-porosity fissured aquifer, transient flow from slab blocks",
+        laplace=_moench_laplace,
+        parameters=(_OMEGA, _LAMBDA),
+        tabulated=False,
+    ),
+    TypeCurveFamily(
+        name="wellbore_storage_skin",
+        description="wellbore storage and skin: finite-diameter pumped well with a damaged zone",
+        laplace=_wellbore_storage_skin_laplace,
+        parameters=(
+            TypeCurveParameter("storage", 1.0, 1e8, 10, "C_D = C / (2π S r²), e.g. rc² / (2 r² S) for a casing"),
+            TypeCurveParameter("skin", 0.0, 50.0, 50, "skin factor; a negative skin shows as a larger apparent S", log=False),
+        ),
+        tabulated=False,
+    ),
+)
@@ -0,0 +1,216 @@
+from typing import Iterator, Optional
+from models import (
+    PumpingTest, MonteCarloSettings, MonteCarloResult, ErrorDistribution, RecoveryMethod, StepDrawdownMethod,
+    RegressionMethod,
+)
+from analysis.regression import PrefixRegression, fit_rows, huber_rows, solve_normal_equations
+from analysis.bootstrap import percentile_interval, critical_yield
+import numpy as np
+
+CHUNK_ELEMENTS = 2 ** 22    # array values held at once per chunk of samples (32 MB of float64)
+MACDONALD_YIELD_COEFFICIENT = 4.0
+COOPER_JACOB_COEFF = 0.183  # ln(10) / (4π), dimensionless
+HOURS_PER_DAY = 24.0
+
+def _chunks(settings: MonteCarloSettings, row_elements: int) -> Iterator[tuple[np.random.Generator, slice]]:
+    """
+    Split the samples into chunks of at most CHUNK_ELEMENTS // row_elements,
+    each with its own child of the settings' seed, so memory stays bounded
+    for any number of samples and the draws do not depend on the chunking
+    of earlier samples.
+    """
+    size = max(1, CHUNK_ELEMENTS // max(row_elements, 1))
+    starts = range(0, settings.n_samples, size)
+    seeds = np.random.SeedSequence(settings.seed).spawn(len(starts))
+    for start, seed in zip(starts, seeds):
+        yield np.random.default_rng(seed), slice(start, min(start + size, settings.n_samples))
+
+def _errors(rng: np.random.Generator, settings: MonteCarloSettings, spread: float, shape) -> np.ndarray:
+    """ Measurement errors of one input, drawn from the settings' distribution. """
+    if spread == 0:
+        return np.zeros(shape)
+    if settings.distribution == ErrorDistribution.UNIFORM:
+        return rng.uniform(-spread, spread, shape)
+    return rng.normal(0.0, spread, shape)
+
+def _flowrates(rng: np.random.Generator, settings: MonteCarloSettings, flowrates_m3h, shape) -> np.ndarray:
+    """ Pumping rates with a relative error; non-positive draws are NaN. """
+    flowrates = flowrates_m3h * (1 + _errors(rng, settings, settings.flowrate_pct / 100, shape))
+    return np.where(flowrates > 0, flowrates, np.nan)
+
+def _result(settings: MonteCarloSettings, samples: dict[str, np.ndarray]) -> MonteCarloResult:
+    return MonteCarloResult(
+        settings=settings,
+        intervals={name: percentile_interval(values, settings.confidence) for name, values in samples.items()},
+        samples=samples,
+    )
+
+def _cooper_jacob_samples(flowrates_m3h: np.ndarray, ds: np.ndarray) -> dict[str, np.ndarray]:
+    """ T and the McDonald yield from sampled rates and drawdowns per log cycle (NaN where ds <= 0). """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        T = np.where(ds > 0, COOPER_JACOB_COEFF * flowrates_m3h * HOURS_PER_DAY / ds, np.nan)
+    return {"transmissivity_m2day": T, "estimated_yield_m3day": MACDONALD_YIELD_COEFFICIENT * T}
+
+def propagate_constant_rate(
+    test: PumpingTest,
+    fit_start_idx: int,
+    fit_end_idx: Optional[int],
+    settings: MonteCarloSettings,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> MonteCarloResult:
+    """
+    Distributions of T and the yield of a Cooper-Jacob fit under field-input errors.
+
+    A static-level error moves every drawdown by the same amount and so leaves
+    the slope of the fit unchanged: only the flowrate error reaches T, which
+    scales with Q. The fit window is held fixed, and the line is fitted with
+    regression_method as in the analysis.
+    """
+    regression = PrefixRegression.semilog(test.time_series, test.drawdown_series, regression_method)
+    ds = regression.fit(fit_start_idx, fit_end_idx).drawdown_per_log_cycle
+    flowrates = np.empty(settings.n_samples)
+    for rng, part in _chunks(settings, 1):
+        flowrates[part] = _flowrates(rng, settings, test.flowrate_m3h, part.stop - part.start)
+    return _result(settings, _cooper_jacob_samples(flowrates, np.full(settings.n_samples, ds)))
+
+def propagate_recovery(
+    test: PumpingTest,
+    method: RecoveryMethod,
+    fit_start_idx: int,
+    fit_end_idx: Optional[int],
+    settings: MonteCarloSettings,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> MonteCarloResult:
+    """
+    Distributions of T and the yield of a recovery fit under field-input errors.
+
+    The pumping time t_p enters the time axis of the THEIS and AGARWAL plots
+    (see analysis.recovery.recovery_axes), so every sample of the end of
+    pumping gives its own axis over the fit window: the (samples, readings)
+    block of log-time values is fitted row by row in one pass, a chunk of
+    samples at a time, with regression_method as in the analysis. A
+    static-level error shifts all residual drawdowns alike and leaves the
+    slope unchanged. The fit window is held fixed.
+    """
+    window = slice(*slice(fit_start_idx, fit_end_idx).indices(len(test.time_series)))
+    t_prime = test.time_series[window]
+    drawdown = test.drawdown_series
+    response = drawdown[window] if method == RecoveryMethod.THEIS else drawdown[0] - drawdown[window]
+    usable = (t_prime > 0) & np.isfinite(response)
+    t_prime, response = t_prime[usable], response[usable]
+
+    flowrates = np.empty(settings.n_samples)
+    ds = np.empty(settings.n_samples)
+    # Theil-Sen lists the pairwise slopes of each sample's readings
+    row_elements = len(t_prime) ** 2 if regression_method == RegressionMethod.THEIL_SEN else len(t_prime)
+    for rng, part in _chunks(settings, row_elements):
+        n = part.stop - part.start
+        flowrates[part] = _flowrates(rng, settings, test.flowrate_m3h, n)
+        t_pumping = test.end_of_pumping_min + _errors(rng, settings, settings.end_of_pumping_min, (n, 1))
+        t_pumping = np.where(t_pumping > 0, t_pumping, np.nan)
+        if method == RecoveryMethod.THEIS:
+            log_time = np.log((t_pumping + t_prime) / t_prime)
+        elif method == RecoveryMethod.AGARWAL:
+            log_time = np.log(t_pumping * t_prime / (t_pumping + t_prime))
+        else:
+            log_time = np.broadcast_to(np.log(t_prime), (n, len(t_prime)))
+        slope, _ = fit_rows(log_time, response, regression_method)
+        ds[part] = slope * np.log(10)
+    return _result(settings, _cooper_jacob_samples(flowrates, ds))
+
+def _nearest_readings(time: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """ Index of the reading closest in time to each target (any shape). """
+    right = np.clip(np.searchsorted(time, targets), 1, len(time) - 1)
+    left = right - 1
+    return np.where(targets - time[left] <= time[right] - targets, left, right)
+
+def _loss_samples(B: np.ndarray, C: np.ndarray) -> dict[str, np.ndarray]:
+    """ B, C and the critical yield B/C of each sample (see analysis.bootstrap.critical_yield). """
+    return {"aquifer_loss_coeff": B, "well_loss_coeff": C, "critical_yield_m3h": critical_yield(B, C)}
+
+def propagate_step_drawdown(
+    test: PumpingTest,
+    method: StepDrawdownMethod,
+    settings: MonteCarloSettings,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> MonteCarloResult:
+    """
+    Distributions of B, C and the critical yield (and T for Eden-Hazel) of a
+    step-drawdown analysis under errors in the step rates, the step end times
+    and the static level.
+
+    Every sample perturbs all inputs at once and a chunk of samples is solved
+    together:
+        HANTUSH_BIERSCHENK: the drawdown at each sampled end time (nearest
+            reading, as in analysis.step_drawdown) less the static-level error,
+            divided by the sampled rate, fitted against it row by row.
+        EDEN_HAZEL: the superposition design [H, Q, Q²] of every reading
+            taken while pumping is built for each sample as a
+            (samples, readings, 3) block, and the stack of normal equations is
+            solved in one batched call.
+    Both fits use regression_method as in the analysis; Huber reweights
+    the whole stack of samples together (analysis.regression.huber_rows).
+    Samples with end times or rates out of order, or a non-positive drawdown
+    (Hantush-Bierschenk) or superposition slope (Eden-Hazel), are NaN.
+    """
+    time = test.time_series
+    drawdown = test.drawdown_series
+    steps = test.steps
+    end_times = np.array([step.end_time_min for step in steps])
+    step_rates = np.array([step.flowrate_m3h for step in steps])
+    k = len(steps)
+
+    eden_hazel = method == StepDrawdownMethod.EDEN_HAZEL
+    if eden_hazel:
+        # Every reading any sample might count as pumping
+        latest = end_times[-1] + 6 * settings.step_time_min
+        pumping = (time > 0) & (time <= latest)
+        time, drawdown = time[pumping], drawdown[pumping]
+
+    names = ["aquifer_loss_coeff", "well_loss_coeff", "critical_yield_m3h"]
+    if eden_hazel:
+        names.append("transmissivity_m2day")
+    samples = {name: np.empty(settings.n_samples) for name in names}
+    for rng, part in _chunks(settings, len(time) * max(k, 3) if eden_hazel else k):
+        n = part.stop - part.start
+        flowrates = _flowrates(rng, settings, step_rates, (n, k))
+        ends = end_times + _errors(rng, settings, settings.step_time_min, (n, k))
+        level_error = _errors(rng, settings, settings.static_level_m, (n, 1))
+        ordered = (
+            np.all(np.diff(ends, axis=1) > 0, axis=1) & (ends[:, 0] > 0)
+            & np.all(np.diff(flowrates, axis=1) > 0, axis=1)
+        )
+
+        if not eden_hazel:
+            step_drawdowns = drawdown[_nearest_readings(time, ends)] - level_error
+            valid = ordered & np.all(step_drawdowns > 0, axis=1)
+            C, B = fit_rows(flowrates, step_drawdowns / flowrates, regression_method)
+            B, C = np.where(valid, B, np.nan), np.where(valid, C, np.nan)
+            for name, values in _loss_samples(B, C).items():
+                samples[name][part] = values
+            continue
+
+        starts = np.concatenate([np.zeros((n, 1)), ends[:, :-1]], axis=1)
+        elapsed = time[None, :, None] - starts[:, None, :]  # (samples, readings, steps)
+        log_elapsed = np.log10(elapsed, out=np.zeros_like(elapsed), where=elapsed > 0)
+        changes = np.diff(flowrates, axis=1, prepend=0.0)
+        superposed = (log_elapsed @ np.nan_to_num(changes)[:, :, None])[..., 0]
+        step_index = np.minimum((time[None, :, None] > ends[:, None, :]).sum(axis=2), k - 1)
+        rates = np.take_along_axis(np.nan_to_num(flowrates), step_index, axis=1)
+        weight = (time[None, :] <= ends[:, -1:]).astype(np.float64)
+        design = np.stack([superposed, rates, rates ** 2], axis=2) * weight[..., None]
+        observed = (drawdown[None, :] - level_error) * weight
+        if regression_method == RegressionMethod.HUBER:
+            coeffs = huber_rows(design, observed, weight)
+        else:
+            transposed = design.transpose(0, 2, 1)
+            coeffs = solve_normal_equations(transposed @ design, (transposed @ observed[..., None])[..., 0])
+        a, b, C = coeffs.T
+        valid = ordered & np.all(np.isfinite(flowrates), axis=1) & (a > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            B = np.where(valid, a * np.log10(ends[:, -1] / k) + b, np.nan)
+            C = np.where(valid, C, np.nan)
+            samples["transmissivity_m2day"][part] = np.where(valid, COOPER_JACOB_COEFF * HOURS_PER_DAY / a, np.nan)
+        for name, values in _loss_samples(B, C).items():
+            samples[name][part] = values
+    return _result(settings, samples)
@@ -0,0 +1,114 @@
+from dataclasses import replace
+from models import PumpingTest, QCSettings, QCResult, QCCheck, DataGap
+import numpy as np
+
+MAD_TO_SIGMA = 1.4826       # median absolute deviation to standard deviation, normal errors
+MIN_ROWS = 3                # readings that must pass for a test to be analysed
+
+def _rolling_median_mad(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Median and median absolute deviation of the window of readings centred on
+    each reading, all at once from a strided (n, window) view. The ends are
+    padded with the first and last value.
+    """
+    half = window // 2
+    windows = np.lib.stride_tricks.sliding_window_view(np.pad(values, half, mode="edge"), window)
+    median = np.median(windows, axis=1)
+    mad = np.median(np.abs(windows - median[:, None]), axis=1)
+    return median, mad
+
+def flag_spikes(level: np.ndarray, window: int, threshold: float, min_m: float) -> np.ndarray:
+    """
+    Readings further from the rolling median than threshold rolling MADs
+    (scaled to a standard deviation) and than min_m.
+
+    A short spike does not move the median of its window, so it stands out
+    against it; a smooth drawdown curve or a step change, however steep, is
+    followed by the median. min_m keeps quantised readings, whose MAD is
+    often zero, from being flagged for one unit of resolution.
+    """
+    median, mad = _rolling_median_mad(level, window)
+    departure = np.abs(level - median)
+    return (departure > threshold * MAD_TO_SIGMA * mad) & (departure > min_m)
+
+def flag_flatlines(time: np.ndarray, level: np.ndarray, readings: int, duration_min: float) -> np.ndarray:
+    """
+    Readings that repeat the level before them, in runs of at least `readings`
+    identical levels lasting at least duration_min, as a stuck sensor
+    gives. The first reading of each run is kept.
+    """
+    n = len(level)
+    changed = np.ones(n, dtype=bool)
+    changed[1:] = level[1:] != level[:-1]
+    starts = np.flatnonzero(changed)
+    ends = np.append(starts[1:], n)
+    stuck = (ends - starts >= readings) & (time[ends - 1] - time[starts] >= duration_min)
+    # +1 after the first reading of each stuck run, -1 after its last: the running sum marks the run
+    marks = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marks, starts[stuck] + 1, 1)
+    np.add.at(marks, ends[stuck], -1)
+    return np.cumsum(marks[:n]) > 0
+
+def find_gaps(time: np.ndarray, factor: float, min_gap_min: float) -> list[DataGap]:
+    """
+    Intervals more than factor times the longer of their two neighbouring
+    intervals and at least min_gap_min longer than it, so that log-spaced or
+    irregular sampling is not mistaken for a gap (as in
+    in_out.timestamps.detect_clock_jumps).
+    """
+    intervals = np.diff(time)
+    if intervals.size == 0:
+        return []
+    previous = np.concatenate(([np.nan], intervals[:-1]))
+    following = np.concatenate((intervals[1:], [np.nan]))
+    with np.errstate(invalid="ignore"):
+        local = np.nan_to_num(np.fmax(previous, following), nan=0.0)
+        gap = (intervals > factor * local) & (intervals - local >= min_gap_min) & (local > 0)
+    return [
+        DataGap(index=int(i + 1), start_min=float(time[i]), end_min=float(time[i + 1]))
+        for i in np.flatnonzero(gap)
+    ]
+
+def check_quality(time: np.ndarray, level: np.ndarray, settings: QCSettings) -> QCResult:
+    """
+    Run every enabled quality-control check on a water-level record.
+
+    Args:
+        time:     Elapsed time [min], increasing.
+        level:    Water level [mbd].
+        settings: Thresholds of the checks; a None threshold skips its check.
+
+    Returns:
+        QCResult with one flag array per check that ran, and the gaps.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    level = np.asarray(level, dtype=np.float64)
+    flags = {}
+    if settings.spike_threshold is not None and len(level) >= settings.spike_window:
+        flags[QCCheck.SPIKE] = flag_spikes(level, settings.spike_window, settings.spike_threshold, settings.spike_min_m)
+    if settings.flatline_readings is not None:
+        flags[QCCheck.FLATLINE] = flag_flatlines(time, level, settings.flatline_readings, settings.flatline_min)
+    if settings.pump_depth_mbd is not None:
+        flags[QCCheck.BELOW_PUMP] = level > settings.pump_depth_mbd
+    gaps = find_gaps(time, settings.gap_factor, settings.min_gap_min) if settings.gap_factor is not None else []
+    return QCResult(settings=settings, time_min=time, level_mbd=level, flags=flags, gaps=gaps)
+
+def apply_quality_control(test: PumpingTest, settings: QCSettings) -> PumpingTest:
+    """
+    Check the raw record of a test and keep only the readings that pass.
+
+    Run before decimation, on the readings as logged. The returned test keeps
+    the QCResult in test.qc, so the plots can show the rejected readings and
+    the report can summarise them; fit indices refer to the kept readings.
+
+    Raises:
+        ValueError: If fewer than MIN_ROWS readings pass.
+    """
+    result = check_quality(test.time_series, test.level_series, settings)
+    mask = result.mask
+    if mask.sum() < MIN_ROWS:
+        raise ValueError(
+            f"Quality control rejected {len(mask) - mask.sum()} of {len(mask)} readings; "
+            f"at least {MIN_ROWS} must pass. Check the QC thresholds and the pump depth."
+        )
+    return replace(test, measurements=test.measurements[mask], qc=result)
@@ -1,4 +1,9 @@
-from models import PumpingTest, RecoveryResult, DrawdownFit
+from models import PumpingTest, RecoveryResult, FitWindowMode, RecoveryMethod, RecoveryAxes, BootstrapSettings, MonteCarloSettings, RegressionMethod
+from analysis.regression import PrefixRegression
+from analysis.window_search import search_fit_windows
+from analysis.derivative import diagnose_derivative
+from analysis.constant_rate import cooper_jacob_intervals
+from analysis.monte_carlo import propagate_recovery
 from typing import Optional
 import numpy as np
 # import warnings
@@ -8,10 +13,58 @@ MACDONALD_YIELD_COEFFICIENT = 4.0
 COOPER_JACOB_COEFF = 0.183  # ln(10) / (4π), dimensionless
 HOURS_PER_DAY = 24.0
 
+def recovery_axes(test: PumpingTest, method: RecoveryMethod = RecoveryMethod.THEIS) -> RecoveryAxes:
+    """
+    Time axis and response of a recovery test for one recovery method, cached on
+    the test so the analysis and the plots share a single transform.
+
+    With t' the time since pumping stopped, t_p the pumping time and s' the
+    residual drawdown, each method is a semi-log straight line whose rise per
+    log cycle gives T = 0.183 Q / Δs:
+        THEIS:    s' against t/t' = (t_p + t') / t'.
+        AGARWAL:  the recovery s_p - s' against the equivalent time
+                  t_e = t_p t' / (t_p + t'), which behaves like a drawdown curve
+                  and so also holds when the pumping phase was short.
+        RESIDUAL: s' against t'; fitted as the recovery s_p - s', which rises
+                  along log t' while t' stays small beside t_p.
+    s_p is the drawdown of the first recovery reading, taken at the pump stop.
+    Axis values are NaN where t' <= 0.
+    """
+    key = (method, test.borehole.static_level_mbd, test.end_of_pumping_min)
+    cached = test._recovery_cache.get(key)
+    if cached is not None:
+        return cached
+
+    t_prime = test.time_series
+    t_pumping = test.end_of_pumping_min
+    drawdown = test.drawdown_series
+    end_drawdown = float(drawdown[0])
+    positive = t_prime > 0
+    if method == RecoveryMethod.THEIS:
+        time_axis = np.divide(t_pumping + t_prime, t_prime, out=np.full_like(t_prime, np.nan), where=positive)
+        response = drawdown
+    elif method == RecoveryMethod.AGARWAL:
+        time_axis = np.divide(t_pumping * t_prime, t_pumping + t_prime, out=np.full_like(t_prime, np.nan), where=positive)
+        response = end_drawdown - drawdown
+    else:
+        time_axis = np.where(positive, t_prime, np.nan)
+        response = end_drawdown - drawdown
+    for column in (time_axis, response):
+        column.flags.writeable = False
+
+    axes = RecoveryAxes(method=method, time_axis=time_axis, response_m=response, end_drawdown_m=end_drawdown)
+    test._recovery_cache[key] = axes
+    return axes
+
 def analyse_recovery(
     test: PumpingTest,
     fit_start_idx: int = 1, # Skip t=0 (log(0) is undefined)
     fit_end_idx: Optional[int] = None,  # If None, will use all remaining points
+    window_mode: FitWindowMode = FitWindowMode.MANUAL,
+    method: RecoveryMethod = RecoveryMethod.THEIS,
+    bootstrap: Optional[BootstrapSettings] = None,  # None = no confidence intervals
+    monte_carlo: Optional[MonteCarloSettings] = None,   # None = inputs taken as exact
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
 ) -> RecoveryResult:
     """
     Analyse a recovery test using the Cooper-Jacob straight-line method on the recovery data.
@@ -22,35 +75,69 @@ def analyse_recovery(
                        Defaults to 1 to skip t=0 where log is undefined.
         fit_end_idx:   Index of the last measurement (exclusive). Defaults to
                        all remaining points.
+        window_mode:   AUTO replaces fit_start_idx/fit_end_idx with the best
+                       window from analysis.window_search; the ranked
+                       candidates are kept on the result. DERIVATIVE uses the
+                       longest radial-flow plateau of the derivative against
+                       the method's time axis (analysis.derivative), kept on the result.
+        method:        Recovery plot to fit (see recovery_axes): THEIS (t/t'),
+                       AGARWAL (equivalent time, where the automatic search
+                       also checks u < 0.05) or RESIDUAL (t').
+        bootstrap:     If given, percentile confidence intervals on T and the
+                       yield from bootstrap replicates of the fit on the
+                       method's axes (analysis.bootstrap), kept on the result.
+        monte_carlo:   If given, distributions of T and the yield under the
+                       flowrate and end-of-pumping errors (analysis.monte_carlo),
+                       kept on the result.
+        regression_method: Estimator of the recovery line (analysis.robust);
+                       the automatic search then weights down spikes. The
+                       bootstrap replicates and Monte Carlo samples are
+                       refitted with the same estimator.
     
     Returns:
         RecoveryResult with transmissivity, estimated yield, and fit details.
     
     Raises:
         ValueError: If the fit window contains fewer than 2 points,
-                    or if any time value in the window is <= 0.
+                    or if any time value in the window is <= 0,
+                    or if no window passes the AUTO or DERIVATIVE selection.
     
     Note:
         The Cooper-Jacob approximation is only valid when u = r²S/(4Tt) < 0.05.
         Choose fit_start_idx to exclude early-time non-linear data.
     """
-    # Get drawdown and time series
     drawdown = test.drawdown_series
-    t_prime = test.time_series # time since revovery started in minutes
-    time = test.end_of_pumping_min + t_prime    # time since pumping started in minutes
-    # t/t' ratio for Cooper-Jacob analysis
-    time_ratio = np.divide(
-        time,
-        t_prime,
-        out=np.full_like(t_prime, np.nan),  # output array pre-filled with nan
-        where=t_prime > 0                    # only divide where this is True
-    )
+    axes = recovery_axes(test, method)
+    time_axis, response = axes.time_axis, axes.response_m
+
+    flowrate_m3day = test.flowrate_m3h * HOURS_PER_DAY  # Convert from m³/h to m³/day
+    candidates = []
+    derivative = None
+    if window_mode == FitWindowMode.AUTO:
+        # Only the equivalent time is a drawdown time axis on which u can be checked
+        candidates = search_fit_windows(
+            time_axis, response, flowrate_m3day,
+            check_u=method == RecoveryMethod.AGARWAL, regression_method=regression_method,
+        )
+        if not candidates:
+            raise ValueError(
+                "No fit window passes the automatic search (minimum points, log-cycle span). "
+                "Choose the fit window manually."
+            )
+        fit_start_idx, fit_end_idx = candidates[0].start_idx, candidates[0].end_idx
+    elif window_mode == FitWindowMode.DERIVATIVE:
+        derivative = diagnose_derivative(time_axis, response, flowrate_m3day)
+        if not derivative.plateaus:
+            raise ValueError(
+                "The recovery derivative shows no radial-flow plateau. "
+                "Choose the fit window manually or use the automatic search."
+            )
+        fit_start_idx, fit_end_idx = derivative.plateaus[0].start_idx, derivative.plateaus[0].end_idx
 
     if fit_end_idx is None:
         fit_end_idx = len(drawdown)
     
-    fit_drawdown = drawdown[fit_start_idx:fit_end_idx]
-    fit_time = time_ratio[fit_start_idx:fit_end_idx]
+    fit_time = time_axis[fit_start_idx:fit_end_idx]
 
     if len(fit_time) < 2:
         raise ValueError(
@@ -60,31 +147,25 @@ def analyse_recovery(
 
     if np.any(fit_time <= 0) or np.any(np.isnan(fit_time)):
         raise ValueError(
-            "Fit window contains non-positive or undefined time ratio values. "
+            "Fit window contains non-positive or undefined time axis values. "
             "Ensure fit_start_idx >= 1 to exclude t'=0."
         )
 
     # Fit a line to the semi-log plot of drawdown vs. time
-    log_time = np.log(fit_time)
-    slope, intercept = np.polyfit(log_time, fit_drawdown, 1)
-
-    # Calculate R² for the fit
-    y_pred = slope * log_time + intercept
-    ss_res = np.sum((fit_drawdown - y_pred) ** 2)
-    ss_tot = np.sum((fit_drawdown - np.mean(fit_drawdown)) ** 2)
-    r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0.0
-
-    # On the t/t' semi-log plot, drawdown decreases as t/t' decreases toward 1,
-    # so the slope is expected to be positive (drawdown increases with log(t/t')).
-    # If slope is negative, the fit window may be poorly chosen.
-    if slope < 0:
+    fit = PrefixRegression.semilog(time_axis, response, regression_method).fit(fit_start_idx, fit_end_idx)
+    slope = fit.slope
+
+    # On the t/t' semi-log plot, drawdown decreases as t/t' decreases toward 1, and
+    # the recovery grows with t' and t_e, so the slope is expected to be positive.
+    # If slope is negative or zero (flat levels), the fit window may be poorly chosen.
+    if slope <= 0:
         raise ValueError(
-            f"Negative slope ({slope:.4f}) suggests a poor fit window. "
+            f"Non-positive slope ({slope:.4f}) suggests a poor fit window. "
             "Check that fit_start_idx excludes early-time data."
         )
 
     # Calculate drawdown per log cycle (ds)
-    ds = slope * np.log(10)  # Convert slope to drawdown per log cycle
+    ds = fit.drawdown_per_log_cycle
 
     # Calculate the recovery
     if drawdown[0] == 0:
@@ -96,22 +177,30 @@ def analyse_recovery(
     recovery_pct = (1 - drawdown[-1] / drawdown[0]) * 100
 
     # Calculate transmissivity using Cooper-Jacob formula
-    flowrate_m3day = test.flowrate_m3h * HOURS_PER_DAY  # Convert from m³/h to m³/day
     T = COOPER_JACOB_COEFF * flowrate_m3day / ds
 
     # Estimate yield as per McDonald et al. (2005) - this is a very rough estimate and should be used with caution
     estimated_yield_m3day = MACDONALD_YIELD_COEFFICIENT * T
 
+    confidence = None
+    if bootstrap is not None:
+        confidence = cooper_jacob_intervals(
+            time_axis, response, fit_start_idx, fit_end_idx, flowrate_m3day, bootstrap, regression_method
+        )
+    propagated = None
+    if monte_carlo is not None:
+        propagated = propagate_recovery(test, method, fit_start_idx, fit_end_idx, monte_carlo, regression_method)
+
     return RecoveryResult(
-        fit = DrawdownFit(
-            slope=slope,
-            intercept=intercept,
-            drawdown_per_log_cycle=ds,
-            n_points_used=len(fit_time),
-            r_squared=r_squared
-        ),
+        fit=fit,
         recovery_pcg=recovery_pct,
         transmissivity_m2day=T,
         estimated_yield_m3day=estimated_yield_m3day,
-        flowrate_m3day=flowrate_m3day
+        flowrate_m3day=flowrate_m3day,
+        window_candidates=candidates,
+        derivative=derivative,
+        method=method,
+        confidence=confidence,
+        monte_carlo=propagated,
+        regression_method=regression_method,
     )
\ No newline at end of file
@@ -0,0 +1,309 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from models import DrawdownFit, RegressionMethod
+from analysis.robust import (
+    huber_line, huber_weights, spike_weights, theil_sen_line, theil_sen_rows,
+    MAD_TO_SIGMA, HUBER_MAX_ITERATIONS, HUBER_TOLERANCE,
+)
+import numpy as np
+
+LN10 = np.log(10)
+ROBUST_LINES = {
+    RegressionMethod.THEIL_SEN: theil_sen_line,
+    RegressionMethod.HUBER: huber_line,
+}
+SINGULAR_TOLERANCE = 1e-10  # det(XᵀX) relative to the product of its diagonal below which a system is singular
+
+def log_grid_bounds(log_axis: np.ndarray, bounds_per_log_cycle: int) -> np.ndarray:
+    """
+    Window boundaries on a log grid: the first reading in each grid cell along
+    the series, plus the end. Sparse early readings each start a cell, so every
+    one of them is a possible boundary; dense late readings share few.
+    """
+    valid = np.isfinite(log_axis)
+    cell = np.floor(np.where(valid, log_axis, 0.0) * bounds_per_log_cycle)
+    new_cell = np.ones(len(log_axis), dtype=bool)
+    new_cell[1:] = (cell[1:] != cell[:-1]) | (valid[1:] != valid[:-1])
+    return np.append(np.flatnonzero(new_cell & valid), len(log_axis))
+
+@dataclass
+class WindowFits:
+    """
+    Least-squares lines y = slope * x + intercept fitted over a batch of
+    windows, one entry per window. Windows with fewer than 2 usable points
+    or no spread in x give NaN.
+    """
+    slope: np.ndarray
+    intercept: np.ndarray
+    r_squared: np.ndarray
+    drawdown_per_log_cycle: np.ndarray  # slope * ln(10), meaningful when x = ln(t)
+    residual_ss: np.ndarray     # sum of squared residuals
+    n_points: np.ndarray    # usable points in each window
+
+@dataclass(eq=False)
+class PrefixRegression:
+    """
+    Straight-line regression of y on x over any window [start, end) of a
+    series in O(1) per window.
+
+    Cumulative sums of x, y, x², xy and y² are computed once; the sums over a
+    window are then two lookups, so a whole batch of windows (e.g. every
+    candidate fit window) is fitted in a single vectorised pass. Both series are
+    centred on their means first to limit cancellation when differencing large
+    cumulative sums. Points where x or y is not finite (e.g. ln(0)) contribute
+    nothing and are not counted.
+
+    With a robust method, fit() runs the robust estimator (analysis.robust)
+    on the window's readings. A batch of windows cannot be refitted robustly
+    one by one at the same cost, so fit_windows() instead weights each reading
+    by its spike weight (analysis.robust.spike_weights) in the sums, which
+    damps spikes in window searches and segmentation.
+    """
+    x: np.ndarray
+    y: np.ndarray
+    method: RegressionMethod = RegressionMethod.LEAST_SQUARES
+    _sums: np.ndarray = field(init=False, repr=False)    # (7, n + 1): count, weight, x, y, x², xy, y² (weighted)
+    _x_mean: float = field(init=False, repr=False)
+    _y_mean: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.x = np.asarray(self.x, dtype=np.float64)
+        self.y = np.asarray(self.y, dtype=np.float64)
+        if self.x.shape != self.y.shape or self.x.ndim != 1:
+            raise ValueError(f"x and y must be 1-D arrays of equal length, got shapes {self.x.shape} and {self.y.shape}.")
+
+        valid = np.isfinite(self.x) & np.isfinite(self.y)
+        self._x_mean = float(self.x[valid].mean()) if valid.any() else 0.0
+        self._y_mean = float(self.y[valid].mean()) if valid.any() else 0.0
+        dx = np.where(valid, self.x - self._x_mean, 0.0)
+        dy = np.where(valid, self.y - self._y_mean, 0.0)
+        count = valid.astype(np.float64)
+        weight = count
+        if self.method != RegressionMethod.LEAST_SQUARES:
+            weight = spike_weights(np.where(valid, self.x, np.nan), self.y)
+
+        terms = np.stack([count, weight, weight * dx, weight * dy, weight * dx * dx, weight * dx * dy, weight * dy * dy])
+        self._sums = np.zeros((7, len(self.x) + 1))
+        np.cumsum(terms, axis=1, out=self._sums[:, 1:])
+
+    @classmethod
+    def semilog(
+        cls, time: np.ndarray, drawdown: np.ndarray, method: RegressionMethod = RegressionMethod.LEAST_SQUARES
+    ) -> "PrefixRegression":
+        """ Regression of drawdown on ln(time); non-positive times are left out. """
+        time = np.asarray(time, dtype=np.float64)
+        log_time = np.log(time, out=np.full_like(time, np.nan), where=time > 0)
+        return cls(log_time, drawdown, method)
+
+    def _bounds(self, index, default: int) -> np.ndarray:
+        """ Normalise window bounds like slice indices: None, negative and out-of-range values. """
+        n = len(self.x)
+        index = np.full(1, default) if index is None else np.atleast_1d(index)
+        index = np.where(index < 0, index + n, index)
+        return np.clip(index, 0, n).astype(np.intp)
+
+    def fit_windows(self, starts, ends=None) -> WindowFits:
+        """
+        Fit every window [starts[i], ends[i]) at once from the cumulative sums.
+
+        Args:
+            starts: Start indices (inclusive), scalar or array.
+            ends:   End indices (exclusive), scalar or array; None means the end of the series.
+
+        Returns:
+            WindowFits with one entry per window (broadcast of starts and ends;
+            scalars give a single window).
+        """
+        starts = self._bounds(starts, 0)
+        ends = self._bounds(ends, len(self.x))
+        ends = np.maximum(ends, starts)
+        sums = self._sums[:, ends] - self._sums[:, starts]
+        return _solve(sums, self._x_mean, self._y_mean)
+
+    def fit(self, start: int = 0, end: Optional[int] = None) -> DrawdownFit:
+        """
+        Fit a single window [start, end) and return it as a DrawdownFit.
+
+        The window is re-centred on its own means before summing, so a short
+        window deep into a long record is as accurate as np.polyfit rather than
+        limited by the size of the cumulative sums around it. A robust method
+        fits the window's readings directly, with unit weights; r_squared is
+        then that of the robust line.
+        """
+        window = slice(*slice(start, end).indices(len(self.x)))
+        x, y = self.x[window], self.y[window]
+        valid = np.isfinite(x) & np.isfinite(y)
+        x, y = x[valid], y[valid]
+        if self.method != RegressionMethod.LEAST_SQUARES:
+            return _robust_fit(x, y, self.method)
+        x_mean = float(x.mean()) if len(x) else 0.0
+        y_mean = float(y.mean()) if len(y) else 0.0
+        dx, dy = x - x_mean, y - y_mean
+        sums = np.array([[len(x)], [len(x)], [dx.sum()], [dy.sum()], [dx @ dx], [dx @ dy], [dy @ dy]], dtype=np.float64)
+        fits = _solve(sums, x_mean, y_mean)
+        return DrawdownFit(
+            slope=float(fits.slope[0]),
+            intercept=float(fits.intercept[0]),
+            drawdown_per_log_cycle=float(fits.drawdown_per_log_cycle[0]),
+            n_points_used=int(fits.n_points[0]),
+            r_squared=float(fits.r_squared[0]),
+        )
+
+def _robust_fit(x: np.ndarray, y: np.ndarray, method: RegressionMethod) -> DrawdownFit:
+    """ A robust line through finite readings, as a DrawdownFit (NaN if there is no spread in x). """
+    slope, intercept = ROBUST_LINES[method](x, y) if len(x) >= 2 else (float("nan"), float("nan"))
+    ss_y = float(((y - y.mean()) ** 2).sum()) if len(y) else 0.0
+    residual_ss = float(((y - slope * x - intercept) ** 2).sum())
+    r_squared = 1 - residual_ss / ss_y if ss_y > 0 else 0.0
+    return DrawdownFit(
+        slope=slope,
+        intercept=intercept,
+        drawdown_per_log_cycle=slope * LN10,
+        n_points_used=len(x),
+        r_squared=r_squared if np.isfinite(slope) else float("nan"),
+    )
+
+def _solve(sums: np.ndarray, x_shift: float, y_shift: float) -> WindowFits:
+    """
+    Least-squares lines from window sums of shifted data.
+
+    Args:
+        sums:    (7, n_windows) rows of count, total weight and the weighted
+                 sums of x, y, x², xy, y², all taken after subtracting x_shift
+                 and y_shift.
+        x_shift: Amount subtracted from x before summing.
+        y_shift: Amount subtracted from y before summing.
+    """
+    count, weight, sx, sy, sxx, sxy, syy = sums
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_bar = sx / weight
+        y_bar = sy / weight
+        ss_x = sxx - sx * x_bar
+        ss_xy = sxy - sx * y_bar
+        ss_y = syy - sy * y_bar
+        usable = (count >= 2) & (ss_x > 0)
+        slope = np.where(usable, ss_xy / ss_x, np.nan)
+        intercept = (y_bar + y_shift) - slope * (x_bar + x_shift)
+        residual_ss = np.where(usable, np.maximum(ss_y - slope * ss_xy, 0.0), np.nan)
+        r_squared = np.where(ss_y > 0, 1 - residual_ss / ss_y, 0.0)
+        r_squared = np.where(usable, r_squared, np.nan)
+
+    return WindowFits(
+        slope=slope,
+        intercept=intercept,
+        r_squared=r_squared,
+        drawdown_per_log_cycle=slope * LN10,
+        residual_ss=residual_ss,
+        n_points=count.astype(np.int64),
+    )
+
+def solve_normal_equations(gram: np.ndarray, moment: np.ndarray) -> np.ndarray:
+    """
+    Solve a stack of normal equations XᵀX c = Xᵀy in one batched call.
+
+    Args:
+        gram:   (m, p, p) stack of XᵀX; overwritten where singular.
+        moment: (m, p) stack of Xᵀy.
+
+    Returns:
+        (m, p) coefficients; NaN rows where XᵀX is (nearly) singular, i.e. its
+        determinant is below SINGULAR_TOLERANCE times the product of its diagonal.
+    """
+    p = gram.shape[-1]
+    diagonal = np.einsum("mii->mi", gram)
+    singular = np.abs(np.linalg.det(gram)) <= SINGULAR_TOLERANCE * np.prod(diagonal, axis=1)
+    gram[singular] = np.eye(p)
+    coeffs = np.linalg.solve(gram, moment[..., None])[..., 0]
+    coeffs[singular] = np.nan
+    return coeffs
+
+def huber_rows(design: np.ndarray, response: np.ndarray, weight: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Huber M-estimates of many linear fits at once, by iteratively reweighted
+    least squares as analysis.robust.huber_coefficients does for one: every
+    iteration re-estimates each row's scale from its median absolute residual
+    and solves the whole stack of reweighted normal equations in one batched
+    call, until no row's coefficients move.
+
+    Args:
+        design:   (rows, readings, p) design matrices (broadcast against response).
+        response: (rows, readings) observed values.
+        weight:   (rows, readings) 0/1 marks of the readings each row fits;
+                  None means all of them.
+
+    Returns:
+        (rows, p) coefficients; NaN rows where a design is (nearly) singular
+        or holds non-finite values.
+    """
+    response = np.asarray(response, dtype=np.float64)
+    design = np.broadcast_to(np.asarray(design, dtype=np.float64), response.shape + np.shape(design)[-1:])
+    weight = np.ones(response.shape) if weight is None else np.broadcast_to(weight, response.shape)
+    used = weight > 0
+    finite = np.all(np.isfinite(design).all(axis=2) | ~used, axis=1) & np.all(np.isfinite(response) | ~used, axis=1)
+    design, response, weight, used = design[finite], response[finite], weight[finite], used[finite]
+    design = np.where(used[..., None], design, 0.0)
+    response = np.where(used, response, 0.0)
+
+    def solve(rows: np.ndarray, w: np.ndarray) -> np.ndarray:
+        weighted = design[rows].transpose(0, 2, 1) * w[:, None, :]
+        return solve_normal_equations(weighted @ design[rows], (weighted @ response[rows, :, None])[..., 0])
+
+    coeffs = solve(np.arange(len(design)), weight)
+    # Only the rows still moving are reweighted and solved again
+    active = np.flatnonzero(np.all(np.isfinite(coeffs), axis=1))
+    for _ in range(HUBER_MAX_ITERATIONS):
+        if len(active) == 0:
+            break
+        residuals = response[active] - (design[active] @ coeffs[active, :, None])[..., 0]
+        scale = MAD_TO_SIGMA * _masked_median(np.abs(residuals), used[active])
+        robust = np.where(scale > 0, huber_weights(residuals, scale), 1.0)
+        updated = solve(active, weight[active] * robust)
+        change = np.abs(updated - coeffs[active]).max(axis=1)
+        size = np.abs(updated).max(axis=1)
+        coeffs[active] = updated
+        active = active[np.isfinite(change) & (change > HUBER_TOLERANCE * (size + HUBER_TOLERANCE))]
+
+    result = np.full((len(finite), design.shape[-1]), np.nan)
+    result[finite] = coeffs
+    return result
+
+def _masked_median(values: np.ndarray, used: np.ndarray) -> np.ndarray:
+    """ Median of each row's used values, as a (rows, 1) column; unused ones are sorted last as inf. """
+    ordered = np.sort(np.where(used, values, np.inf), axis=1)
+    count = used.sum(axis=1)
+    rows = np.arange(len(values))
+    low = ordered[rows, np.maximum((count - 1) // 2, 0)]
+    high = ordered[rows, np.maximum(count // 2, 0)]
+    return np.where(count > 0, (low + high) / 2, np.nan)[:, None]
+
+def fit_rows(
+    x: np.ndarray, y: np.ndarray, method: RegressionMethod = RegressionMethod.LEAST_SQUARES
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Line y = slope * x + intercept along the last axis of every row at once
+    (x and y broadcast against each other, e.g. one y shared by many x rows),
+    by least squares or a robust method (huber_rows, or
+    analysis.robust.theil_sen_rows). Rows with no spread in x give NaN.
+
+    Returns:
+        (slope, intercept), one per row.
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    if method == RegressionMethod.THEIL_SEN:
+        return theil_sen_rows(x, y)
+    if method == RegressionMethod.HUBER:
+        # Centred x keeps the two columns well conditioned, as in analysis.robust.huber_line
+        shape = x.shape[:-1]
+        x, y = x.reshape(-1, x.shape[-1]), y.reshape(-1, y.shape[-1])
+        x_bar = x.mean(axis=1, keepdims=True)
+        coeffs = huber_rows(np.stack([x - x_bar, np.ones_like(x)], axis=2), y)
+        slope, intercept = coeffs[:, 0], coeffs[:, 1] - coeffs[:, 0] * x_bar[:, 0]
+        return slope.reshape(shape), intercept.reshape(shape)
+    x_bar = x.mean(axis=-1, keepdims=True)
+    y_bar = y.mean(axis=-1, keepdims=True)
+    dx = x - x_bar
+    ss_x = np.einsum("...i,...i->...", dx, dx)
+    ss_xy = np.einsum("...i,...i->...", dx, y - y_bar)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(ss_x > 0, ss_xy / ss_x, np.nan)
+    return slope, y_bar[..., 0] - slope * x_bar[..., 0]
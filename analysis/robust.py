@@ -0,0 +1,343 @@
+from typing import Iterator, Optional
+import numpy as np
+
+HUBER_K = 1.345             # Huber threshold in scale units: 95% efficiency for normal errors
+MAD_TO_SIGMA = 1.4826       # median absolute deviation to standard deviation, normal errors
+HUBER_MAX_ITERATIONS = 50
+HUBER_TOLERANCE = 1e-10     # relative change of the coefficients that ends the iterations
+BISQUARE_C = 4.685          # Tukey bisquare cut-off in scale units: readings beyond it get no weight
+SPIKE_HALF_WIDTH = 3        # readings either side of a reading whose medians judge it for spikes
+ENUMERATE_FACTOR = 8        # slopes left in the interval (per point) below which they are listed
+SLOPE_TIE_TOLERANCE = 1e-12    # relative difference of y - θx below which two readings tie
+PAIRWISE_LIMIT = 2 ** 16  # pairs per row up to which theil_sen_rows lists every slope
+SAMPLE_SIGMAS = 3.0         # half-width of the sample bracket around the median, in binomial SDs
+MIN_SAMPLE = 1000
+
+def huber_coefficients(design: np.ndarray, response: np.ndarray) -> np.ndarray:
+    """
+    Huber M-estimate of the coefficients of response ≈ design @ c by
+    iteratively reweighted least squares.
+
+    Residuals within HUBER_K scale units keep full weight; larger ones are
+    weighted by HUBER_K * scale / |r|, so a spike pulls on the fit with a
+    bounded force instead of its squared size. The scale is re-estimated each
+    iteration from the median absolute residual.
+
+    Args:
+        design:   (readings, p) design matrix.
+        response: (readings,) observed values.
+
+    Returns:
+        (p,) coefficients; the least-squares ones when the residual scale is zero.
+    """
+    design = np.asarray(design, dtype=np.float64)
+    response = np.asarray(response, dtype=np.float64)
+    coeffs = np.linalg.lstsq(design, response, rcond=None)[0]
+    for _ in range(HUBER_MAX_ITERATIONS):
+        residuals = response - design @ coeffs
+        scale = MAD_TO_SIGMA * np.median(np.abs(residuals))
+        if scale == 0:
+            break
+        root_weight = np.sqrt(huber_weights(residuals, scale))
+        updated = np.linalg.lstsq(design * root_weight[:, None], response * root_weight, rcond=None)[0]
+        converged = np.max(np.abs(updated - coeffs)) <= HUBER_TOLERANCE * (np.max(np.abs(updated)) + HUBER_TOLERANCE)
+        coeffs = updated
+        if converged:
+            break
+    return coeffs
+
+def huber_weights(residuals: np.ndarray, scale) -> np.ndarray:
+    """ IRLS weights of residuals under the Huber loss: 1 within HUBER_K scale units, HUBER_K * scale / |r| beyond. """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.minimum(1.0, HUBER_K * scale / np.abs(residuals))
+
+def _bisquare_weights(residuals: np.ndarray, scale: float) -> np.ndarray:
+    u = residuals / (BISQUARE_C * scale)
+    return np.where(np.abs(u) < 1, (1 - u * u) ** 2, 0.0)
+
+def huber_line(x: np.ndarray, y: np.ndarray) -> tuple[float, float]:
+    """ Huber M-estimate of the line y = slope * x + intercept; (slope, intercept). """
+    x, y = _finite(x, y)
+    if len(x) < 2 or np.ptp(x) == 0:
+        return float("nan"), float("nan")
+    # Centred x keeps the two columns well conditioned for long log-time records
+    x_mean = x.mean()
+    slope, intercept = huber_coefficients(np.column_stack([x - x_mean, np.ones_like(x)]), y)
+    return float(slope), float(intercept - slope * x_mean)
+
+def spike_weights(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Bisquare weights of each reading about the line through its neighbours.
+
+    The medians of the SPIKE_HALF_WIDTH readings before and after a reading
+    (in x and in y) give a local line that follows a smooth curve but not a
+    short spike, so weighting the readings by their departure from it (scale
+    from the median absolute departure) removes spikes before any line is
+    fitted. The weights redescend to 0 beyond BISQUARE_C scale units: a
+    Huber weight would still let a spike add to the residual sum of squares
+    in proportion to its height, and so spoil a window's R². These fixed weights let every window of a search be fitted from
+    weighted prefix sums in one pass, which a full robust fit per window could
+    not. Readings without neighbours on both sides keep weight 1; non-finite
+    ones get weight 0.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(y)
+    weights = np.zeros(len(y))
+    weights[valid] = 1.0
+    h = SPIKE_HALF_WIDTH
+    if valid.sum() < 2 * h + 1:
+        return weights
+
+    def side_medians(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        window = np.lib.stride_tricks.sliding_window_view(values, h)
+        medians = np.median(window, axis=1)
+        before = np.full(len(values), np.nan)
+        after = np.full(len(values), np.nan)
+        before[h:] = medians[:-1]
+        after[:-h] = medians[1:]
+        return before, after
+
+    x_before, x_after = side_medians(x[valid])
+    y_before, y_after = side_medians(y[valid])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.where(x_after > x_before, (x[valid] - x_before) / (x_after - x_before), 0.5)
+    departures = y[valid] - (y_before + fraction * (y_after - y_before))
+    judged = np.isfinite(departures)
+    scale = MAD_TO_SIGMA * np.median(np.abs(departures[judged]))
+    if scale > 0:
+        inner = weights[valid]
+        inner[judged] = _bisquare_weights(departures[judged], scale)
+        weights[valid] = inner
+    return weights
+
+def theil_sen_line(x: np.ndarray, y: np.ndarray, rng: Optional[np.random.Generator] = None) -> tuple[float, float]:
+    """
+    Theil-Sen line: the median of the slopes between all pairs of readings
+    with distinct x, and the median of y - slope * x as the intercept.
+
+    Up to half of the readings can be spikes without moving the line far. The
+    n²/2 pairwise slopes are never formed. The median is selected by
+    randomized slope selection (Matoušek, 1991):
+        - A slope θ orders the readings by y - θx, and the number of pairwise
+          slopes at most θ is the number of inversions between that order and
+          the order in x. This is counted by a merge sort (_merge_levels).
+        - Slopes sampled uniformly from the interval still holding the median
+          give a narrower bracket around it, checked by counting, until few
+          enough slopes remain (ENUMERATE_FACTOR per reading) to list them
+          and select the median directly. A run of equal slopes too long to
+          list (e.g. flat, quantised late-time readings) is recognised by
+          counting the slopes below and at its value.
+    A handful of O(n log n) merge-sort passes is needed, so a dense logger
+    record of 10^5 readings (5·10^9 pairs) is fitted in about half a second.
+
+    Args:
+        x, y: Readings; pairs where either is not finite are left out.
+        rng:  Source of the slope samples; it affects the run time, not the result.
+
+    Returns:
+        (slope, intercept); NaN if there is no pair with distinct x.
+    """
+    x, y = _finite(x, y)
+    order = np.lexsort((y, x))
+    x, y = x[order], y[order]
+    n = len(x)
+    _, same_x = np.unique(x, return_counts=True)
+    n_pairs = n * (n - 1) // 2 - int((same_x * (same_x - 1) // 2).sum())
+    if n_pairs == 0:
+        return float("nan"), float("nan")
+    ranks = sorted({(n_pairs - 1) // 2, n_pairs // 2})    # 0-based; one rank when the count is odd
+    slope = float(np.mean(_select_slopes(x, y, ranks, rng if rng is not None else np.random.default_rng(0))))
+    return slope, float(np.median(y - slope * x))
+
+def theil_sen_rows(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Theil-Sen line y = slope * x + intercept along the last axis of every row
+    at once (x and y broadcast against each other), as fit_rows does for least
+    squares.
+
+    For short rows (at most PAIRWISE_LIMIT pairs) the slopes between every
+    pair of readings of every row are listed as one (rows, pairs) array and
+    their medians taken together; longer rows are fitted one by one with
+    theil_sen_line. Pairs where either reading is not finite, or with equal
+    x, are left out; rows with no pair left give NaN.
+
+    Returns:
+        (slope, intercept), one per row.
+    """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    shape = x.shape[:-1]
+    n = x.shape[-1]
+    x, y = x.reshape(-1, n), y.reshape(-1, n)
+    slope = np.full(len(x), np.nan)
+    intercept = np.full(len(x), np.nan)
+    if n * (n - 1) // 2 > PAIRWISE_LIMIT:
+        for row in range(len(x)):
+            slope[row], intercept[row] = theil_sen_line(x[row], y[row])
+        return slope.reshape(shape), intercept.reshape(shape)
+
+    first, second = np.triu_indices(n, 1)
+    dx = x[:, second] - x[:, first]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slopes = np.where(dx != 0, (y[:, second] - y[:, first]) / dx, np.nan)
+    fitted = np.isfinite(slopes).any(axis=1)
+    slope[fitted] = np.nanmedian(slopes[fitted], axis=1)
+    offsets = y[fitted] - slope[fitted, None] * x[fitted]
+    intercept[fitted] = np.nanmedian(offsets, axis=1)
+    return slope.reshape(shape), intercept.reshape(shape)
+
+def _select_slopes(x: np.ndarray, y: np.ndarray, ranks: list[int], rng: np.random.Generator) -> list[float]:
+    """
+    The pairwise slopes of the given 0-based ranks (ascending), for readings
+    sorted by x then y. The slopes still to search are those between a lower
+    bound (counted inclusively) and an upper one (counted exclusively).
+    """
+    n = len(x)
+    low_order, below = _slope_order(x, y, -np.inf), 0
+    high_order = _slope_order(x, y, np.inf)
+    found = {}
+    pending = list(ranks)
+    while pending:
+        pairs = _InvertedPairs(low_order, high_order)
+        if pairs.count <= max(ENUMERATE_FACTOR * n, MIN_SAMPLE):
+            a, b = pairs.all()
+            local = [rank - below for rank in pending]
+            slopes = np.partition((y[b] - y[a]) / (x[b] - x[a]), local)
+            found.update({rank: float(slopes[k]) for rank, k in zip(pending, local)})
+            break
+
+        size = max(n, MIN_SAMPLE)
+        a, b = pairs.sample(rng, size)
+        sample = np.sort((y[b] - y[a]) / (x[b] - x[a]))
+        spread = SAMPLE_SIGMAS * np.sqrt(size) / 2
+        target = [(rank - below + 0.5) / pairs.count * size for rank in pending]
+        lower = int(np.floor(target[0] - spread))
+        upper = int(np.ceil(target[-1] + spread))
+
+        moved = False
+        if lower >= 0:
+            order = _slope_order(x, y, sample[lower])
+            at_most = _inversion_count(order)
+            if below < at_most <= pending[0]:
+                low_order, below, moved = order, at_most, True
+        if upper < size:
+            order = _slope_order(x, y, sample[upper], strict=True)
+            fewer = _inversion_count(order)
+            if pending[-1] < fewer < below + pairs.count:
+                high_order, moved = order, True
+        if moved:
+            continue
+
+        # The sample cannot split a run of equal slopes around the target; test its value
+        value = sample[min(int(target[0]), size - 1)]
+        strict_order = _slope_order(x, y, value, strict=True)
+        inclusive_order = _slope_order(x, y, value)
+        fewer, at_most = _inversion_count(strict_order), _inversion_count(inclusive_order)
+        for rank in [rank for rank in pending if fewer <= rank < at_most]:
+            found[rank] = float(value)
+            pending.remove(rank)
+        if pending and at_most <= pending[0]:
+            low_order, below = inclusive_order, at_most
+        elif pending and fewer > pending[-1]:
+            high_order = strict_order
+    return [found[rank] for rank in ranks]
+
+def _finite(x, y) -> tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(y)
+    return x[valid], y[valid]
+
+def _slope_order(x: np.ndarray, y: np.ndarray, theta: float, strict: bool = False) -> np.ndarray:
+    """
+    Readings (indices into x, sorted by x then y) in increasing order of
+    y - θx. A pair with distinct x is out of its x order exactly when its
+    slope is at most θ (below θ if strict); readings with equal x never are.
+    Values of y - θx within rounding of each other (SLOPE_TIE_TOLERANCE) are
+    taken as equal, so a run of equal slopes is counted as a whole.
+    """
+    index = np.arange(len(x))
+    if theta == -np.inf:
+        return index
+    if theta == np.inf:
+        return np.lexsort((index, y, -x))
+    z = y - theta * x
+    by_z = np.argsort(z, kind="stable")
+    tolerance = SLOPE_TIE_TOLERANCE * (np.max(np.abs(y)) + abs(theta) * np.max(np.abs(x)))
+    level = np.empty(len(x), dtype=np.int64)
+    level[by_z] = np.cumsum(np.diff(z[by_z], prepend=z[by_z[0]]) > tolerance)
+    return np.lexsort((index, x if strict else -x, level))
+
+def _merge_levels(sequence: np.ndarray) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Bottom-up merge sort of a permutation of 0..n-1, one vectorised pass per level.
+
+    Yields, for each level, (left, start, stop, right): every element right[i]
+    of a right half is preceded, in its block, by the elements
+    left[start[i]:stop[i]] of the left half that are greater than it. Over all
+    levels these are the inversions of the sequence, each exactly once.
+    """
+    n = len(sequence)
+    current = np.asarray(sequence, dtype=np.int64)
+    position = np.arange(n)
+    width = 1
+    while width < n:
+        block = position // (2 * width)
+        in_right = (position // width) % 2 == 1
+        # Offsetting each block by n lets one stable sort merge every pair of halves
+        keys = block * n + current
+        merged = np.argsort(keys, kind="stable")
+        merged_position = np.empty(n, dtype=np.int64)
+        merged_position[merged] = position
+        # A right element moves from p to q in the merge by passing the left elements
+        # below it and being passed by the rest, so q - p + width of them are below it
+        right = position[in_right]
+        first = width * block[in_right]     # its block's left half in the left elements
+        yield current[~in_right], first + merged_position[right] - right + width, first + width, current[in_right]
+        current = keys[merged] % n
+        width *= 2
+
+def _inversion_count(order: np.ndarray) -> int:
+    """ Number of pairs (i, j), i < j, with order[i] > order[j]. """
+    return int(sum((stop - start).sum() for _, start, stop, _ in _merge_levels(order)))
+
+class _InvertedPairs:
+    """
+    The pairs of readings whose relative order differs between two slope
+    orders, i.e. the pairwise slopes between the two thetas, held as
+    contiguous runs of the merge-sort levels so they can be counted, listed
+    or sampled uniformly without forming them all.
+    """
+
+    def __init__(self, low_order: np.ndarray, high_order: np.ndarray):
+        high_rank = np.empty(len(high_order), dtype=np.int64)
+        high_rank[high_order] = np.arange(len(high_order))
+        self._reading = high_order  # high rank -> reading
+        lefts, starts, stops, rights = [], [], [], []
+        offset = 0
+        for left, start, stop, right in _merge_levels(high_rank[low_order]):
+            lefts.append(left)
+            starts.append(start + offset)
+            stops.append(stop + offset)
+            rights.append(right)
+            offset += len(left)
+        self._left = np.concatenate(lefts) if lefts else np.zeros(0, dtype=np.int64)
+        self._start = np.concatenate(starts) if starts else np.zeros(0, dtype=np.int64)
+        self._right = np.concatenate(rights) if rights else np.zeros(0, dtype=np.int64)
+        self._runs = (np.concatenate(stops) if stops else np.zeros(0, dtype=np.int64)) - self._start
+        self._ends = np.cumsum(self._runs)
+        self.count = int(self._ends[-1]) if len(self._ends) else 0
+
+    def _pairs(self, run: np.ndarray, offset: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return self._reading[self._left[self._start[run] + offset]], self._reading[self._right[run]]
+
+    def all(self) -> tuple[np.ndarray, np.ndarray]:
+        """ Every pair, as two arrays of reading indices. """
+        run = np.repeat(np.arange(len(self._runs)), self._runs)
+        return self._pairs(run, np.arange(self.count) - (self._ends - self._runs)[run])
+
+    def sample(self, rng: np.random.Generator, size: int) -> tuple[np.ndarray, np.ndarray]:
+        """ size pairs drawn uniformly with replacement. """
+        draws = rng.integers(0, self.count, size)
+        run = np.searchsorted(self._ends, draws, side="right")
+        return self._pairs(run, draws - (self._ends - self._runs)[run])
@@ -0,0 +1,110 @@
+from models import SemilogSegment, SemilogSegmentation, RegressionMethod
+from analysis.regression import PrefixRegression, log_grid_bounds
+import numpy as np
+
+COOPER_JACOB_COEFF = 0.183  # ln(10) / (4π), dimensionless
+
+DEFAULT_MAX_SEGMENTS = 3    # wellbore storage, radial flow, boundary
+DEFAULT_MIN_SEGMENT_POINTS = 4
+DEFAULT_BOUNDS_PER_LOG_CYCLE = 20
+
+def segment_semilog(
+    time: np.ndarray,
+    drawdown: np.ndarray,
+    flowrate_m3day: float,
+    max_segments: int = DEFAULT_MAX_SEGMENTS,
+    min_segment_points: int = DEFAULT_MIN_SEGMENT_POINTS,
+    bounds_per_log_cycle: int = DEFAULT_BOUNDS_PER_LOG_CYCLE,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> SemilogSegmentation:
+    """
+    Split drawdown vs ln(t) into the best 1..max_segments straight lines.
+
+    The cost of a segment is its residual sum of squares, read in O(1) from the
+    prefix-sum regression kernel, and the optimal split for every number of
+    segments is found by dynamic programming over those costs. Breakpoints are
+    restricted to a log grid of time (bounds_per_log_cycle per cycle), which
+    keeps the cost matrix small for long logger records. Each segment is
+    fitted independently (the lines need not meet at the breakpoints).
+
+    The number of segments is chosen by the Bayesian information criterion,
+        BIC = n ln(RSS / n) + (3k - 1) ln(n)
+    counting a slope and an intercept per segment and k - 1 breakpoints, so an
+    extra segment is only kept when it improves the fit enough to pay for it.
+
+    Args:
+        time:               Elapsed time [min]; readings at t <= 0 are left out.
+        drawdown:           Drawdown [m], same length as time.
+        flowrate_m3day:     Pumping rate used for T [m³/day].
+        max_segments:       Largest number of segments considered.
+        min_segment_points: Minimum readings in a segment (at least 3).
+        bounds_per_log_cycle: Density of the candidate breakpoint grid.
+        regression_method: Estimator of each segment's line; a robust one
+                            also weights down spikes in the segment costs.
+
+    Returns:
+        SemilogSegmentation; a segment's T is NaN if its drawdown does not increase.
+
+    Raises:
+        ValueError: On invalid settings, or if there are too few readings
+                    for even a single segment.
+    """
+    if max_segments < 1:
+        raise ValueError(f"Maximum number of segments must be a positive integer, got {max_segments}.")
+    if min_segment_points < 3:
+        raise ValueError(f"Minimum points per segment must be at least 3, got {min_segment_points}.")
+    if bounds_per_log_cycle < 1:
+        raise ValueError(f"Bounds per log cycle must be a positive integer, got {bounds_per_log_cycle}.")
+
+    time = np.asarray(time, dtype=np.float64)
+    regression = PrefixRegression.semilog(time, drawdown, regression_method)
+    log_axis = np.log10(time, out=np.full_like(time, np.nan), where=time > 0)
+    bounds = log_grid_bounds(log_axis, bounds_per_log_cycle)
+    m = len(bounds)
+
+    # cost[a, b]: residual sum of squares of one line from bounds[a] to bounds[b]
+    a, b = np.triu_indices(m, 1)
+    fits = regression.fit_windows(bounds[a], bounds[b])
+    usable = (fits.n_points >= min_segment_points) & np.isfinite(fits.residual_ss)
+    cost = np.full((m, m), np.inf)
+    cost[a[usable], b[usable]] = fits.residual_ss[usable]
+
+    # best[k, j]: least total cost of k + 1 segments covering bounds[0] to bounds[j]
+    best = np.full((max_segments, m), np.inf)
+    split = np.zeros((max_segments, m), dtype=np.intp)
+    best[0] = cost[0]
+    for k in range(1, max_segments):
+        total = best[k - 1][:, None] + cost
+        split[k] = np.argmin(total, axis=0)
+        best[k] = total[split[k], np.arange(m)]
+
+    rss = best[:, -1]
+    if not np.isfinite(rss[0]):
+        raise ValueError(
+            f"Not enough readings to fit a segment: at least {min_segment_points} "
+            "with positive time are needed."
+        )
+    n = int(regression.fit_windows(bounds[0], bounds[-1]).n_points[0])
+    n_segments = np.arange(1, max_segments + 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bic = n * np.log(np.maximum(rss, np.finfo(float).tiny) / n) + (3 * n_segments - 1) * np.log(n)
+    bic = np.where(np.isfinite(rss), bic, np.inf)
+    k = int(np.argmin(bic))
+
+    edges = [m - 1]
+    for level in range(k, 0, -1):
+        edges.append(int(split[level, edges[-1]]))
+    edges.append(0)
+    edges.reverse()
+
+    segments = []
+    for start, end in zip(bounds[edges[:-1]], bounds[edges[1:]]):
+        fit = regression.fit(int(start), int(end))
+        T = COOPER_JACOB_COEFF * flowrate_m3day / fit.drawdown_per_log_cycle if fit.slope > 0 else float("nan")
+        segments.append(SemilogSegment(start_idx=int(start), end_idx=int(end), fit=fit, transmissivity_m2day=T))
+
+    return SemilogSegmentation(
+        segments=segments,
+        breakpoints_min=[float(time[s.start_idx]) for s in segments[1:]],
+        bic_by_segments=[float(v) for v in bic],
+    )
@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Callable
+import numpy as np
+
+MAX_DAMPING = 1e16  # give up when the step has to be damped this much
+
+@dataclass
+class LeastSquaresResult:
+    """ Outcome of a damped least-squares fit. """
+    params: np.ndarray
+    residuals: np.ndarray   # at params
+    jacobian: np.ndarray    # d residuals / d params at params, shape (n, p)
+    cost: float             # sum of squared residuals
+    iterations: int
+    converged: bool
+
+def levenberg_marquardt(
+    fun: Callable[[np.ndarray], tuple[np.ndarray, np.ndarray]],
+    p0: np.ndarray,
+    max_iter: int = 100,
+    xtol: float = 1e-10,
+    ftol: float = 1e-12,
+    damping: float = 1e-3,
+) -> LeastSquaresResult:
+    """
+    Minimise the sum of squared residuals with the Levenberg-Marquardt method.
+
+    fun returns the residual vector and its analytic Jacobian for a parameter
+    vector. Each step solves the small p x p system
+        (JᵀJ + λ diag(JᵀJ)) δ = -Jᵀr,
+    so the work per iteration is one model evaluation plus O(n p²). λ is cut
+    tenfold after a step that lowers the cost and raised tenfold otherwise.
+
+    Args:
+        fun:      Callable p -> (residuals (n,), jacobian (n, p)).
+        p0:       Starting parameters.
+        max_iter: Maximum number of accepted or rejected steps.
+        xtol:     Converged when every step component is below xtol relative to the parameter.
+        ftol:     Converged when an accepted step lowers the cost by less than ftol relative.
+        damping:  Initial λ.
+
+    Returns:
+        LeastSquaresResult at the best parameters found.
+    """
+    params = np.asarray(p0, dtype=np.float64).copy()
+    residuals, jacobian = fun(params)
+    cost = float(residuals @ residuals)
+    converged = False
+
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ residuals
+        scale = np.maximum(np.diag(normal), np.finfo(float).tiny)
+        try:
+            step = np.linalg.solve(normal + damping * np.diag(scale), -gradient)
+        except np.linalg.LinAlgError:
+            step = None
+
+        if step is not None:
+            trial = params + step
+            trial_residuals, trial_jacobian = fun(trial)
+            trial_cost = float(trial_residuals @ trial_residuals)
+            if np.isfinite(trial_cost) and trial_cost <= cost:
+                small_step = np.all(np.abs(step) <= xtol * (np.abs(params) + xtol))
+                small_gain = cost - trial_cost <= ftol * cost
+                params, residuals, jacobian, cost = trial, trial_residuals, trial_jacobian, trial_cost
+                damping /= 10
+                if small_step or small_gain:
+                    converged = True
+                    break
+                continue
+
+        damping *= 10
+        if damping > MAX_DAMPING:
+            break
+
+    return LeastSquaresResult(
+        params=params,
+        residuals=residuals,
+        jacobian=jacobian,
+        cost=cost,
+        iterations=iteration,
+        converged=converged,
+    )
@@ -0,0 +1,270 @@
+from typing import Optional
+from models import Step
+import heapq
+import numpy as np
+
+DEFAULT_MIN_JUMP_FRACTION = 0.25    # smallest jump at a step change, as a fraction of the largest
+DEFAULT_MIN_STEP_FRACTION = 0.05    # shortest step, as a fraction of the pumping period
+DEFAULT_MAX_STEPS = 12
+SNAP_LAG_FRACTION = 0.01            # readings averaged either side of a boundary, as a fraction of the shortest step
+MIN_RECOVERY_FRACTION = 0.1         # smallest fall of drawdown taken as the end of pumping, as a fraction of its range
+
+def _best_split(
+    sums: np.ndarray,
+    squares: np.ndarray,
+    time: np.ndarray,
+    start: int,
+    end: int,
+    min_duration: float,
+    direction: int,
+) -> Optional[tuple[float, int, float]]:
+    """
+    Best single mean-shift split of [start, end) in the given direction (+1 up, -1 down).
+
+    The cost of a segment is its sum of squared deviations from its mean,
+    read in O(1) from prefix sums, so every split point of the segment is
+    scored in one vectorised pass. Both parts must last at least min_duration.
+
+    Returns:
+        (gain, split index, shift of the mean) or None if no split is admissible.
+    """
+    low = np.searchsorted(time, time[start] + min_duration, side="left")
+    high = np.searchsorted(time, time[end - 1] - min_duration, side="right")
+    split = np.arange(max(low, start + 1), min(high, end - 1) + 1)
+    if len(split) == 0:
+        return None
+
+    def cost(a, b):
+        return (squares[b] - squares[a]) - (sums[b] - sums[a]) ** 2 / (b - a)
+
+    gain = cost(start, end) - cost(start, split) - cost(split, end)
+    shift = (sums[end] - sums[split]) / (end - split) - (sums[split] - sums[start]) / (split - start)
+    gain = np.where(direction * shift > 0, gain, -np.inf)
+    k = int(np.argmax(gain))
+    if not np.isfinite(gain[k]):
+        return None
+    return float(gain[k]), int(split[k]), float(shift[k])
+
+def _snap(
+    sums: np.ndarray,
+    time: np.ndarray,
+    start: int,
+    split: int,
+    end: int,
+    min_duration: float,
+    direction: int,
+) -> int:
+    """
+    Move a split onto the start of the sharpest change of level in the same
+    direction, searched over the second half of the segment before it and the
+    first half of the one after, but no closer than min_duration to either end
+    (the fast rise at the start of a step is not a step change).
+
+    On dense records a single reading-to-reading change is lost in the noise,
+    so the change is first taken between the means of the `lag` readings either
+    side, from the prefix sums, with lag set by SNAP_LAG_FRACTION of
+    min_duration; the lag is then halved down to single readings, each time
+    searching only around the previous best. A change logged part-way through
+    the rate change shows up as a smaller rise just before the sharpest one, so
+    the split finally walks back while the preceding change is at least a
+    quarter as large.
+    """
+    low = max(split - (split - start) // 2, int(np.searchsorted(time, time[start] + min_duration, side="left")))
+    high = min(split + (end - split) // 2, int(np.searchsorted(time, time[end - 1] - min_duration, side="right")))
+    low, high = min(low, split), max(high, split + 1)
+    spacing = np.median(np.diff(time[low - 1:high]))
+    lag = int(max(1, min(SNAP_LAG_FRACTION * min_duration / spacing, low - start, end - high + 1)))
+    while True:
+        i = np.arange(low, high)
+        changes = direction * ((sums[i + lag] - sums[i]) - (sums[i] - sums[i - lag])) / lag
+        k = int(np.argmax(changes))
+        if lag == 1:
+            break
+        # Refine around the best change with half the lag
+        low, high = max(low + k - lag, low), min(low + k + lag + 1, high)
+        lag //= 2
+    while k > 0 and changes[k - 1] >= 0.25 * changes[k]:
+        k -= 1
+    return low + k
+
+def _local_jump(sums: np.ndarray, time: np.ndarray, start: int, split: int, end: int, half_width: float) -> float:
+    """
+    Mean level over half_width after a split minus the mean over half_width
+    before it, both kept within [start, end). A rate change gives a jump;
+    drift within a step gives only a small difference over a short window.
+    """
+    low = max(int(np.searchsorted(time, time[split] - half_width, side="left")), start)
+    high = min(int(np.searchsorted(time, time[split] + half_width, side="right")), end)
+    return (sums[high] - sums[split]) / (high - split) - (sums[split] - sums[low]) / (split - low)
+
+def _prefix_sums(level: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ Prefix sums of the level and its square, offset by the first reading for precision. """
+    shifted = level - level[0]
+    return np.concatenate(([0.0], np.cumsum(shifted))), np.concatenate(([0.0], np.cumsum(shifted ** 2)))
+
+def _pump_stop(
+    time: np.ndarray,
+    level: np.ndarray,
+    sums: np.ndarray,
+    squares: np.ndarray,
+    min_duration: float,
+) -> Optional[int]:
+    """ Index of the first reading after pumping stopped, or None if the record shows no recovery. """
+    stop = _best_split(sums, squares, time, 0, len(time), min_duration, direction=-1)
+    if stop is None or -stop[2] < MIN_RECOVERY_FRACTION * np.ptp(level):
+        return None
+    return _snap(sums, time, 0, stop[1], len(time), min_duration, direction=-1)
+
+def detect_pump_stop(
+    time: np.ndarray,
+    level: np.ndarray,
+    min_phase_fraction: float = DEFAULT_MIN_STEP_FRACTION,
+) -> Optional[int]:
+    """
+    Find where pumping stopped in a record that runs on into recovery.
+
+    The recovery is the best downward mean shift of the level over the whole
+    record (found from prefix sums in one vectorised pass), kept if it is at
+    least a tenth of the level range, then moved onto the sharpest rise of the
+    water level near it.
+
+    Args:
+        time:               Elapsed time [min], increasing.
+        level:              Water level [mbd] (drawdown works too).
+        min_phase_fraction: Shortest pumping or recovery phase, as a fraction of the record.
+
+    Returns:
+        Index of the first reading after pumping stopped; the reading before it
+        is the last one taken while pumping. None if the record shows no recovery.
+
+    Raises:
+        ValueError: On invalid settings or too few readings.
+    """
+    if not 0 < min_phase_fraction < 0.5:
+        raise ValueError(f"Minimum phase fraction must be between 0 and 0.5, got {min_phase_fraction}.")
+    time = np.asarray(time, dtype=np.float64)
+    level = np.asarray(level, dtype=np.float64)
+    if len(time) < 4:
+        raise ValueError(f"Pump-stop detection needs at least 4 readings, got {len(time)}.")
+    if np.any(np.diff(time) <= 0):
+        raise ValueError("Times must be strictly increasing for pump-stop detection.")
+    sums, squares = _prefix_sums(level)
+    return _pump_stop(time, level, sums, squares, min_phase_fraction * (time[-1] - time[0]))
+
+def detect_step_ends(
+    time: np.ndarray,
+    level: np.ndarray,
+    n_steps: Optional[int] = None,
+    min_jump_fraction: float = DEFAULT_MIN_JUMP_FRACTION,
+    min_step_fraction: float = DEFAULT_MIN_STEP_FRACTION,
+    max_steps: int = DEFAULT_MAX_STEPS,
+) -> list[float]:
+    """
+    Propose the end time of each pumping step from the water-level record.
+
+    Each rate increase lowers the water level by a jump much larger than the
+    drift within a step, so the record is split into segments of constant
+    mean by binary segmentation. The cost of any segment comes in O(1) from
+    prefix sums of the level and its square, so each split scans its segment
+    in one vectorised pass and the whole search is O(n log k) for n readings
+    and k steps.
+
+        1. The end of pumping is the best downward split of the whole record,
+           if its shift is at least a tenth of the level range (recovery
+           follows); otherwise the last reading.
+        2. The pumping period is split at the best upward shifts, best first,
+           until n_steps steps are found, or, without n_steps, into at most
+           max_steps steps. Splits closer than min_step_fraction of the
+           pumping period to a segment end are not considered, which keeps
+           the fast rise at the start of each step out of the search.
+
+    Every boundary is then moved onto the sharpest level change near it, and
+    the step ends at the reading just before. Without n_steps, a boundary is
+    kept only if the jump across it, over half the shortest step either side,
+    is at least min_jump_fraction of the largest such jump: splits that only
+    cut the drift within a step have no jump and are dropped.
+
+    Args:
+        time:              Elapsed time [min], increasing.
+        level:             Water level [mbd] (drawdown works too: only shifts matter).
+        n_steps:           Number of steps pumped, if known.
+        min_jump_fraction: Smallest accepted jump at a step change, as a fraction
+                           of the largest (only used without n_steps).
+        min_step_fraction: Shortest step, as a fraction of the pumping period.
+        max_steps:         Upper bound on the steps found without n_steps.
+
+    Returns:
+        End time of each step [min], increasing, one per step (the last is the
+        end of pumping), ready for Step.end_time_min.
+
+    Raises:
+        ValueError: On invalid settings, too few readings, or if n_steps steps
+                    cannot be found.
+    """
+    if n_steps is not None and n_steps < 1:
+        raise ValueError(f"Number of steps must be a positive integer, got {n_steps}.")
+    if not 0 < min_jump_fraction < 1:
+        raise ValueError(f"Minimum jump fraction must be between 0 and 1, got {min_jump_fraction}.")
+    if not 0 < min_step_fraction < 0.5:
+        raise ValueError(f"Minimum step fraction must be between 0 and 0.5, got {min_step_fraction}.")
+
+    time = np.asarray(time, dtype=np.float64)
+    level = np.asarray(level, dtype=np.float64)
+    if len(time) < 4:
+        raise ValueError(f"Step detection needs at least 4 readings, got {len(time)}.")
+    if np.any(np.diff(time) <= 0):
+        raise ValueError("Times must be strictly increasing for step detection.")
+
+    sums, squares = _prefix_sums(level)
+
+    # 1. End of pumping: a large fall of the drawdown (a rise of the water level back up)
+    end = _pump_stop(time, level, sums, squares, min_step_fraction * (time[-1] - time[0]))
+    if end is None:
+        end = len(time)
+
+    # 2. Step changes within the pumping period, best first
+    min_duration = min_step_fraction * (time[end - 1] - time[0])
+    target = n_steps if n_steps is not None else max_steps
+    boundaries = []
+    heap = []
+
+    def push(start: int, stop_: int) -> None:
+        split = _best_split(sums, squares, time, start, stop_, min_duration, direction=1)
+        if split is not None:
+            heapq.heappush(heap, (-split[0], split[1], split[2], start, stop_))
+
+    push(0, end)
+    while heap and len(boundaries) + 1 < target:
+        _, split, _, start, stop_ = heapq.heappop(heap)
+        split = _snap(sums, time, start, split, stop_, min_duration, direction=1)
+        boundaries.append(split)
+        push(start, split)
+        push(split, stop_)
+
+    # 3. Without a known number of steps, drop splits with no real jump across them
+    if n_steps is None and boundaries:
+        boundaries.sort()
+        edges = [0] + boundaries + [end]
+        jumps = np.array([
+            _local_jump(sums, time, edges[i - 1], edges[i], edges[i + 1], min_duration / 2)
+            for i in range(1, len(edges) - 1)
+        ])
+        boundaries = [b for b, jump in zip(boundaries, jumps) if jump >= min_jump_fraction * jumps.max()]
+
+    if n_steps is not None and len(boundaries) + 1 < n_steps:
+        raise ValueError(
+            f"Only {len(boundaries) + 1} step(s) could be separated in the level record, "
+            f"but {n_steps} were requested."
+        )
+    return [float(time[b - 1]) for b in sorted(boundaries)] + [float(time[end - 1])]
+
+def steps_from_end_times(flowrates_m3h: list[float], end_times_min: list[float]) -> list[Step]:
+    """ Steps numbered from 1, pairing each flowrate with a (detected) end time. """
+    if len(flowrates_m3h) != len(end_times_min):
+        raise ValueError(
+            f"Got {len(flowrates_m3h)} flowrate(s) for {len(end_times_min)} step end time(s)."
+        )
+    return [
+        Step(step_number=i, flowrate_m3h=q, end_time_min=t)
+        for i, (q, t) in enumerate(zip(flowrates_m3h, end_times_min), start=1)
+    ]
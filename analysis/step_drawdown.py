@@ -1,7 +1,16 @@
-from models import Step, TestType, PumpingTest, StepDrawdownResult, StepResult
+from models import (
+    Step, TestType, PumpingTest, StepDrawdownResult, StepResult, StepDrawdownMethod, SuperpositionFit,
+    BootstrapSettings, BootstrapIntervals, MonteCarloSettings, RegressionMethod,
+)
+from analysis.regression import PrefixRegression
+from analysis.robust import huber_coefficients
+from analysis.bootstrap import bootstrap_intervals, critical_yield
+from analysis.monte_carlo import propagate_step_drawdown
+from typing import Optional
 import numpy as np
 
 HOURS_PER_DAY = 24.0
+COOPER_JACOB_COEFF = 0.183  # ln(10) / (4π), dimensionless
 
 def _get_drawdown_at_end_of_step(
         step: Step,
@@ -26,7 +35,8 @@ def _get_drawdown_at_end_of_step(
 
 def _fit_specific_drawdown(
     flowrates: np.ndarray,  # Q values in m3/h
-    specific_drawdowns: np.ndarray  # s/Q values in h/m²
+    specific_drawdowns: np.ndarray,  # s/Q values in h/m²
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
 ) -> tuple[float, float, float]:
     """
     Fit a straight line to the s/Q vs Q plot (Hantush-Bierschenk).
@@ -36,19 +46,138 @@ def _fit_specific_drawdown(
     Returns:
         (B, C, r_squared)
     """
-    # Calculate slope (C) and intercept (B)
-    slope, intercept = np.polyfit(flowrates, specific_drawdowns, 1)
-    
-    # Calculate R² for the fit
-    y_pred = slope * flowrates + intercept
-    ss_res = np.sum((specific_drawdowns - y_pred) ** 2)
-    ss_tot = np.sum((specific_drawdowns - np.mean(specific_drawdowns)) ** 2)
-    r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0.0
+    fit = PrefixRegression(flowrates, specific_drawdowns, regression_method).fit()
+    return fit.intercept, fit.slope, fit.r_squared
+
+def _step_rates(time: np.ndarray, steps: list[Step]) -> np.ndarray:
+    """ Pumping rate [m³/h] in force at each time; 0 before pumping and after the last step. """
+    ends = np.array([step.end_time_min for step in steps])
+    flowrates = np.append([step.flowrate_m3h for step in steps], 0.0)
+    rates = flowrates[np.searchsorted(ends, time, side="left")]
+    return np.where(time > 0, rates, 0.0)
 
-    return intercept, slope, r_squared
+def superposed_time(time: np.ndarray, steps: list[Step]) -> np.ndarray:
+    """
+    Cooper-Jacob superposition time function H(t) = Σ ΔQ_i log10(t - t_i) [m³/h],
+    summed over the rate changes ΔQ_i made at the start t_i of each step before t
+    (the first step starts at t = 0). Computed with one (readings, steps)
+    broadcast; 0 before pumping starts.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    flowrates = np.array([step.flowrate_m3h for step in steps])
+    starts = np.array([0.0] + [step.end_time_min for step in steps[:-1]])
+    elapsed = time[:, None] - starts[None, :]
+    log_elapsed = np.log10(elapsed, out=np.zeros_like(elapsed), where=elapsed > 0)
+    return log_elapsed @ np.diff(flowrates, prepend=0.0)
+
+def eden_hazel_drawdown(time: np.ndarray, steps: list[Step], fit: SuperpositionFit) -> np.ndarray:
+    """ Drawdown [m] predicted by an Eden-Hazel fit at the given times, during pumping. """
+    time = np.asarray(time, dtype=np.float64)
+    rates = _step_rates(time, steps)
+    return fit.time_coeff * superposed_time(time, steps) + fit.rate_coeff * rates + fit.well_loss_coeff * rates ** 2
+
+def _superposition_design(
+    steps: list[Step],
+    time_series: np.ndarray,
+    drawdown_series: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """ Eden-Hazel design [H, Q, Q²] and drawdown over every reading taken while pumping. """
+    pumping = (time_series > 0) & (time_series <= steps[-1].end_time_min)
+    time = time_series[pumping]
+    drawdown = drawdown_series[pumping]
+    if len(time) < 3 * len(steps):
+        raise ValueError(
+            f"Eden-Hazel analysis needs several readings per step, got {len(time)} "
+            f"for {len(steps)} steps."
+        )
+    rates = _step_rates(time, steps)
+    return np.column_stack([superposed_time(time, steps), rates, rates ** 2]), drawdown
+
+def _fit_superposition(
+    steps: list[Step],
+    time_series: np.ndarray,
+    drawdown_series: np.ndarray,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> SuperpositionFit:
+    """
+    Eden-Hazel: solve s = a H(t) + b Q + C Q² for a, b and C jointly by linear
+    least squares (or the Huber M-estimate) over every reading taken while
+    pumping (0 < t <= end of the last step). T follows from a like
+    Cooper-Jacob from ds.
+    """
+    design, drawdown = _superposition_design(steps, time_series, drawdown_series)
+    if regression_method == RegressionMethod.THEIL_SEN:
+        raise ValueError("Theil-Sen fits a straight line only; use Huber regression with Eden-Hazel.")
+    if regression_method == RegressionMethod.HUBER:
+        a, b, C = huber_coefficients(design, drawdown)
+    else:
+        (a, b, C), *_ = np.linalg.lstsq(design, drawdown, rcond=None)
+    if a <= 0:
+        raise ValueError(
+            f"Non-positive superposition slope ({a:.4f}): drawdown does not grow with time as "
+            "Cooper-Jacob requires. Check the step times and flowrates."
+        )
+
+    residuals = drawdown - design @ np.array([a, b, C])
+    ss_res = float(residuals @ residuals)
+    ss_tot = float(np.sum((drawdown - drawdown.mean()) ** 2))
+    return SuperpositionFit(
+        time_coeff=float(a),
+        rate_coeff=float(b),
+        well_loss_coeff=float(C),
+        transmissivity_m2day=float(COOPER_JACOB_COEFF * HOURS_PER_DAY / a),
+        reference_duration_min=steps[-1].end_time_min / len(steps),
+        rmse_m=float(np.sqrt(ss_res / len(drawdown))),
+        r_squared=1 - ss_res / ss_tot if ss_tot > 0 else 0.0,
+        n_points_used=len(drawdown),
+    )
+
+def _loss_intervals(
+    method: StepDrawdownMethod,
+    steps: list[Step],
+    flowrates: np.ndarray,
+    specific_drawdowns: np.ndarray,
+    time_series: np.ndarray,
+    drawdown_series: np.ndarray,
+    settings: BootstrapSettings,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> BootstrapIntervals:
+    """
+    Bootstrap intervals on B, C and the critical yield (and T for Eden-Hazel),
+    resampling the s/Q points of the Hantush-Bierschenk line or the readings
+    of the Eden-Hazel fit (analysis.bootstrap), each replicate refitted with
+    regression_method.
+    """
+    if method == StepDrawdownMethod.EDEN_HAZEL:
+        design, drawdown = _superposition_design(steps, time_series, drawdown_series)
+        reference_duration = steps[-1].end_time_min / len(steps)
+
+        def quantities(coeffs: np.ndarray) -> dict[str, np.ndarray]:
+            a, b, C = coeffs.T
+            B = a * np.log10(reference_duration) + b
+            return {
+                "aquifer_loss_coeff": B,
+                "well_loss_coeff": C,
+                "critical_yield_m3h": critical_yield(B, C),
+                "transmissivity_m2day": np.where(a > 0, COOPER_JACOB_COEFF * HOURS_PER_DAY / a, np.nan),
+            }
+
+        return bootstrap_intervals(design, drawdown, settings, quantities, regression_method)
+
+    def quantities(coeffs: np.ndarray) -> dict[str, np.ndarray]:
+        C, B = coeffs.T
+        return {"aquifer_loss_coeff": B, "well_loss_coeff": C, "critical_yield_m3h": critical_yield(B, C)}
+
+    # The line s/Q = C Q + B, slope first as Theil-Sen expects
+    design = np.column_stack([flowrates, np.ones_like(flowrates)])
+    return bootstrap_intervals(design, specific_drawdowns, settings, quantities, regression_method)
 
 def analyse_step_drawdown(
-    test: PumpingTest
+    test: PumpingTest,
+    method: StepDrawdownMethod = StepDrawdownMethod.HANTUSH_BIERSCHENK,
+    bootstrap: Optional[BootstrapSettings] = None,
+    monte_carlo: Optional[MonteCarloSettings] = None,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
 ) -> StepDrawdownResult:
     """
     Analyse a step-drawdown test using the Hantush-Bierschenk method.
@@ -57,19 +186,40 @@ def analyse_step_drawdown(
     loss coefficients. Per-step efficiency is computed as:
         efficiency = BQ / (BQ + CQ²) * 100
 
+    With method EDEN_HAZEL every reading taken while pumping is used instead
+    of one drawdown per step: s(t) = a H(t) + b Q + C Q², where H is the
+    superposed Cooper-Jacob time function of the rate history, is solved for
+    a, b and C jointly, which also gives T. B is then the aquifer loss of a
+    constant rate pumped for the mean step length, a log10(t) + b, and each
+    step's linear loss is a H + b Q at its end, so earlier steps are
+    accounted for.
+
     Args:
-        test: A PumpingTest with test_type == STEP_DRAWDOWN and
-              at least 2 steps defined.
+        test:   A PumpingTest with test_type == STEP_DRAWDOWN and
+                at least 2 steps defined.
+        method: HANTUSH_BIERSCHENK (default) or EDEN_HAZEL.
+        bootstrap: If given, percentile confidence intervals on B, C and the
+                critical yield (and T for EDEN_HAZEL) from bootstrap
+                replicates of the fit (analysis.bootstrap), kept on the result.
+                With only a few steps, RESIDUAL resampling is the steadier choice.
+        monte_carlo: If given, distributions of the same values under errors
+                in the step rates, end times and static level
+                (analysis.monte_carlo), kept on the result.
+        regression_method: Estimator of the s/Q line, or of the Eden-Hazel fit
+                (HUBER only; analysis.robust). The bootstrap replicates and
+                Monte Carlo samples are refitted with the same estimator.
 
     Returns:
         StepDrawdownResult with B, C, and per-step breakdown.
 
     Raises:
         ValueError: If test type is wrong, fewer than 2 steps, steps are
-                    not sorted, or drawdown is non-positive for any step.
+                    not sorted, drawdown is non-positive for any step, or
+                    THEIL_SEN is asked for with EDEN_HAZEL.
 
     Reference:
         ICRC (2011), Technical Review, Section 4 / Hantush & Bierschenk (1964)
+        Eden & Hazel (1973)
     """
     # Validate test type
     if test.test_type != TestType.STEP_DRAWDOWN:
@@ -105,8 +255,18 @@ def analyse_step_drawdown(
         )
     specific_drawdowns = drawdown_arr / flowrates  # s/Q in h/m²
 
-    # Fit s/Q vs Q to get B and C
-    B, C, r_squared = _fit_specific_drawdown(flowrates, specific_drawdowns)
+    superposition = None
+    if method == StepDrawdownMethod.EDEN_HAZEL:
+        superposition = _fit_superposition(steps, time_series, drawdown_series, regression_method)
+        a, b = superposition.time_coeff, superposition.rate_coeff
+        B = a * np.log10(superposition.reference_duration_min) + b
+        C, r_squared = superposition.well_loss_coeff, superposition.r_squared
+        end_times = np.array([step.end_time_min for step in steps])
+        linear_losses = a * superposed_time(end_times, steps) + b * flowrates
+    else:
+        # Fit s/Q vs Q to get B and C
+        B, C, r_squared = _fit_specific_drawdown(flowrates, specific_drawdowns, regression_method)
+        linear_losses = B * flowrates
 
     # Calculate critical yield where the linear and non-linear losses are equal: BQ = CQ² => Q_crit = B/C
     # At Q_crit, linear and non-linear losses are equal: BQ = CQ² → Q_crit = B/C
@@ -116,8 +276,7 @@ def analyse_step_drawdown(
 
     # Calculate per-step results
     step_results = []
-    for step, s, sd in zip(steps, drawdowns, specific_drawdowns):
-        linear_loss = B * step.flowrate_m3h
+    for step, s, sd, linear_loss in zip(steps, drawdowns, specific_drawdowns, linear_losses):
         nonlinear_loss = C * step.flowrate_m3h ** 2
         efficiency = (linear_loss / (linear_loss + nonlinear_loss)) * 100 if (linear_loss + nonlinear_loss) > 0 else 0.0
         flowrate_m3day = step.flowrate_m3h * HOURS_PER_DAY
@@ -133,10 +292,23 @@ def analyse_step_drawdown(
             )
         )
     
+    confidence = None
+    if bootstrap is not None:
+        confidence = _loss_intervals(
+            method, steps, flowrates, specific_drawdowns, time_series, drawdown_series, bootstrap, regression_method
+        )
+    propagated = None
+    if monte_carlo is not None:
+        propagated = propagate_step_drawdown(test, method, monte_carlo, regression_method)
+
     return StepDrawdownResult(
         aquifer_loss_coeff=B,
         well_loss_coeff=C,
         critical_yield_m3h=critical_yield_m3h,
         r_squared=r_squared,
-        step_results=step_results
+        step_results=step_results,
+        superposition=superposition,
+        confidence=confidence,
+        monte_carlo=propagated,
+        regression_method=regression_method,
     )
@@ -0,0 +1,117 @@
+from typing import Optional
+from models import PumpingTest, TheisFit
+from analysis.special import exp1
+from analysis.solvers import levenberg_marquardt
+from analysis.regression import PrefixRegression
+import numpy as np
+
+MINUTES_PER_DAY = 1440.0
+HOURS_PER_DAY = 24.0
+COOPER_JACOB_COEFF = 0.183  # ln(10) / (4π), dimensionless
+
+# Fallback starting point when the Cooper-Jacob line gives none
+DEFAULT_INITIAL_T = 10.0    # m²/day
+DEFAULT_INITIAL_S = 1e-4
+STORATIVITY_BOUNDS = (1e-9, 0.5)    # clip range for the starting storativity
+
+def theis_drawdown(
+    time_min: np.ndarray,
+    transmissivity_m2day: float,
+    storativity: float,
+    radius_m: float,
+    flowrate_m3day: float,
+) -> np.ndarray:
+    """ Theis drawdown s = Q/(4πT) W(u), u = r²S/(4Tt), at times in minutes. """
+    t_day = np.asarray(time_min, dtype=np.float64) / MINUTES_PER_DAY
+    with np.errstate(divide="ignore"):
+        u = radius_m ** 2 * storativity / (4 * transmissivity_m2day * t_day)
+    return flowrate_m3day / (4 * np.pi * transmissivity_m2day) * exp1(u)
+
+def _initial_guess(t_day: np.ndarray, drawdown: np.ndarray, radius_m: float, flowrate_m3day: float) -> tuple[float, float]:
+    """ T and S from a Cooper-Jacob line through the later half of the data. """
+    half = len(t_day) // 2
+    fit = PrefixRegression.semilog(t_day, drawdown).fit(half, None)
+    if not fit.slope > 0:
+        return DEFAULT_INITIAL_T, DEFAULT_INITIAL_S
+    T = COOPER_JACOB_COEFF * flowrate_m3day / fit.drawdown_per_log_cycle
+    t0_day = np.exp(-fit.intercept / fit.slope)
+    S = float(np.clip(2.25 * T * t0_day / radius_m ** 2, *STORATIVITY_BOUNDS))
+    return T, S
+
+def fit_theis(
+    test: PumpingTest,
+    radius_m: float,
+    fit_start_idx: int = 1, # Skip t=0 (W(u) is undefined)
+    fit_end_idx: Optional[int] = None,
+    initial_T: Optional[float] = None,
+    initial_S: Optional[float] = None,
+) -> TheisFit:
+    """
+    Fit T and S of the Theis solution to a constant-rate test.
+
+    Solved in ln(T), ln(S) (so both stay positive) by Levenberg-Marquardt with
+    analytic derivatives of W(u): with a = Q/(4πT),
+        ∂s/∂ln T = a (exp(-u) - W(u)),    ∂s/∂ln S = -a exp(-u).
+    Each iteration is one vectorised pass over the data.
+
+    r and S only enter through r²S, so they cannot both be fitted: radius_m is
+    the distance from the pumped well at which the levels were measured (the
+    well radius for readings in the pumped well itself, where well losses make
+    S unreliable even when T is good).
+
+    Args:
+        test:          A constant-rate PumpingTest.
+        radius_m:      Distance from the pumped well [m].
+        fit_start_idx: Index of the first measurement to include.
+        fit_end_idx:   Index of the last measurement (exclusive). Defaults to all.
+        initial_T:     Starting T [m²/day]; default from a Cooper-Jacob line.
+        initial_S:     Starting S; default from the same line.
+
+    Returns:
+        TheisFit with T, S and the fit statistics.
+
+    Raises:
+        ValueError: If radius_m is not positive or fewer than 3 readings with
+                    positive time and a finite drawdown fall in the window.
+    """
+    if radius_m <= 0:
+        raise ValueError(f"Radius must be positive, got {radius_m}.")
+
+    time = test.time_series[fit_start_idx:fit_end_idx]
+    drawdown = test.drawdown_series[fit_start_idx:fit_end_idx]
+    usable = (time > 0) & np.isfinite(drawdown)
+    if np.count_nonzero(usable) < 3:
+        raise ValueError(
+            f"Theis fit needs at least 3 readings with positive time, got {np.count_nonzero(usable)}. "
+            f"Adjust fit_start_idx ({fit_start_idx}) and fit_end_idx ({fit_end_idx})."
+        )
+    t_day = time[usable] / MINUTES_PER_DAY
+    observed = drawdown[usable]
+    flowrate_m3day = test.flowrate_m3h * HOURS_PER_DAY
+    r2_over_4t = radius_m ** 2 / (4 * t_day)
+
+    def residuals_and_jacobian(params: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        T, S = np.exp(params)
+        u = r2_over_4t * S / T
+        w = exp1(u)
+        e = np.exp(-u)
+        a = flowrate_m3day / (4 * np.pi * T)
+        jacobian = np.column_stack([a * (e - w), -a * e])
+        return a * w - observed, jacobian
+
+    guess_T, guess_S = _initial_guess(t_day, observed, radius_m, flowrate_m3day)
+    p0 = np.log([initial_T or guess_T, initial_S or guess_S])
+    solution = levenberg_marquardt(residuals_and_jacobian, p0)
+
+    T, S = np.exp(solution.params)
+    ss_tot = float(np.sum((observed - observed.mean()) ** 2))
+    return TheisFit(
+        transmissivity_m2day=float(T),
+        storativity=float(S),
+        radius_m=radius_m,
+        rmse_m=float(np.sqrt(solution.cost / len(observed))),
+        r_squared=1 - solution.cost / ss_tot if ss_tot > 0 else 0.0,
+        n_points_used=len(observed),
+        iterations=solution.iterations,
+        converged=solution.converged,
+    )
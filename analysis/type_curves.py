@@ -0,0 +1,515 @@
+import hashlib
+import itertools
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+from models import PumpingTest, TypeCurveFit
+from analysis.laplace import invert_laplace, DEFAULT_STEHFEST_TERMS, TypeCurveFamily, TypeCurveParameter
+from analysis.laplace_models import LAPLACE_MODEL_FAMILIES
+from analysis.special import bessel_k
+from analysis.solvers import levenberg_marquardt
+from in_out.cache import default_cache
+import numpy as np
+
+ATLAS_FORMAT_VERSION = 1    # bump when a family's transform or the file layout changes
+MINUTES_PER_DAY = 1440.0
+HOURS_PER_DAY = 24.0
+LN10 = np.log(10.0)
+
+# Dimensionless time axis of every curve: 1/u = 4Tt/(r²S)
+INVERSE_U_LOG10_RANGE = (-1.0, 10.0)
+INVERSE_U_PER_DECADE = 40
+# Starting points of a fit: curve positions screened on a subsample, best few refined
+STARTS_PER_PARAMETER = 3    # shape parameter values per parameter
+SCREEN_SHIFTS_LOG10 = np.arange(-0.5, 8.01, 0.25)  # log10(1/u) at the median reading
+SCREEN_POINTS = 200
+REFINED_STARTS = 4
+
+FINITE_DIFFERENCE_STEP = 1e-4   # in a parameter's coordinate, for directly inverted families
+MAX_START_STORATIVITY = 0.5     # curve matches implying a larger S start the fit here
+
+def _signature(family: TypeCurveFamily) -> str:
+    """ Hash of everything a family's tabulated curves depend on. """
+    spec = {
+        "version": ATLAS_FORMAT_VERSION,
+        "name": family.name,
+        "inverse_u": [*INVERSE_U_LOG10_RANGE, INVERSE_U_PER_DECADE],
+        "stehfest_terms": DEFAULT_STEHFEST_TERMS,
+        "parameters": [[p.name, p.low, p.high, p.per_decade] for p in family.parameters],
+    }
+    return hashlib.sha256(json.dumps(spec).encode()).hexdigest()[:16]
+
+def _logistic(z):
+    return 1 / (1 + np.exp(-z))
+
+def inverse_u_grid() -> np.ndarray:
+    low, high = INVERSE_U_LOG10_RANGE
+    return np.logspace(low, high, int(round((high - low) * INVERSE_U_PER_DECADE)) + 1)
+
+def _theis_laplace(p):
+    return 2 * bessel_k(0, np.sqrt(p)) / p
+
+def _hantush_jacob_laplace(p, r_over_b):
+    return 2 * bessel_k(0, np.sqrt(p + r_over_b ** 2)) / p
+
+def _boulton_laplace(p, r_over_b, sigma):
+    # Boulton's delay index α enters as α r²S/T = σ (r/B)², with B = √(T/(α Sy))
+    q = p + r_over_b ** 2 * p / (p + sigma * r_over_b ** 2)
+    return 2 * bessel_k(0, np.sqrt(q)) / p
+
+def _papadopulos_cooper_laplace(p, alpha):
+    root = np.sqrt(p)
+    k0 = bessel_k(0, root)
+    k1 = bessel_k(1, root)
+    return 2 * k0 / (p * (root * k1 + p * k0 / (2 * alpha)))
+
+TYPE_CURVE_FAMILIES: dict[str, TypeCurveFamily] = {
+    family.name: family
+    for family in (
+        TypeCurveFamily(
+            name="theis",
+            description="Theis: confined, fully penetrating line source",
+            laplace=_theis_laplace,
+        ),
+        TypeCurveFamily(
+            name="hantush_jacob",
+            description="Hantush-Jacob: leaky confined aquifer, no aquitard storage",
+            laplace=_hantush_jacob_laplace,
+            parameters=(TypeCurveParameter("r_over_b", 1e-5, 3.0, 20, "r/B, B = √(T b'/K')"),),
+        ),
+        TypeCurveFamily(
+            name="boulton",
+            description="Boulton: unconfined aquifer with delayed yield",
+            laplace=_boulton_laplace,
+            parameters=(
+                TypeCurveParameter("r_over_b", 1e-2, 3.0, 10, "r/B, B = √(T/(α Sy))"),
+                TypeCurveParameter("sigma", 1e-3, 1e-1, 10, "S/Sy"),
+            ),
+        ),
+        TypeCurveFamily(
+            name="papadopulos_cooper",
+            description="Papadopulos-Cooper: large-diameter well with wellbore storage",
+            laplace=_papadopulos_cooper_laplace,
+            parameters=(TypeCurveParameter("alpha", 1e-8, 1e-1, 10, "rw² S / rc²"),),
+        ),
+        *LAPLACE_MODEL_FAMILIES,
+    )
+}
+
+def register_type_curve_family(family: TypeCurveFamily) -> None:
+    """ Make a model available to fit_type_curve, the CLI and the plots by name. """
+    if family.tabulated and not all(p.log for p in family.parameters):
+        raise ValueError(f"Tabulated family '{family.name}' must have log-scaled parameters only.")
+    TYPE_CURVE_FAMILIES[family.name] = family
+
+def tabulated_family_names() -> list[str]:
+    """ Families stored in the atlas (the rest are inverted directly). """
+    return [name for name, family in TYPE_CURVE_FAMILIES.items() if family.tabulated]
+
+def type_curve_family(name: str) -> TypeCurveFamily:
+    """ Look up a family by name, with the valid names in the error. """
+    try:
+        return TYPE_CURVE_FAMILIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown type-curve family '{name}', expected one of {tuple(TYPE_CURVE_FAMILIES)}.") from None
+
+def build_curves(family: TypeCurveFamily) -> np.ndarray:
+    """
+    Tabulate a family on its full grid by Stehfest inversion, in one
+    vectorised pass: shape (*parameter grid sizes, len(inverse_u_grid())).
+    """
+    if not family.tabulated:
+        raise ValueError(f"Type-curve family '{family.name}' is inverted directly and is not tabulated.")
+    t_prime = inverse_u_grid() / 4
+    grids = np.meshgrid(*(p.grid for p in family.parameters), indexing="ij")
+    params = [g[..., None, None] for g in grids]
+    return invert_laplace(lambda p: family.laplace(p, *params), t_prime)
+
+def _check_parameters(family: TypeCurveFamily, params: tuple[float, ...]) -> None:
+    if len(params) != len(family.parameters):
+        raise ValueError(
+            f"Type curve '{family.name}' takes {len(family.parameters)} parameter(s), got {len(params)}."
+        )
+    for spec, value in zip(family.parameters, params):
+        span = spec.high - spec.low
+        if not spec.low - 1e-9 * span <= value <= spec.high + 1e-9 * span:
+            raise ValueError(f"{spec.name} = {value:g} is outside the range {spec.low:g}–{spec.high:g}.")
+
+def _interpolate_in_time(
+    curve: np.ndarray,
+    d_params: list[np.ndarray],
+    inverse_u: np.ndarray,
+    first: int = 0,
+) -> tuple[np.ndarray, np.ndarray, list[np.ndarray]]:
+    """
+    Linear interpolation in ln(1/u) of curves sampled on inverse_u_grid()[first:],
+    with the end segments extended linearly; also returns dW/dln(1/u).
+    """
+    low, _ = INVERSE_U_LOG10_RANGE
+    position = (np.log10(np.asarray(inverse_u, dtype=np.float64)) - low) * INVERSE_U_PER_DECADE - first
+    i = np.clip(np.floor(position).astype(np.intp), 0, len(curve) - 2)
+    f = position - i
+
+    def interpolate(values: np.ndarray) -> np.ndarray:
+        return values[i] + f * (values[i + 1] - values[i])
+
+    d_time = (curve[i + 1] - curve[i]) * INVERSE_U_PER_DECADE / LN10
+    return interpolate(curve), d_time, [interpolate(d) for d in d_params]
+
+@dataclass
+class TypeCurveTable:
+    """ The tabulated curves of one family (usually memory-mapped), with interpolation. """
+    family: TypeCurveFamily
+    curves: np.ndarray
+
+    def evaluate(
+        self,
+        inverse_u: np.ndarray,
+        params: tuple[float, ...] = (),
+        derivatives: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray, list[np.ndarray]]:
+        """
+        W at 1/u for one parameter set, with dW/dln(1/u) and the derivative
+        with respect to each parameter's coordinate (ln of the parameter).
+        Without derivatives the parameter derivatives are an empty list.
+
+        Multilinear in the log of the parameters and linear in ln(1/u); beyond
+        the ends of the time grid the end segments are extended linearly.
+
+        Raises:
+            ValueError: If the number of parameters is wrong or one is outside its grid.
+        """
+        _check_parameters(self.family, params)
+        cells, fractions, steps = [], [], []
+        for spec, value in zip(self.family.parameters, params):
+            grid = spec.grid
+            step = np.log(grid[1] / grid[0])
+            position = np.log(value / grid[0]) / step
+            cell = int(np.clip(np.floor(position), 0, len(grid) - 2))
+            cells.append(cell)
+            fractions.append(position - cell)
+            steps.append(step)
+
+        # Blend the 2^k corner curves into one curve and one curve per parameter derivative
+        curve = np.zeros(self.curves.shape[-1])
+        d_params = [np.zeros_like(curve) for _ in params] if derivatives else []
+        for corner in itertools.product((0, 1), repeat=len(params)):
+            weights = [f if bit else 1 - f for bit, f in zip(corner, fractions)]
+            corner_curve = self.curves[tuple(c + bit for c, bit in zip(cells, corner))]
+            curve += np.prod(weights) * corner_curve
+            for j, d in enumerate(d_params):
+                others = np.prod(weights[:j] + weights[j + 1:])
+                d += (1 if corner[j] else -1) * others / steps[j] * corner_curve
+
+        return _interpolate_in_time(curve, d_params, inverse_u)
+
+@dataclass
+class LaplaceCurves:
+    """
+    A family evaluated by direct Stehfest inversion instead of from a table.
+
+    Same interface as TypeCurveTable. Each call inverts the transform on the
+    stretch of the atlas time grid that covers the requested 1/u, for the
+    parameter set and (with derivatives) its central-difference neighbours,
+    all in one broadcast call, then interpolates in time. The last result is
+    memoised, so a curve slid along the time axis is inverted only once.
+    """
+    family: TypeCurveFamily
+    _last: tuple = field(default=(None, None), init=False, repr=False)
+
+    def _invert(self, params: tuple[float, ...], first: int, last: int, derivatives: bool) -> np.ndarray:
+        key = (params, first, last, derivatives)
+        if self._last[0] == key:
+            return self._last[1]
+        specs = self.family.parameters
+        coordinates = np.array([spec.coordinate(v) for spec, v in zip(specs, params)])
+        sets = [coordinates]
+        if derivatives:
+            for j in range(len(specs)):
+                for sign in (1, -1):
+                    shifted = coordinates.copy()
+                    shifted[j] += sign * FINITE_DIFFERENCE_STEP
+                    sets.append(shifted)
+        sets = np.array(sets)
+        columns = [spec.value(sets[:, j])[:, None, None] for j, spec in enumerate(specs)]
+        t_prime = inverse_u_grid()[first:last + 1] / 4
+        values = invert_laplace(lambda p: self.family.laplace(p, *columns), t_prime)
+        values = np.broadcast_to(values, (len(sets), len(t_prime)))
+        self._last = (key, values)
+        return values
+
+    def evaluate(
+        self,
+        inverse_u: np.ndarray,
+        params: tuple[float, ...] = (),
+        derivatives: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray, list[np.ndarray]]:
+        """
+        W at 1/u for one parameter set, with dW/dln(1/u) and the derivative
+        with respect to each parameter's coordinate (ln of the parameter, or
+        the parameter itself if it is linear). Without derivatives the whole
+        time grid is inverted (so later shifts reuse it) and the parameter
+        derivatives are an empty list.
+
+        Raises:
+            ValueError: If the number of parameters is wrong or one is outside its range.
+        """
+        params = tuple(float(v) for v in params)
+        _check_parameters(self.family, params)
+        n = len(inverse_u_grid())
+        first, last = 0, n - 1
+        if derivatives:
+            low, _ = INVERSE_U_LOG10_RANGE
+            with np.errstate(divide="ignore", invalid="ignore"):
+                position = (np.log10(np.asarray(inverse_u, dtype=np.float64)) - low) * INVERSE_U_PER_DECADE
+            position = position[np.isfinite(position)]
+            if len(position):
+                first = int(np.clip(np.floor(position.min()), 0, n - 2))
+                last = int(np.clip(np.floor(position.max()) + 1, first + 1, n - 1))
+        values = self._invert(params, first, last, derivatives)
+        d_params = [
+            (values[1 + 2 * j] - values[2 + 2 * j]) / (2 * FINITE_DIFFERENCE_STEP)
+            for j in range(len(params))
+        ] if derivatives else []
+        return _interpolate_in_time(values[0], d_params, inverse_u, first)
+
+TypeCurves = Union[TypeCurveTable, LaplaceCurves]
+
+@dataclass
+class TypeCurveAtlas:
+    """
+    Versioned on-disk store of tabulated type-curve families.
+
+    Each family is built once (a few seconds of Stehfest inversion) into
+    v<version>/<family>/curves.npy, with a meta.json holding the signature of
+    its grids; later loads memory-map the file, once per process. A family
+    whose grids or transform changed is rebuilt on first use.
+    """
+    directory: Path
+    _tables: dict = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self.directory = Path(self.directory)
+
+    @property
+    def _root(self) -> Path:
+        return self.directory / f"v{ATLAS_FORMAT_VERSION}"
+
+    def _load(self, family: TypeCurveFamily) -> Optional[np.ndarray]:
+        entry = self._root / family.name
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+            if meta.get("signature") != _signature(family):
+                return None
+            return np.load(entry / "curves.npy", mmap_mode="r")
+        except (OSError, ValueError):
+            return None     # missing, stale or partially written entry
+
+    def _store(self, family: TypeCurveFamily, curves: np.ndarray) -> None:
+        """ Written to a temporary directory and renamed into place, replacing a stale entry. """
+        self._root.mkdir(parents=True, exist_ok=True)
+        entry = self._root / family.name
+        tmp = self._root / f".{family.name}.{os.getpid()}.tmp"
+        tmp.mkdir(exist_ok=True)
+        np.save(tmp / "curves.npy", np.ascontiguousarray(curves, dtype=np.float64))
+        meta = {
+            "signature": _signature(family),
+            "description": family.description,
+            "parameters": [p.name for p in family.parameters],
+            "shape": list(curves.shape),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            tmp.rename(entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)   # another process stored it first
+
+    def table(self, name: str) -> TypeCurveTable:
+        """ The table of a family, building and storing it on first use. """
+        if name not in self._tables:
+            family = type_curve_family(name)
+            curves = self._load(family)
+            if curves is None:
+                self._store(family, build_curves(family))
+                curves = self._load(family)
+            self._tables[name] = TypeCurveTable(family=family, curves=curves)
+        return self._tables[name]
+
+    def build(self, names: Optional[list[str]] = None, force: bool = False) -> list[str]:
+        """ Build the named families (default all tabulated) that are missing or stale; returns those built. """
+        families = [type_curve_family(name) for name in names or tabulated_family_names()]
+        built = []
+        for family in families:
+            if force or self._load(family) is None:
+                self._store(family, build_curves(family))
+                self._tables.pop(family.name, None)
+                built.append(family.name)
+        return built
+
+_DEFAULT_ATLASES: dict[Path, TypeCurveAtlas] = {}
+
+def default_atlas() -> TypeCurveAtlas:
+    """ Atlas under the parsed-data cache directory, shared within the process. """
+    directory = default_cache().directory / "type_curves"
+    return _DEFAULT_ATLASES.setdefault(directory, TypeCurveAtlas(directory=directory))
+
+def curves_for(name: str, atlas: Optional[TypeCurveAtlas] = None) -> TypeCurves:
+    """ The curves of a family: from the atlas if it is tabulated, else by direct inversion. """
+    family = type_curve_family(name)
+    if family.tabulated:
+        return (atlas or default_atlas()).table(name)
+    return LaplaceCurves(family)
+
+def type_curve_drawdown(
+    curves: TypeCurves,
+    time_min: np.ndarray,
+    transmissivity_m2day: float,
+    storativity: float,
+    parameters: dict[str, float],
+    radius_m: float,
+    flowrate_m3day: float,
+) -> np.ndarray:
+    """ Drawdown s = Q/(4πT) W(1/u, params) at times in minutes. """
+    t_day = np.asarray(time_min, dtype=np.float64) / MINUTES_PER_DAY
+    inverse_u = 4 * transmissivity_m2day * t_day / (radius_m ** 2 * storativity)
+    params = tuple(parameters[p.name] for p in curves.family.parameters)
+    w, _, _ = curves.evaluate(inverse_u, params, derivatives=False)
+    return flowrate_m3day / (4 * np.pi * transmissivity_m2day) * w
+
+def fit_type_curve(
+    test: PumpingTest,
+    family: str,
+    radius_m: float,
+    atlas: Optional[TypeCurveAtlas] = None,
+    fit_start_idx: int = 1, # Skip t=0 (1/u is zero)
+    fit_end_idx: Optional[int] = None,
+) -> TypeCurveFit:
+    """
+    Fit T, S and the shape parameters of a type-curve family.
+
+    Solved by Levenberg-Marquardt on the interpolated atlas curves (or on
+    direct Stehfest inversion for families that are not tabulated), with s = a W(1/u, θ), a = Q/(4πT), 1/u = 4Tt/(r²S):
+        ∂s/∂ln T = a (W' - W),    ∂s/∂ln S = -a W',    ∂s/∂ln θ = a ∂W/∂ln θ,
+    where W' = ∂W/∂ln(1/u) (linear parameters such as skin use θ for ln θ).
+    Shape parameters are mapped logistically onto their range, so they stay
+    inside it without sticking to its ends; S is the logistic of its own
+    coordinate, so it stays inside (0, 1) (∂ln S/∂z = 1 - S).
+
+    Starting points come from classical curve matching on a log-spaced
+    subsample: each of a small grid of shape parameters is slid along the 1/u
+    axis with the vertical scale solved in closed form. The best few matches
+    are refined on the subsample, and the best of those on every reading.
+
+    Args:
+        test:          A constant-rate PumpingTest.
+        family:        Name of a family in TYPE_CURVE_FAMILIES.
+        radius_m:      Distance from the pumped well [m] (the well radius for
+                       pumped-well readings).
+        atlas:         Where the curves are stored; default_atlas() if None.
+        fit_start_idx: Index of the first measurement to include.
+        fit_end_idx:   Index of the last measurement (exclusive). Defaults to all.
+
+    Returns:
+        TypeCurveFit for the best start.
+
+    Raises:
+        ValueError: If the family is unknown, radius_m is not positive, or
+                    there are too few usable readings.
+    """
+    curves = curves_for(family, atlas)
+    if radius_m <= 0:
+        raise ValueError(f"Radius must be positive, got {radius_m}.")
+
+    specs = curves.family.parameters
+    time = test.time_series[fit_start_idx:fit_end_idx]
+    drawdown = test.drawdown_series[fit_start_idx:fit_end_idx]
+    usable = (time > 0) & np.isfinite(drawdown)
+    n_params = 2 + len(specs)
+    if np.count_nonzero(usable) <= n_params:
+        raise ValueError(
+            f"Type-curve fit ({family}) needs more than {n_params} readings with positive time, "
+            f"got {np.count_nonzero(usable)}. Adjust fit_start_idx ({fit_start_idx}) and fit_end_idx ({fit_end_idx})."
+        )
+    t_day = time[usable] / MINUTES_PER_DAY
+    observed = drawdown[usable]
+    flowrate_m3day = test.flowrate_m3h * HOURS_PER_DAY
+    spec_low = np.array([spec.low for spec in specs])
+    spec_high = np.array([spec.high for spec in specs])
+    coordinate_low = np.array([spec.coordinate(spec.low) for spec in specs])
+    coordinate_span = np.array([spec.coordinate(spec.high) for spec in specs]) - coordinate_low
+
+    def shape_parameters(z: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """ Shape parameters from unbounded z (logistic onto each parameter's range), with d coordinate / dz. """
+        fraction = 1 / (1 + np.exp(-z))
+        coordinates = coordinate_low + coordinate_span * fraction
+        values = np.array([spec.value(c) for spec, c in zip(specs, coordinates)])
+        return values, coordinate_span * fraction * (1 - fraction)
+
+    def problem(t: np.ndarray, s: np.ndarray):
+        """ Residuals and Jacobian in x = (ln T, logit S, z...) for readings s at times t [day]. """
+        four_t_over_r2 = 4 * t / radius_m ** 2
+
+        def residuals_and_jacobian(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            # Wild trial steps can overflow; the solver rejects their non-finite cost
+            with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+                T, S = np.exp(x[0]), _logistic(x[1])
+                theta, d_coordinates = shape_parameters(x[2:])
+                w, w_time, w_params = curves.evaluate(four_t_over_r2 * T / S, tuple(np.clip(theta, spec_low, spec_high)))
+                a = flowrate_m3day / (4 * np.pi * T)
+                columns = [a * (w_time - w), -a * w_time * (1 - S), *(a * dw * d for dw, d in zip(w_params, d_coordinates))]
+                return a * w - s, np.column_stack(columns)
+
+        return residuals_and_jacobian
+
+    # Type-curve matching: slide each start curve along the 1/u axis, with the
+    # vertical scale Q/(4πT) solved in closed form, on a log-spaced subsample
+    sample = np.unique(np.minimum(
+        np.searchsorted(t_day, np.geomspace(t_day.min(), t_day.max(), SCREEN_POINTS)), len(t_day) - 1
+    ))
+    t_sample, s_sample = t_day[sample], observed[sample]
+    fractions = np.arange(1, STARTS_PER_PARAMETER + 1) / (STARTS_PER_PARAMETER + 1)
+    starts, costs = [], []
+    for z in itertools.product(np.log(fractions / (1 - fractions)), repeat=len(specs)):
+        theta, _ = shape_parameters(np.array(z))
+        best_cost, best_start = np.inf, None
+        for shift in SCREEN_SHIFTS_LOG10:
+            inverse_u = 10 ** shift * t_sample / np.median(t_sample)
+            w, _, _ = curves.evaluate(inverse_u, tuple(theta), derivatives=False)
+            scale = (w @ s_sample) / (w @ w)
+            cost = float(np.sum((scale * w - s_sample) ** 2))
+            if scale > 0 and cost < best_cost:
+                T = flowrate_m3day / (4 * np.pi * scale)
+                S = min(4 * T * t_sample[0] / (radius_m ** 2 * inverse_u[0]), MAX_START_STORATIVITY)
+                best_cost, best_start = cost, np.array([np.log(T), np.log(S / (1 - S)), *z])
+        if best_start is not None:     # the best position of each shape, so the refined starts differ in shape
+            starts.append(best_start)
+            costs.append(best_cost)
+    if not starts:
+        raise ValueError(f"Type-curve fit ({family}) found no starting match: drawdown does not increase.")
+
+    # Refine the best starts on the subsample, where early and late time weigh
+    # alike, then polish the winner on every reading
+    on_sample = problem(t_sample, s_sample)
+    refined = [levenberg_marquardt(on_sample, starts[k]) for k in np.argsort(costs)[:REFINED_STARTS]]
+    best = levenberg_marquardt(problem(t_day, observed), min(refined, key=lambda r: r.cost).params)
+
+    T = np.exp(best.params[0])
+    with np.errstate(over="ignore"):
+        S = _logistic(best.params[1])
+        theta, _ = shape_parameters(best.params[2:])
+    ss_tot = float(np.sum((observed - observed.mean()) ** 2))
+    return TypeCurveFit(
+        family=family,
+        transmissivity_m2day=float(T),
+        storativity=float(S),
+        parameters={spec.name: float(v) for spec, v in zip(specs, theta)},
+        radius_m=radius_m,
+        rmse_m=float(np.sqrt(best.cost / len(observed))),
+        r_squared=1 - best.cost / ss_tot if ss_tot > 0 else 0.0,
+        n_points_used=len(observed),
+        converged=best.converged,
+    )
@@ -0,0 +1,121 @@
+from typing import Optional
+from models import FitWindowCandidate, RegressionMethod
+from analysis.regression import PrefixRegression, log_grid_bounds
+import numpy as np
+
+COOPER_JACOB_COEFF = 0.183  # ln(10) / (4π), dimensionless
+COOPER_JACOB_MAX_U = 0.05   # straight-line approximation holds for u below this
+MINUTES_PER_DAY = 1440.0
+
+DEFAULT_MIN_POINTS = 5
+DEFAULT_MIN_LOG_CYCLES = 0.5
+DEFAULT_BOUNDS_PER_LOG_CYCLE = 20
+DEFAULT_TOP_N = 5
+
+def search_fit_windows(
+    time_axis: np.ndarray,
+    drawdown: np.ndarray,
+    flowrate_m3day: float,
+    check_u: bool = True,
+    radius_m: Optional[float] = None,
+    min_points: int = DEFAULT_MIN_POINTS,
+    min_log_cycles: float = DEFAULT_MIN_LOG_CYCLES,
+    bounds_per_log_cycle: int = DEFAULT_BOUNDS_PER_LOG_CYCLE,
+    top_n: int = DEFAULT_TOP_N,
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES,
+) -> list[FitWindowCandidate]:
+    """
+    Score every admissible semi-log fit window at once and return the best.
+
+    Window boundaries are taken on a log grid of the time axis, so the number of
+    candidates depends on the number of log cycles, not the number of readings,
+    and all of them are fitted in one vectorised pass over prefix sums. A
+    window is admissible when it:
+        - holds at least min_points readings, all with a positive time axis;
+        - spans at least min_log_cycles of the time axis;
+        - has a positive slope (a positive transmissivity);
+        - with check_u, satisfies the Cooper-Jacob condition u < 0.05 at its
+          earliest time.
+
+    Extrapolating the line to zero drawdown gives t0, from which
+    S = 2.25 T t0 / r² and u = r² S / (4 T t) = 2.25 t0 / (4 t). The u check
+    therefore needs no radius; S is only reported when radius_m is given.
+
+    Windows are ranked by adjusted R², then by the number of log cycles.
+    With a robust regression_method the readings are weighted by their spike
+    weights in the prefix sums (see PrefixRegression), so a spike neither
+    sinks a good window's R² nor swings its T.
+
+    Args:
+        time_axis:      Fit abscissa: elapsed time [min] for constant-rate, the
+                        recovery method's axis (t/t', equivalent time or t') for
+                        recovery. Non-positive values are never fitted.
+        drawdown:       Drawdown [m], same length as time_axis.
+        flowrate_m3day: Pumping rate used for T [m³/day].
+        check_u:        Apply the u < 0.05 condition (constant-rate and Agarwal
+                        recovery; the t/t' and t' intercepts do not give S).
+        radius_m:       Radius for the storativity estimate [m].
+        min_points:     Minimum readings in a window (at least 3).
+        min_log_cycles: Minimum span of a window in log cycles.
+        bounds_per_log_cycle: Density of the boundary grid.
+        top_n:          Number of windows returned.
+        regression_method: Estimator the analysis fits the chosen window with.
+
+    Returns:
+        Up to top_n FitWindowCandidate, best first; empty if none is admissible.
+
+    Raises:
+        ValueError: If min_points < 3 or bounds_per_log_cycle < 1.
+    """
+    if min_points < 3:
+        raise ValueError(f"Minimum points per window must be at least 3, got {min_points}.")
+    if bounds_per_log_cycle < 1:
+        raise ValueError(f"Bounds per log cycle must be a positive integer, got {bounds_per_log_cycle}.")
+
+    time_axis = np.asarray(time_axis, dtype=np.float64)
+    regression = PrefixRegression.semilog(time_axis, drawdown, regression_method)
+    log_axis = np.log10(time_axis, out=np.full_like(time_axis, np.nan), where=time_axis > 0)
+
+    bounds = log_grid_bounds(log_axis, bounds_per_log_cycle)
+    i, j = np.triu_indices(len(bounds), 1)
+    starts, ends = bounds[i], bounds[j]
+    fits = regression.fit_windows(starts, ends)
+
+    lengths = ends - starts
+    log_cycles = np.abs(log_axis[ends - 1] - log_axis[starts])
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        admissible = (
+            (fits.n_points == lengths)
+            & (lengths >= min_points)
+            & (log_cycles >= min_log_cycles)
+            & (fits.slope > 0)
+        )
+        transmissivity = COOPER_JACOB_COEFF * flowrate_m3day / fits.drawdown_per_log_cycle
+        t0 = np.exp(-fits.intercept / fits.slope)
+        earliest = np.minimum(time_axis[starts], time_axis[ends - 1])
+        u_start = 2.25 * t0 / (4 * earliest)
+        if check_u:
+            admissible &= u_start < COOPER_JACOB_MAX_U
+        adjusted = 1 - (1 - fits.r_squared) * (lengths - 1) / (lengths - 2)
+
+    candidates = np.flatnonzero(admissible)
+    order = np.lexsort((-log_cycles[candidates], -adjusted[candidates]))
+    best = candidates[order[:top_n]]
+
+    return [
+        FitWindowCandidate(
+            start_idx=int(starts[k]),
+            end_idx=int(ends[k]),
+            n_points=int(lengths[k]),
+            log_cycles=float(log_cycles[k]),
+            r_squared=float(fits.r_squared[k]),
+            adjusted_r_squared=float(adjusted[k]),
+            transmissivity_m2day=float(transmissivity[k]),
+            storativity=(
+                float(2.25 * transmissivity[k] * t0[k] / MINUTES_PER_DAY / radius_m ** 2)
+                if check_u and radius_m else None
+            ),
+            u_start=float(u_start[k]) if check_u else None,
+        )
+        for k in best
+    ]
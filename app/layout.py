@@ -9,6 +9,8 @@ _borehole_inputs = ui.div(
     ui.h6("Borehole Info"),
     ui.input_text("borehole_name", "Borehole name", placeholder="BH01"),
     ui.input_numeric("static_level", "Static water level [mbd]", value=10.0, min=0.0),
+    ui.input_numeric("diameter", "Casing diameter [mm]", value=200.0, min=70.0),
+    ui.input_numeric("pump_depth", "Pump intake depth [mbd]", value=None, min=0.0),
     ui.input_date("test_date", "Date of test"),
     ui.input_text("operator", "Operator", placeholder="Jane Doe"),
 )
@@ -26,12 +28,110 @@ _recovery_inputs = ui.panel_conditional(
     ui.input_file("r_file", "Data file (.csv)", accept=".csv"),
     ui.input_numeric("r_flowrate", "Pumping flowrate [m³/h]", value=1.0, min=0.01),
     ui.input_numeric("r_end_of_pumping", "End of pumping [min]", value=600.0, min=1.0),
+    ui.input_select(
+        "r_method",
+        "Method",
+        choices={
+            "theis": "Theis (t/t')",
+            "agarwal": "Agarwal (equivalent time)",
+            "residual": "Residual drawdown (t')",
+        },
+        selected="theis",
+    ),
+)
+
+_decimation_inputs = ui.panel_conditional(
+    "input.test_type === 'constant_rate' || input.test_type === 'recovery'",
+    ui.h6("Log-Time Decimation"),
+    ui.input_switch("decimate", "Resample before fitting", value=False),
+    ui.panel_conditional(
+        "input.decimate",
+        ui.input_numeric("bins_per_log_cycle", "Bins per log cycle", value=20, min=1),
+        ui.input_select(
+            "decimation_method",
+            "Combine readings by",
+            choices={"median": "Median", "mean": "Mean"},
+            selected="median",
+        ),
+    ),
+)
+
+_regression_inputs = ui.input_select(
+    "regression",
+    "Regression",
+    choices={
+        "least_squares": "Least squares",
+        "theil_sen": "Theil-Sen (resists spikes)",
+        "huber": "Huber (resists spikes)",
+    },
+    selected="least_squares",
+)
+
+_qc_inputs = ui.div(
+    ui.h6("Quality Control"),
+    ui.input_switch("qc", "Reject spikes, flat lines and levels below the pump", value=False),
+    ui.panel_conditional(
+        "input.qc",
+        ui.input_numeric("qc_spike_threshold", "Spike threshold [rolling MADs]", value=5.0, min=1.0),
+        ui.input_numeric("qc_spike_min_m", "Smallest spike [m]", value=0.05, min=0.0),
+        ui.input_numeric("qc_flatline_min", "Flat line lasting at least [min]", value=30.0, min=0.0),
+    ),
+)
+
+_bootstrap_inputs = ui.div(
+    ui.h6("Confidence Intervals"),
+    ui.input_switch("bootstrap", "Bootstrap the fit", value=False),
+    ui.panel_conditional(
+        "input.bootstrap",
+        ui.input_numeric("bootstrap_replicates", "Replicates", value=2000, min=10),
+        ui.input_select(
+            "bootstrap_method",
+            "Resample",
+            choices={"residual": "Residuals", "pairs": "Readings (pairs)"},
+            selected="residual",
+        ),
+    ),
+)
+
+_monte_carlo_inputs = ui.div(
+    ui.h6("Field-Input Uncertainty"),
+    ui.input_switch("monte_carlo", "Propagate field errors (Monte Carlo)", value=False),
+    ui.panel_conditional(
+        "input.monte_carlo",
+        ui.input_numeric("mc_samples", "Samples", value=10000, min=100),
+        ui.input_numeric("mc_flowrate_pct", "Flowrate error [%]", value=5, min=0),
+        ui.input_numeric("mc_static_level_m", "Static level error [m]", value=0.02, min=0),
+        ui.panel_conditional(
+            "input.test_type === 'recovery'",
+            ui.input_numeric("mc_end_of_pumping_min", "End-of-pumping error [min]", value=1, min=0),
+        ),
+        ui.panel_conditional(
+            "input.test_type === 'step_drawdown'",
+            ui.input_numeric("mc_step_time_min", "Step end time error [min]", value=1, min=0),
+        ),
+        ui.input_select(
+            "mc_distribution",
+            "Error distribution",
+            choices={"normal": "Normal (value = 1 s.d.)", "uniform": "Uniform (value = half-width)"},
+            selected="normal",
+        ),
+    ),
 )
 
 _step_drawdown_inputs = ui.panel_conditional(
     "input.test_type === 'step_drawdown'",
     ui.h6("Step-Drawdown Parameters"),
     ui.input_file("sd_file", "Data file (.csv)", accept=".csv"),
+    ui.input_select(
+        "sd_method",
+        "Method",
+        choices={
+            "hantush_bierschenk": "Hantush-Bierschenk (end of each step)",
+            "eden_hazel": "Eden-Hazel (every reading)",
+        },
+        selected="hantush_bierschenk",
+    ),
+    ui.input_switch("sd_detect", "Detect step end times from the record", value=False),
     ui.output_ui("step_inputs"),  # dynamic step rows, rendered server-side
     ui.input_action_button(
         "add_step", "Add step",
@@ -55,7 +155,14 @@ _sidebar = ui.sidebar(
     ui.hr(),
     _constant_rate_inputs,
     _recovery_inputs,
+    _decimation_inputs,
     _step_drawdown_inputs,
+    _regression_inputs,
+    ui.hr(),
+    _qc_inputs,
+    ui.hr(),
+    _bootstrap_inputs,
+    _monte_carlo_inputs,
     ui.hr(),
     ui.input_action_button(
         "run", "Run Analysis",
@@ -81,7 +188,7 @@ _tabs = ui.navset_card_tab(
             ui.h4("Supported Test Types"),
             ui.tags.ul(
                 ui.tags.li(ui.tags.b("Constant-rate test — "), "Cooper-Jacob straight-line method"),
-                ui.tags.li(ui.tags.b("Recovery test — "), "Theis recovery method"),
+                ui.tags.li(ui.tags.b("Recovery test — "), "Theis, Agarwal or residual-drawdown recovery method"),
                 ui.tags.li(ui.tags.b("Step-drawdown test — "), "Hantush-Bierschenk method"),
             ),
             ui.h4("How to Use"),
@@ -89,7 +196,7 @@ _tabs = ui.navset_card_tab(
                 ui.tags.li("Select the test type from the sidebar."),
                 ui.tags.li("Enter borehole information (name and static water level are required)."),
                 ui.tags.li("Upload your CSV data file. The file must contain columns: time_min and level_m."),
-                ui.tags.li("For step-drawdown tests, define the flowrate and end time for each step."),
+                ui.tags.li("For step-drawdown tests, define the flowrate and end time for each step (or switch on end-time detection and give the flowrates only)."),
                 ui.tags.li("Click Run Analysis."),
                 ui.tags.li("Review the data preview to confirm the file loaded correctly."),
                 ui.tags.li("On the Analysis tab, adjust the fit window if needed — aim for R² > 0.95."),
@@ -139,10 +246,23 @@ _tabs = ui.navset_card_tab(
             ui.card(
                 ui.panel_conditional(
                     "input.test_type === 'constant_rate' || input.test_type === 'recovery'",
+                    ui.input_select(
+                        "fit_window",
+                        "Fit window",
+                        choices={
+                            "manual": "Manual (sliders)",
+                            "auto": "Best straight-line window",
+                            "derivative": "Radial-flow plateau of the derivative",
+                        },
+                        selected="manual",
+                    ),
                     # First fit
                     ui.p("Fit 1", class_="fw-bold mb-1 text-primary"),
-                    ui.input_slider("fit_start", "Start (index)", min=1, max=50, value=1),
-                    ui.input_slider("fit_end", "End (index)", min=2, max=100, value=20),
+                    ui.panel_conditional(
+                        "input.fit_window === 'manual'",
+                        ui.input_slider("fit_start", "Start (index)", min=1, max=50, value=1),
+                        ui.input_slider("fit_end", "End (index)", min=2, max=100, value=20),
+                    ),
                     ui.hr(),
                     # Second fit toggle + controls
                     ui.panel_conditional(
@@ -156,6 +276,25 @@ _tabs = ui.navset_card_tab(
                         ),
                     ),   
                 ),
+                ui.panel_conditional(
+                    "input.test_type === 'constant_rate'",
+                    ui.input_switch("segment", "Detect flow regimes (piecewise fit)", value=False),
+                    ui.input_switch("theis", "Theis type-curve fit", value=False),
+                    ui.input_select(
+                        "type_curve",
+                        "Type-curve fit",
+                        choices={
+                            "": "None",
+                            "hantush_jacob": "Hantush-Jacob (leaky)",
+                            "boulton": "Boulton (delayed yield)",
+                            "papadopulos_cooper": "Papadopulos-Cooper (wellbore storage)",
+                            "warren_root": "Warren-Root (dual porosity)",
+                            "moench": "Moench (dual porosity, transient)",
+                            "wellbore_storage_skin": "Wellbore storage and skin",
+                        },
+                        selected="",
+                    ),
+                ),
                 ui.output_ui("fit_quality_indicator"),
             ),
             ui.card(
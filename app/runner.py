@@ -1,11 +1,16 @@
 from dataclasses import dataclass
 from typing import Optional
-from models import Borehole, PumpingTest, ConstantRateResult, RecoveryResult, StepDrawdownResult, Step
-from in_out.csv_reader import read_constant_rate_csv, read_recovery_csv, read_step_drawdown_csv
+from models import Borehole, PumpingTest, ConstantRateResult, RecoveryResult, StepDrawdownResult, Step, DecimationMethod, TestType, FitWindowMode, StepDrawdownMethod, RecoveryMethod, BootstrapMethod, BootstrapSettings, MonteCarloSettings, ErrorDistribution, RegressionMethod, QCSettings
+from in_out.csv_reader import read_constant_rate_csv, read_recovery_csv, read_step_drawdown_csv, read_level_record
+from in_out.cache import ParsedDataCache
+from in_out.batch import LoadJob
 from analysis.constant_rate import analyse_constant_rate
 from analysis.recovery import analyse_recovery
 from analysis.step_drawdown import analyse_step_drawdown
-from config.schema import BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepDrawdownConfig
+from analysis.step_detection import detect_step_ends, steps_from_end_times
+from analysis.decimation import decimate_log
+from analysis.quality import apply_quality_control
+from config.schema import BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepDrawdownConfig, DecimationConfig, BootstrapConfig, MonteCarloConfig, QCConfig, BoreholeCampaignConfig
 
 
 @dataclass
@@ -23,6 +28,80 @@ class StepDrawdownSession:
     test: PumpingTest
     result: StepDrawdownResult
 
+def apply_decimation(test: PumpingTest, decimation: Optional[DecimationConfig]) -> PumpingTest:
+    """ Resample the test onto log-time bins when the config asks for it. """
+    if decimation is None:
+        return test
+    return decimate_log(test, decimation.bins_per_log_cycle, DecimationMethod(decimation.method))
+
+def _apply_quality_control(test: PumpingTest, settings: Optional[QCSettings]) -> PumpingTest:
+    """ Drop the readings rejected by the quality-control checks when the config asks for them. """
+    if settings is None:
+        return test
+    return apply_quality_control(test, settings)
+
+def quality_control_settings(qc: Optional[QCConfig], borehole_config: BoreholeConfig) -> Optional[QCSettings]:
+    """ Quality-control checks of a test section, with the borehole's pump depth, or None when off. """
+    if qc is None:
+        return None
+    return QCSettings(
+        spike_window=qc.spike_window,
+        spike_threshold=qc.spike_threshold,
+        spike_min_m=qc.spike_min_m,
+        flatline_readings=qc.flatline_readings,
+        flatline_min=qc.flatline_min,
+        gap_factor=qc.gap_factor,
+        min_gap_min=qc.min_gap_min,
+        pump_depth_mbd=borehole_config.pump_depth_mbd,
+    )
+
+def bootstrap_settings(bootstrap: Optional[BootstrapConfig]) -> Optional[BootstrapSettings]:
+    """ Bootstrap request of a test section, or None when no intervals are wanted. """
+    if bootstrap is None:
+        return None
+    return BootstrapSettings(
+        n_replicates=bootstrap.replicates,
+        method=BootstrapMethod(bootstrap.method),
+        confidence=bootstrap.confidence,
+        seed=bootstrap.seed,
+        workers=bootstrap.workers,
+    )
+
+def monte_carlo_settings(monte_carlo: Optional[MonteCarloConfig]) -> Optional[MonteCarloSettings]:
+    """ Field-input errors of a test section, or None when the inputs are taken as exact. """
+    if monte_carlo is None:
+        return None
+    return MonteCarloSettings(
+        n_samples=monte_carlo.samples,
+        flowrate_pct=monte_carlo.flowrate_pct,
+        static_level_m=monte_carlo.static_level_m,
+        end_of_pumping_min=monte_carlo.end_of_pumping_min,
+        step_time_min=monte_carlo.step_time_min,
+        distribution=ErrorDistribution(monte_carlo.distribution),
+        confidence=monte_carlo.confidence,
+        seed=monte_carlo.seed,
+    )
+
+def borehole_radius_m(borehole_config: BoreholeConfig) -> Optional[float]:
+    """ Casing radius in metres, when the diameter is given (storativity estimate and curve fits). """
+    if not borehole_config.diameter_mm:
+        return None
+    return borehole_config.diameter_mm / 2000.0
+
+def step_definitions(sd_config: StepDrawdownConfig, cache: Optional[ParsedDataCache] = None) -> list[Step]:
+    """
+    Steps of a step-drawdown config. When the end times are left out, they are
+    detected from the level record, one per configured flowrate.
+    """
+    if all(s.end_time_min is not None for s in sd_config.steps_raw):
+        return [
+            Step(step_number=i, flowrate_m3h=s.flowrate_m3h, end_time_min=s.end_time_min)
+            for i, s in enumerate(sd_config.steps_raw, start=1)
+        ]
+    time, level = read_level_record(sd_config.csv_file, cache=cache)
+    flowrates = [s.flowrate_m3h for s in sd_config.steps_raw]
+    return steps_from_end_times(flowrates, detect_step_ends(time, level, n_steps=len(flowrates)))
+
 def run_constant_rate(
     borehole_config: BoreholeConfig,
     cr_config: ConstantRateConfig,
@@ -30,10 +109,13 @@ def run_constant_rate(
     fit_end: Optional[int] = None,
     fit2_start: Optional[int] = None,
     fit2_end: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+    test: Optional[PumpingTest] = None,
 ) -> ConstantRateSession:
     """
     Shared orchestration for constant-rate analysis.
     Used by both the CLI and the Shiny app.
+    A test already loaded (e.g. by in_out.batch.load_tests) skips reading the CSV.
     Raises ValueError on invalid input or analysis failure — caller handles presentation.
     """
     borehole = Borehole.minimal(
@@ -43,17 +125,29 @@ def run_constant_rate(
     resolved_fit_start = fit_start if fit_start is not None else cr_config.fit_start_idx
     resolved_fit_end = fit_end if fit_end is not None else cr_config.fit_end_idx
 
-    test = read_constant_rate_csv(
-        path=cr_config.csv_file,
-        borehole=borehole,
-        flowrate_m3h=cr_config.flowrate_m3h,
-    )
+    if test is None:
+        test = read_constant_rate_csv(
+            path=cr_config.csv_file,
+            borehole=borehole,
+            flowrate_m3h=cr_config.flowrate_m3h,
+            cache=cache,
+        )
+    test = _apply_quality_control(test, quality_control_settings(cr_config.qc, borehole_config))
+    test = apply_decimation(test, cr_config.decimation)
     result = analyse_constant_rate(
         test,
         fit_start_idx=resolved_fit_start,
         fit_end_idx=resolved_fit_end,
         fit2_start_idx=fit2_start,
         fit2_end_idx=fit2_end,
+        window_mode=FitWindowMode(cr_config.fit_window),
+        radius_m=borehole_radius_m(borehole_config),
+        max_segments=cr_config.max_segments,
+        theis=cr_config.theis,
+        type_curve=cr_config.type_curve,
+        regression_method=RegressionMethod(cr_config.regression),
+        bootstrap=bootstrap_settings(cr_config.bootstrap),
+        monte_carlo=monte_carlo_settings(cr_config.monte_carlo),
     )
     return ConstantRateSession(test=test, result=result)
 
@@ -63,10 +157,13 @@ def run_recovery(
     r_config: RecoveryConfig,
     fit_start: Optional[int] = None,
     fit_end: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+    test: Optional[PumpingTest] = None,
 ) -> RecoverySession:
     """
     Shared orchestration for recovery analysis.
     Used by both the CLI and the Shiny app.
+    A test already loaded (e.g. by in_out.batch.load_tests) skips reading the CSV.
     Raises ValueError on invalid input or analysis failure — caller handles presentation.
     """
     borehole = Borehole.minimal(
@@ -76,16 +173,25 @@ def run_recovery(
     resolved_fit_start = fit_start if fit_start is not None else r_config.fit_start_idx
     resolved_fit_end = fit_end if fit_end is not None else r_config.fit_end_idx
 
-    test = read_recovery_csv(
-        path=r_config.csv_file,
-        borehole=borehole,
-        flowrate_m3h=r_config.flowrate_m3h,
-        end_of_pumping_min=r_config.end_of_pumping_min
-    )
+    if test is None:
+        test = read_recovery_csv(
+            path=r_config.csv_file,
+            borehole=borehole,
+            flowrate_m3h=r_config.flowrate_m3h,
+            end_of_pumping_min=r_config.end_of_pumping_min,
+            cache=cache,
+        )
+    test = _apply_quality_control(test, quality_control_settings(r_config.qc, borehole_config))
+    test = apply_decimation(test, r_config.decimation)
     result = analyse_recovery(
         test,
         fit_start_idx=resolved_fit_start,
         fit_end_idx=resolved_fit_end,
+        window_mode=FitWindowMode(r_config.fit_window),
+        method=RecoveryMethod(r_config.method),
+        regression_method=RegressionMethod(r_config.regression),
+        bootstrap=bootstrap_settings(r_config.bootstrap),
+        monte_carlo=monte_carlo_settings(r_config.monte_carlo),
     )
     return RecoverySession(test=test, result=result)
 
@@ -93,27 +199,70 @@ def run_recovery(
 def run_step_drawdown(
     borehole_config: BoreholeConfig,
     sd_config: StepDrawdownConfig,
+    cache: Optional[ParsedDataCache] = None,
+    test: Optional[PumpingTest] = None,
 ) -> StepDrawdownSession:
     """
     Shared orchestration for step-drawdown analysis.
     Used by both the CLI and the Shiny app.
+    A test already loaded (e.g. by in_out.batch.load_tests) skips reading the CSV.
     Raises ValueError on invalid input or analysis failure — caller handles presentation.
     """
     borehole = Borehole.minimal(
         name=borehole_config.name,
         static_level_mbd=borehole_config.static_level_mbd
     )
-    steps = [
-        Step(step_number=i, flowrate_m3h=s.flowrate_m3h, end_time_min=s.end_time_min)
-        for i, s in enumerate(sd_config.steps_raw, start=1)
-    ]
-
-    test = read_step_drawdown_csv(
-        path=sd_config.csv_file,
-        borehole=borehole,
-        steps=steps
-    )
+    if test is None:
+        test = read_step_drawdown_csv(
+            path=sd_config.csv_file,
+            borehole=borehole,
+            steps=step_definitions(sd_config, cache),
+            cache=cache,
+        )
+    test = _apply_quality_control(test, quality_control_settings(sd_config.qc, borehole_config))
     result = analyse_step_drawdown(
-        test
+        test,
+        method=StepDrawdownMethod(sd_config.method),
+        regression_method=RegressionMethod(sd_config.regression),
+        bootstrap=bootstrap_settings(sd_config.bootstrap),
+        monte_carlo=monte_carlo_settings(sd_config.monte_carlo),
+    )
+    return StepDrawdownSession(test=test, result=result)
+
+def campaign_jobs(config: BoreholeCampaignConfig, cache: Optional[ParsedDataCache] = None) -> list[LoadJob]:
+    """
+    Load jobs for every test configured in a campaign, in the order
+    constant-rate, recovery, step-drawdown, for use with in_out.batch.load_tests.
+    Step end times left out of the config are detected here, which reads that
+    data file once up front (through the cache, if given).
+    Raises ValueError if they cannot be detected.
+    """
+    borehole = Borehole.minimal(
+        name=config.borehole.name,
+        static_level_mbd=config.borehole.static_level_mbd
     )
-    return StepDrawdownSession(test=test, result=result)
\ No newline at end of file
+    common = {"borehole": borehole, "test_date": config.test_date, "operator": config.operator}
+    jobs = []
+    if config.constant_rate:
+        jobs.append(LoadJob(
+            path=config.constant_rate.csv_file,
+            test_type=TestType.CONSTANT_RATE,
+            flowrate_m3h=config.constant_rate.flowrate_m3h,
+            **common,
+        ))
+    if config.recovery:
+        jobs.append(LoadJob(
+            path=config.recovery.csv_file,
+            test_type=TestType.RECOVERY,
+            flowrate_m3h=config.recovery.flowrate_m3h,
+            end_of_pumping_min=config.recovery.end_of_pumping_min,
+            **common,
+        ))
+    if config.step_drawdown:
+        jobs.append(LoadJob(
+            path=config.step_drawdown.csv_file,
+            test_type=TestType.STEP_DRAWDOWN,
+            steps=step_definitions(config.step_drawdown, cache),
+            **common,
+        ))
+    return jobs
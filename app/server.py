@@ -9,13 +9,19 @@ from runner import (
     run_constant_rate, run_recovery, run_step_drawdown,
     ConstantRateSession, RecoverySession, StepDrawdownSession,
 )
-from config.schema import BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepDrawdownConfig, StepConfig
+from config.schema import BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepDrawdownConfig, StepConfig, DecimationConfig, BootstrapConfig, MonteCarloConfig, QCConfig
 from plotting.constant_rate import plot_constant_preview, plot_constant_semilog
 from plotting.recovery import plot_recovery_preview, plot_recovery_semilog
-from plotting.step_drawdown import plot_step_preview, plot_specific_drawdown, plot_losses_vs_q
-from analysis.interpretation import interpret_constant_rate, interpret_recovery, interpret_step_drawdown
+from plotting.step_drawdown import plot_step_preview, plot_specific_drawdown, plot_losses_vs_q, plot_superposition_fit
+from plotting.type_curves import plot_type_curve_match
+from plotting.diagnostics import plot_derivative_diagnostic
+from analysis.interpretation import interpret_constant_rate, interpret_recovery, interpret_step_drawdown, interpret_quality
 from in_out.report import generate_report
+from in_out.cache import default_cache
+from analysis.segmentation import DEFAULT_MAX_SEGMENTS
 
+# Parsed uploads are cached by content, so re-running on the same file skips parsing
+data_cache = default_cache()
 
 def server(input, output, session):
 
@@ -35,6 +41,8 @@ def server(input, output, session):
         borehole_cfg = BoreholeConfig(
             name=input.borehole_name() or "BH",
             static_level_mbd=input.static_level(),
+            diameter_mm=input.diameter(),
+            pump_depth_mbd=input.pump_depth() or None,
         )
 
         if test_type == "constant_rate":
@@ -44,6 +52,15 @@ def server(input, output, session):
             cr_cfg = ConstantRateConfig(
                 csv_file=Path(f[0]["datapath"]),
                 flowrate_m3h=input.cr_flowrate(),
+                fit_window=_fit_window_input(input),
+                max_segments=DEFAULT_MAX_SEGMENTS if input.segment() else None,
+                theis=input.theis(),
+                type_curve=input.type_curve() or None,
+                regression=input.regression(),
+                qc=_qc_input(input),
+                decimation=_decimation_input(input),
+                bootstrap=_bootstrap_input(input),
+                monte_carlo=_monte_carlo_input(input),
             )
             # Read second fit inputs only if the toggle is on
             fit2_start = input.fit2_start() if input.use_fit2() else None
@@ -53,6 +70,7 @@ def server(input, output, session):
                 borehole_cfg, cr_cfg,
                 input.fit_start(), input.fit_end(),
                 fit2_start, fit2_end,
+                cache=data_cache,
             )
             # f: list[FileInfo] = input.cr_file()
             # if not f:
@@ -71,8 +89,15 @@ def server(input, output, session):
                 csv_file=Path(f[0]["datapath"]),
                 flowrate_m3h=input.r_flowrate(),
                 end_of_pumping_min=input.r_end_of_pumping(),
+                fit_window=_fit_window_input(input),
+                qc=_qc_input(input),
+                decimation=_decimation_input(input),
+                method=input.r_method(),
+                regression=input.regression(),
+                bootstrap=_bootstrap_input(input),
+                monte_carlo=_monte_carlo_input(input),
             )
-            return run_recovery(borehole_cfg, r_cfg, input.fit_start(), input.fit_end())
+            return run_recovery(borehole_cfg, r_cfg, input.fit_start(), input.fit_end(), cache=data_cache)
 
         elif test_type == "step_drawdown":
             f: list[FileInfo] = input.sd_file()
@@ -82,8 +107,13 @@ def server(input, output, session):
             sd_cfg = StepDrawdownConfig(
                 csv_file=Path(f[0]["datapath"]),
                 steps_raw=steps,
+                method=input.sd_method(),
+                regression=input.regression(),
+                qc=_qc_input(input),
+                bootstrap=_bootstrap_input(input),
+                monte_carlo=_monte_carlo_input(input),
             )
-            return run_step_drawdown(borehole_cfg, sd_cfg)
+            return run_step_drawdown(borehole_cfg, sd_cfg, cache=data_cache)
 
     # ----------------------------
     # Dynamic UI
@@ -122,13 +152,26 @@ def server(input, output, session):
                 class_="mb-2"
             )
 
+        def _candidates(result) -> list[ui.Tag]:
+            """ Ranked automatic windows, the first of which was used for the fit. """
+            if not result.window_candidates:
+                return []
+            rows = [
+                ui.tags.li(
+                    f"{c.start_idx}–{c.end_idx}: R² = {c.r_squared:.3f}, "
+                    f"T = {c.transmissivity_m2day:.2f} m²/day, {c.log_cycles:.2f} log cycles"
+                )
+                for c in result.window_candidates
+            ]
+            return [ui.p("Automatic windows (best first)", class_="fw-bold mb-1"), ui.tags.ol(*rows, class_="small")]
+
         if isinstance(s, ConstantRateSession):
             children = [_badge(s.result.fit.r_squared, "Fit 1")]
             if s.result.fit2 is not None:
                 children.append(_badge(s.result.fit2.r_squared, "Fit 2"))
-            return ui.div(*children)
+            return ui.div(*children, *_candidates(s.result))
         elif isinstance(s, RecoverySession):
-            return _badge(s.result.fit.r_squared, "Fit")
+            return ui.div(_badge(s.result.fit.r_squared, "Fit"), *_candidates(s.result))
         else:
             return _badge(s.result.r_squared, "Fit")
 
@@ -163,6 +206,8 @@ def server(input, output, session):
             "Time, t [min]": s.test.time_series,
             "Water Level, WL [mbd]": s.test.level_series,
         })
+        if s.test.measurements.point_counts is not None:
+            df["Readings per bin"] = s.test.measurements.point_counts
         table = gt.GT(data=df)
         return table
 
@@ -173,13 +218,25 @@ def server(input, output, session):
         except Exception as e:
             return ui.p(f"Error: {e}", class_="text-danger")
 
+        extra = []  # shown below the main plot
         if isinstance(s, ConstantRateSession):
             fig = plot_constant_semilog(s.test, s.result, title=f"Cooper-Jacob — {s.test.borehole.name}")
+            if s.result.type_curve is not None:
+                extra.append(plot_type_curve_match(s.test, s.result, title=f"Type-curve match — {s.test.borehole.name}"))
         elif isinstance(s, RecoverySession):
             fig = plot_recovery_semilog(s.test, s.result, title=f"Theis Recovery — {s.test.borehole.name}")
         else:
             fig = plot_specific_drawdown(s.test, s.result, title=f"Hantush-Bierschenk — {s.test.borehole.name}")
-
+            if s.result.superposition is not None:
+                extra.append(plot_superposition_fit(s.test, s.result, title=f"Eden-Hazel fit — {s.test.borehole.name}"))
+        if isinstance(s, (ConstantRateSession, RecoverySession)) and s.result.derivative is not None:
+            extra.append(plot_derivative_diagnostic(s.test, s.result.derivative, title=f"Derivative diagnostic — {s.test.borehole.name}"))
+
+        if extra:
+            return ui.TagList(
+                ui.HTML(fig.to_html(full_html=False, include_plotlyjs="cdn")),
+                *(ui.HTML(f.to_html(full_html=False, include_plotlyjs=False)) for f in extra),
+            )
         return ui.HTML(fig.to_html(full_html=False, include_plotlyjs="cdn"))
     
     @render.ui
@@ -274,6 +331,10 @@ def server(input, output, session):
                       r.critical_yield_m3h * 0.8,
                       r.r_squared]
             units = ["m/(m³/h)", "m/(m³/h)^2", "m³/h", "m³/h", ""]
+            if r.superposition is not None:
+                params.append("Transmissivity (Eden-Hazel)")
+                values.append(r.superposition.transmissivity_m2day)
+                units.append("m²/day")
             data = {"Parameter": params, "Value": values, "Units": units}
             df = pd.DataFrame(data) 
             table = (
@@ -316,6 +377,8 @@ def server(input, output, session):
             text = interpret_recovery(s.result, name)
         else:
             text = interpret_step_drawdown(s.result, name)
+        if s.test.qc is not None:
+            text = interpret_quality(s.test.qc) + "\n\n" + text
         
         return ui.div(
             ui.h5("Interpretation"),
@@ -350,12 +413,53 @@ def server(input, output, session):
     # Private helpers
     # ----------------------------
 
+    def _fit_window_input(input) -> str:
+        return input.fit_window()
+
+    def _decimation_input(input) -> Optional[DecimationConfig]:
+        if not input.decimate():
+            return None
+        return DecimationConfig(
+            bins_per_log_cycle=int(input.bins_per_log_cycle()),
+            method=input.decimation_method(),
+        )
+
+    def _qc_input(input) -> Optional[QCConfig]:
+        if not input.qc():
+            return None
+        return QCConfig(
+            spike_threshold=input.qc_spike_threshold() or None,
+            spike_min_m=input.qc_spike_min_m() or 0.0,
+            flatline_min=input.qc_flatline_min() or 0.0,
+        )
+
+    def _bootstrap_input(input) -> Optional[BootstrapConfig]:
+        if not input.bootstrap():
+            return None
+        return BootstrapConfig(
+            replicates=int(input.bootstrap_replicates()),
+            method=input.bootstrap_method(),
+        )
+
+    def _monte_carlo_input(input) -> Optional[MonteCarloConfig]:
+        if not input.monte_carlo():
+            return None
+        test_type = input.test_type()
+        return MonteCarloConfig(
+            samples=int(input.mc_samples()),
+            flowrate_pct=input.mc_flowrate_pct() or 0.0,
+            static_level_m=input.mc_static_level_m() or 0.0,
+            end_of_pumping_min=(input.mc_end_of_pumping_min() or 0.0) if test_type == "recovery" else 0.0,
+            step_time_min=(input.mc_step_time_min() or 0.0) if test_type == "step_drawdown" else 0.0,
+            distribution=input.mc_distribution(),
+        )
+
     def _parse_step_inputs(input) -> list[StepConfig]:
         n = input.add_step() + 3
         steps = []
         for i in range(1, n + 1):
             steps.append(StepConfig(
                 flowrate_m3h=input[f"sd_flow_{i}"](),
-                end_time_min=input[f"sd_end_{i}"](),
+                end_time_min=None if input.sd_detect() else input[f"sd_end_{i}"](),
             ))
         return steps
\ No newline at end of file
@@ -4,22 +4,55 @@ from typing import Annotated, Optional
 from rich.console import Console
 from rich.table import Table
 
-from in_out.csv_reader import read_constant_rate_csv, read_recovery_csv, read_step_drawdown_csv
+from in_out.csv_reader import read_constant_rate_csv, read_recovery_csv, read_step_drawdown_csv, read_level_record, split_pumping_and_recovery
+from in_out.cache import ParsedDataCache
+from analysis.type_curves import TYPE_CURVE_FAMILIES, default_atlas, tabulated_family_names
+from in_out.batch import load_tests, LoadError
 from analysis.constant_rate import analyse_constant_rate
 from analysis.recovery import analyse_recovery
 from analysis.step_drawdown import analyse_step_drawdown
-from models import Borehole, Step, ConstantRateResult, RecoveryResult, StepDrawdownResult
+from analysis.step_detection import detect_step_ends, detect_pump_stop, DEFAULT_MIN_JUMP_FRACTION, DEFAULT_MIN_STEP_FRACTION
+from analysis.quality import apply_quality_control
+from models import Borehole, Step, PumpingTest, MeasurementTable, TestType, ConstantRateResult, RecoveryResult, StepDrawdownResult, DecimationMethod, FitWindowMode, FitWindowCandidate, SemilogSegmentation, DerivativeDiagnostic, StepDrawdownMethod, RecoveryMethod, BootstrapMethod, BootstrapIntervals, ConfidenceInterval, MonteCarloResult, RegressionMethod, QCResult, QCCheck
 
 from config.loader import load_config_file
 from config.validator import validate_config
-from config.schema import BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepDrawdownConfig, StepConfig
+from config.schema import BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepDrawdownConfig, StepConfig, DecimationConfig, BootstrapConfig, MonteCarloConfig, QCConfig, BoreholeCampaignConfig
+from app.runner import campaign_jobs, apply_decimation, borehole_radius_m, step_definitions, bootstrap_settings, monte_carlo_settings, quality_control_settings
 
 import plotly.graph_objects as go
-from plotting.step_drawdown import plot_step_preview, plot_specific_drawdown, plot_losses_vs_q
+from plotting.step_drawdown import plot_step_preview, plot_specific_drawdown, plot_losses_vs_q, plot_superposition_fit
 from plotting.constant_rate import plot_constant_preview, plot_constant_semilog
 from plotting.recovery import plot_recovery_preview, plot_recovery_semilog
+from plotting.type_curves import plot_type_curve_match
+from plotting.diagnostics import plot_derivative_diagnostic
 
 HOURS_PER_DAY = 24.0
+RECOVERY_METHOD_LABELS = {
+    RecoveryMethod.THEIS: "Theis (t/t')",
+    RecoveryMethod.AGARWAL: "Agarwal (equivalent time)",
+    RecoveryMethod.RESIDUAL: "Residual drawdown (t')",
+}
+QC_CHECK_LABELS = {
+    QCCheck.SPIKE: "Spikes",
+    QCCheck.FLATLINE: "Flat-lined sensor",
+    QCCheck.BELOW_PUMP: "Below pump intake",
+}
+REGRESSION_METHOD_LABELS = {
+    RegressionMethod.LEAST_SQUARES: "Least squares",
+    RegressionMethod.THEIL_SEN: "Theil-Sen",
+    RegressionMethod.HUBER: "Huber",
+}
+COOPER_JACOB_INTERVAL_ROWS = [   # (result field, label, format, units) of the interval rows
+    ("transmissivity_m2day", "Transmissivity", ".2f", "m²/day"),
+    ("estimated_yield_m3day", "Estimated Yield", ".2f", "m³/day"),
+]
+STEP_DRAWDOWN_INTERVAL_ROWS = [
+    ("aquifer_loss_coeff", "B", ".4f", "m/(m³/h)"),
+    ("well_loss_coeff", "C", ".4f", "m/(m³/h)^2"),
+    ("critical_yield_m3h", "Critical Yield", ".2f", "m³/h"),
+    ("transmissivity_m2day", "Transmissivity (Eden-Hazel)", ".2f", "m²/day"),
+]
 SAFE_YIELD_FRACTION = 0.8  # Conservative operating threshold: ICRC (2011) recommends
                             # operating below Q_crit to limit well losses
 
@@ -38,14 +71,38 @@ def constant_rate(
     borehole_name: Annotated[str, typer.Option(help="Borehole identifier.")] = "BH",
     fit_start: Annotated[int, typer.Option(help="Index of first point to include in fit.")] = None,
     fit_end: Annotated[Optional[int], typer.Option(help="Index of last point (exclusive).")] = None,
+    bins_per_log_cycle: Annotated[Optional[int], typer.Option(help="Resample the data onto this many bins per log cycle of time before fitting.")] = None,
+    decimation: Annotated[DecimationMethod, typer.Option(help="How readings in a log-time bin are combined.")] = DecimationMethod.MEDIAN,
+    fit_window: Annotated[FitWindowMode, typer.Option(help="'auto' searches for the best straight-line window, checking u < 0.05; 'derivative' uses the longest radial-flow plateau of the drawdown derivative.")] = FitWindowMode.MANUAL,
+    diameter: Annotated[Optional[float], typer.Option(help="Casing diameter [mm], used to estimate storativity with --fit-window auto.")] = None,
+    qc: Annotated[bool, typer.Option(help="Check the record for spikes, flat lines, gaps and levels below the pump, and leave rejected readings out.")] = False,
+    pump_depth: Annotated[Optional[float], typer.Option(help="Pump intake depth [mbd]; with --qc, levels below it are rejected.")] = None,
+    segments: Annotated[Optional[int], typer.Option(help="Split the semi-log curve into up to this many straight-line segments (flow regimes).")] = None,
+    theis: Annotated[bool, typer.Option(help="Also fit the Theis type curve to all readings (needs --diameter).")] = False,
+    type_curve: Annotated[Optional[str], typer.Option(help=f"Also fit a type-curve family to all readings (needs --diameter): {', '.join(TYPE_CURVE_FAMILIES)}.")] = None,
+    regression: Annotated[RegressionMethod, typer.Option(help="Line estimator: 'theil_sen' or 'huber' resist logger spikes (and weight them down in the automatic searches).")] = RegressionMethod.LEAST_SQUARES,
+    bootstrap: Annotated[Optional[int], typer.Option(help="Bootstrap this many replicates for confidence intervals on the results.")] = None,
+    bootstrap_method: Annotated[BootstrapMethod, typer.Option(help="'residual' resamples the fit residuals; 'pairs' resamples whole readings.")] = BootstrapMethod.RESIDUAL,
+    monte_carlo: Annotated[Optional[int], typer.Option(help="Propagate the field-input errors below through the analysis with this many Monte Carlo samples.")] = None,
+    flowrate_error: Annotated[float, typer.Option(help="Flowrate measurement error [% of the rate], one standard deviation.")] = 0.0,
+    static_level_error: Annotated[float, typer.Option(help="Static level measurement error [m], one standard deviation.")] = 0.0,
 ):
     """ Analyse a constant-rate pumping test using the Cooper-Jacob method. """
-    borehole_cfg = BoreholeConfig(name=borehole_name, static_level_mbd=static_level)
+    borehole_cfg = BoreholeConfig(name=borehole_name, static_level_mbd=static_level, diameter_mm=diameter, pump_depth_mbd=pump_depth)
     cr_cfg = ConstantRateConfig(
         csv_file=csv_file,
         flowrate_m3h=flowrate,
         fit_start_idx=fit_start,
         fit_end_idx=fit_end,
+        fit_window=fit_window.value,
+        max_segments=segments,
+        theis=theis,
+        type_curve=type_curve,
+        regression=regression.value,
+        qc=QCConfig() if qc else None,
+        decimation=_decimation_config(bins_per_log_cycle, decimation),
+        bootstrap=_bootstrap_config(bootstrap, bootstrap_method),
+        monte_carlo=_monte_carlo_config(monte_carlo, flowrate_error, static_level_error),
     )
     _run_constant_rate(borehole_cfg, cr_cfg)
 
@@ -58,41 +115,151 @@ def recovery(
     borehole_name: Annotated[str, typer.Option(help="Borehole identifier.")] = "BH",
     fit_start: Annotated[int, typer.Option(help="Index of first point to include in fit.")] = None,
     fit_end: Annotated[Optional[int], typer.Option(help="Index of last point (exclusive).")] = None,
+    bins_per_log_cycle: Annotated[Optional[int], typer.Option(help="Resample the data onto this many bins per log cycle of time before fitting.")] = None,
+    decimation: Annotated[DecimationMethod, typer.Option(help="How readings in a log-time bin are combined.")] = DecimationMethod.MEDIAN,
+    fit_window: Annotated[FitWindowMode, typer.Option(help="'auto' searches for the best straight-line window; 'derivative' uses the longest radial-flow plateau of the recovery derivative.")] = FitWindowMode.MANUAL,
+    qc: Annotated[bool, typer.Option(help="Check the record for spikes, flat lines, gaps and levels below the pump, and leave rejected readings out.")] = False,
+    pump_depth: Annotated[Optional[float], typer.Option(help="Pump intake depth [mbd]; with --qc, levels below it are rejected.")] = None,
+    method: Annotated[RecoveryMethod, typer.Option(help="Recovery plot to fit: 'theis' (t/t'), 'agarwal' (equivalent time, for short or varying pumping) or 'residual' (s' against t').")] = RecoveryMethod.THEIS,
+    regression: Annotated[RegressionMethod, typer.Option(help="Line estimator: 'theil_sen' or 'huber' resist logger spikes (and weight them down in the automatic searches).")] = RegressionMethod.LEAST_SQUARES,
+    bootstrap: Annotated[Optional[int], typer.Option(help="Bootstrap this many replicates for confidence intervals on the results.")] = None,
+    bootstrap_method: Annotated[BootstrapMethod, typer.Option(help="'residual' resamples the fit residuals; 'pairs' resamples whole readings.")] = BootstrapMethod.RESIDUAL,
+    monte_carlo: Annotated[Optional[int], typer.Option(help="Propagate the field-input errors below through the analysis with this many Monte Carlo samples.")] = None,
+    flowrate_error: Annotated[float, typer.Option(help="Flowrate measurement error [% of the rate], one standard deviation.")] = 0.0,
+    static_level_error: Annotated[float, typer.Option(help="Static level measurement error [m], one standard deviation.")] = 0.0,
+    end_of_pumping_error: Annotated[float, typer.Option(help="End-of-pumping time error [min], one standard deviation.")] = 0.0,
 ):
-    """Analyse a recovery test using the Theis recovery method."""
-    borehole_cfg = BoreholeConfig(name=borehole_name, static_level_mbd=static_level)
+    """Analyse a recovery test using the Theis, Agarwal or residual-drawdown recovery method."""
+    borehole_cfg = BoreholeConfig(name=borehole_name, static_level_mbd=static_level, pump_depth_mbd=pump_depth)
     r_cfg = RecoveryConfig(
         csv_file=csv_file,
         flowrate_m3h=flowrate,
         end_of_pumping_min=end_of_pumping,
         fit_start_idx=fit_start,
         fit_end_idx=fit_end,
+        fit_window=fit_window.value,
+        qc=QCConfig() if qc else None,
+        decimation=_decimation_config(bins_per_log_cycle, decimation),
+        method=method.value,
+        regression=regression.value,
+        bootstrap=_bootstrap_config(bootstrap, bootstrap_method),
+        monte_carlo=_monte_carlo_config(
+            monte_carlo, flowrate_error, static_level_error, end_of_pumping_min=end_of_pumping_error
+        ),
     )
     _run_recovery(borehole_cfg, r_cfg)
 
+@app.command()
+def pumping_and_recovery(
+    csv_file: Annotated[Path, typer.Argument(help="Path to a CSV logger file holding the pumping phase followed by the recovery.")],
+    static_level: Annotated[float, typer.Option(help="Static water level [mbd].")],
+    flowrate: Annotated[float, typer.Option(help="Average pumping flowrate [m³/h].")],
+    end_of_pumping: Annotated[Optional[float], typer.Option(help="Elapsed time at which pumping stopped [min]. Detected from the level record if omitted.")] = None,
+    borehole_name: Annotated[str, typer.Option(help="Borehole identifier.")] = "BH",
+    bins_per_log_cycle: Annotated[Optional[int], typer.Option(help="Resample the data onto this many bins per log cycle of time before fitting.")] = None,
+    decimation: Annotated[DecimationMethod, typer.Option(help="How readings in a log-time bin are combined.")] = DecimationMethod.MEDIAN,
+    fit_window: Annotated[FitWindowMode, typer.Option(help="How the fit window of both analyses is chosen; 'manual' fits every reading after the first.")] = FitWindowMode.MANUAL,
+    qc: Annotated[bool, typer.Option(help="Check the record for spikes, flat lines, gaps and levels below the pump, and leave rejected readings out.")] = False,
+    pump_depth: Annotated[Optional[float], typer.Option(help="Pump intake depth [mbd]; with --qc, levels below it are rejected.")] = None,
+    recovery_method: Annotated[RecoveryMethod, typer.Option(help="Recovery plot to fit: 'theis', 'agarwal' or 'residual'.")] = RecoveryMethod.THEIS,
+    regression: Annotated[RegressionMethod, typer.Option(help="Line estimator of both analyses: 'theil_sen' or 'huber' resist logger spikes.")] = RegressionMethod.LEAST_SQUARES,
+    bootstrap: Annotated[Optional[int], typer.Option(help="Bootstrap this many replicates for confidence intervals on the results.")] = None,
+    bootstrap_method: Annotated[BootstrapMethod, typer.Option(help="'residual' resamples the fit residuals; 'pairs' resamples whole readings.")] = BootstrapMethod.RESIDUAL,
+    monte_carlo: Annotated[Optional[int], typer.Option(help="Propagate the field-input errors below through the analysis with this many Monte Carlo samples.")] = None,
+    flowrate_error: Annotated[float, typer.Option(help="Flowrate measurement error [% of the rate], one standard deviation.")] = 0.0,
+    static_level_error: Annotated[float, typer.Option(help="Static level measurement error [m], one standard deviation.")] = 0.0,
+    end_of_pumping_error: Annotated[float, typer.Option(help="End-of-pumping time error [min], one standard deviation (recovery).")] = 0.0,
+):
+    """Analyse a constant-rate test and its recovery from a single logger file."""
+    borehole_cfg = BoreholeConfig(name=borehole_name, static_level_mbd=static_level, pump_depth_mbd=pump_depth)
+    borehole = Borehole.minimal(name=borehole_name, static_level_mbd=static_level)
+    try:
+        time, level = read_level_record(csv_file)
+        if end_of_pumping is None:
+            first_recovery = detect_pump_stop(time, level)
+            if first_recovery is None:
+                raise ValueError(
+                    f"No pump stop found in '{csv_file}': the water level does not recover. "
+                    "Give --end-of-pumping explicitly."
+                )
+            end_of_pumping = float(time[first_recovery - 1])
+        pumping_test, recovery_test = split_pumping_and_recovery(
+            MeasurementTable(time_min=time, level_mbd=level),
+            borehole=borehole,
+            flowrate_m3h=flowrate,
+            end_of_pumping_min=end_of_pumping,
+        )
+    except ValueError as e:
+        typer.echo(f"Error (pumping_and_recovery): {e}", err=True)
+        raise typer.Exit(code=1)
+
+    console.print(
+        f"Pumping stopped at {recovery_test.end_of_pumping_min:g} min "
+        f"({len(pumping_test.measurements)} pumping, {len(recovery_test.measurements)} recovery readings)."
+    )
+    decimation_cfg = _decimation_config(bins_per_log_cycle, decimation)
+    bootstrap_cfg = _bootstrap_config(bootstrap, bootstrap_method)
+    qc_cfg = QCConfig() if qc else None
+    cr_cfg = ConstantRateConfig(
+        csv_file=csv_file,
+        flowrate_m3h=flowrate,
+        fit_window=fit_window.value,
+        regression=regression.value,
+        qc=qc_cfg,
+        decimation=decimation_cfg,
+        bootstrap=bootstrap_cfg,
+        monte_carlo=_monte_carlo_config(monte_carlo, flowrate_error, static_level_error),
+    )
+    r_cfg = RecoveryConfig(
+        csv_file=csv_file,
+        flowrate_m3h=flowrate,
+        end_of_pumping_min=recovery_test.end_of_pumping_min,
+        fit_window=fit_window.value,
+        qc=qc_cfg,
+        decimation=decimation_cfg,
+        method=recovery_method.value,
+        regression=regression.value,
+        bootstrap=bootstrap_cfg,
+        monte_carlo=_monte_carlo_config(
+            monte_carlo, flowrate_error, static_level_error, end_of_pumping_min=end_of_pumping_error
+        ),
+    )
+    _run_constant_rate(borehole_cfg, cr_cfg, test=pumping_test)
+    _run_recovery(borehole_cfg, r_cfg, test=recovery_test)
+
 @app.command()
 def step_drawdown(
     csv_file: Annotated[Path, typer.Argument(help="Path to the CSV data file.")],
     static_level: Annotated[float, typer.Option(help="Static water level [mbd].")],
-    steps_raw: Annotated[list[str], typer.Option("--step", help="Step as 'flowrate, end_time'.")],
+    steps_raw: Annotated[list[str], typer.Option("--step", help="Step as 'flowrate, end_time', or just 'flowrate' on every step to detect the end times from the record.")],
     borehole_name: Annotated[str, typer.Option(help="Borehole identifier.")] = "BH",
+    method: Annotated[StepDrawdownMethod, typer.Option(help="'eden_hazel' fits every reading with superposition and also gives T.")] = StepDrawdownMethod.HANTUSH_BIERSCHENK,
+    regression: Annotated[RegressionMethod, typer.Option(help="Estimator of the fit: 'theil_sen' (Hantush-Bierschenk only) or 'huber' resist outlying readings.")] = RegressionMethod.LEAST_SQUARES,
+    qc: Annotated[bool, typer.Option(help="Check the record for spikes, flat lines, gaps and levels below the pump, and leave rejected readings out.")] = False,
+    pump_depth: Annotated[Optional[float], typer.Option(help="Pump intake depth [mbd]; with --qc, levels below it are rejected.")] = None,
+    bootstrap: Annotated[Optional[int], typer.Option(help="Bootstrap this many replicates for confidence intervals on the results.")] = None,
+    bootstrap_method: Annotated[BootstrapMethod, typer.Option(help="'residual' resamples the fit residuals; 'pairs' resamples whole readings.")] = BootstrapMethod.RESIDUAL,
+    monte_carlo: Annotated[Optional[int], typer.Option(help="Propagate the field-input errors below through the analysis with this many Monte Carlo samples.")] = None,
+    flowrate_error: Annotated[float, typer.Option(help="Flowrate measurement error [% of the rate], one standard deviation.")] = 0.0,
+    static_level_error: Annotated[float, typer.Option(help="Static level measurement error [m], one standard deviation.")] = 0.0,
+    step_time_error: Annotated[float, typer.Option(help="Step end time error [min], one standard deviation.")] = 0.0,
 ):
-    """Analyse a step-drawdown test using the Hantush-Bierschenk method."""
-    borehole_cfg = BoreholeConfig(name=borehole_name, static_level_mbd=static_level)
+    """Analyse a step-drawdown test using the Hantush-Bierschenk (or Eden-Hazel) method."""
+    borehole_cfg = BoreholeConfig(name=borehole_name, static_level_mbd=static_level, pump_depth_mbd=pump_depth)
 
-    parsed_steps = []
+    steps_cfg = []
     for i, s in enumerate(steps_raw, start=1):
         parts = s.strip().split(",")
-        if len(parts) != 2:
+        if len(parts) not in (1, 2):
             typer.echo(
-                f"Error: Step {i} '{s}' is not in the expected format 'flowrate,end_time'. "
+                f"Error: Step {i} '{s}' is not in the expected format 'flowrate,end_time' or 'flowrate'. "
                 "Example: --step '4.2,120'",
                 err=True
             )
             raise typer.Exit(code=1)
         try:
             flowrate = float(parts[0])
-            end_time = float(parts[1])
+            end_time = float(parts[1]) if len(parts) == 2 else None
         except ValueError:
             typer.echo(
                 f"Error: Step {i} '{s}' contains non-numeric values. "
@@ -100,16 +267,94 @@ def step_drawdown(
                 err=True
             )
             raise typer.Exit(code=1)
-        parsed_steps.append(Step(step_number=i, flowrate_m3h=flowrate, end_time_min=end_time))
+        steps_cfg.append(StepConfig(flowrate_m3h=flowrate, end_time_min=end_time))
 
-    steps_cfg = [
-        StepConfig(flowrate_m3h=flowrate, end_time_min=end_time)
-        for flowrate, end_time in parsed_steps
-    ]
-    sd_cfg = StepDrawdownConfig(csv_file=csv_file, steps=steps_cfg)
+    detected = [step.end_time_min is None for step in steps_cfg]
+    if any(detected) and not all(detected):
+        typer.echo("Error: Give an end time for every step, or for none (end times are then detected).", err=True)
+        raise typer.Exit(code=1)
+    sd_cfg = StepDrawdownConfig(
+        csv_file=csv_file,
+        steps_raw=steps_cfg,
+        method=method.value,
+        regression=regression.value,
+        qc=QCConfig() if qc else None,
+        bootstrap=_bootstrap_config(bootstrap, bootstrap_method),
+        monte_carlo=_monte_carlo_config(monte_carlo, flowrate_error, static_level_error, step_time_min=step_time_error),
+    )
     
     _run_step_drawdown(borehole_cfg, sd_cfg)
 
+@app.command()
+def detect_steps(
+    csv_file: Annotated[Path, typer.Argument(help="Path to the CSV data file.")],
+    steps: Annotated[Optional[int], typer.Option(help="Number of steps pumped, if known.")] = None,
+    min_jump_fraction: Annotated[float, typer.Option(help="Smallest jump at a step change, as a fraction of the largest (without --steps).")] = DEFAULT_MIN_JUMP_FRACTION,
+    min_step_fraction: Annotated[float, typer.Option(help="Shortest step, as a fraction of the pumping period.")] = DEFAULT_MIN_STEP_FRACTION,
+):
+    """Propose the end time of each pumping step from the water-level record of a step-drawdown test."""
+    try:
+        time, level = read_level_record(csv_file)
+        end_times = detect_step_ends(
+            time, level,
+            n_steps=steps,
+            min_jump_fraction=min_jump_fraction,
+            min_step_fraction=min_step_fraction,
+        )
+    except ValueError as e:
+        typer.echo(f"Error (detect_steps): {e}", err=True)
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Detected steps — {csv_file.name}", show_header=True)
+    table.add_column("Step", justify="right")
+    table.add_column("Start \\[min]", justify="right")
+    table.add_column("End \\[min]", justify="right")
+    table.add_column("Level at end \\[mbd]", justify="right")
+    start = float(time[0])
+    for i, end in enumerate(end_times, start=1):
+        table.add_row(str(i), f"{start:g}", f"{end:g}", f"{level[time <= end][-1]:.2f}")
+        start = end
+    console.print(table)
+    console.print("Pass them to step-drawdown with the flowrates, e.g. " + " ".join(
+        f"--step 'Q{i},{end:g}'" for i, end in enumerate(end_times, start=1)
+    ))
+
+def _decimation_config(bins_per_log_cycle: Optional[int], method: DecimationMethod) -> Optional[DecimationConfig]:
+    """ Decimation settings from the CLI options; None when no bin count is given. """
+    if bins_per_log_cycle is None:
+        return None
+    return DecimationConfig(bins_per_log_cycle=bins_per_log_cycle, method=method.value)
+
+def _bootstrap_config(replicates: Optional[int], method: BootstrapMethod) -> Optional[BootstrapConfig]:
+    """ Bootstrap settings from the CLI options; None when no replicate count is given. """
+    if replicates is None:
+        return None
+    return BootstrapConfig(replicates=replicates, method=method.value)
+
+def _monte_carlo_config(
+    samples: Optional[int],
+    flowrate_pct: float,
+    static_level_m: float,
+    end_of_pumping_min: float = 0.0,
+    step_time_min: float = 0.0,
+) -> Optional[MonteCarloConfig]:
+    if samples is None:
+        return None
+    return MonteCarloConfig(
+        samples=samples,
+        flowrate_pct=flowrate_pct,
+        static_level_m=static_level_m,
+        end_of_pumping_min=end_of_pumping_min,
+        step_time_min=step_time_min,
+    )
+
+def _quality_control(test: PumpingTest, qc: Optional[QCConfig], borehole_config: BoreholeConfig) -> PumpingTest:
+    """ Leave out the readings rejected by the quality-control checks when they are configured. """
+    settings = quality_control_settings(qc, borehole_config)
+    if settings is None:
+        return test
+    return apply_quality_control(test, settings)
+
 def _run_constant_rate(
     borehole_config: BoreholeConfig,
     cr_config: ConstantRateConfig,
@@ -120,7 +365,9 @@ def _run_constant_rate(
         help="Output path(s) for plots in order: 1) raw preview, 2) analysis chart." \
         "Save plot to file (.html for interactive, .png/.svg for static). " \
         "If omitted, opens in browser."
-    )] = None
+    )] = None,
+    cache: Optional[ParsedDataCache] = None,
+    test: Optional[PumpingTest] = None,
 ) -> None:
     """Shared logic for constant-rate analysis — used by both 'constant_rate' and 'run' commands."""
     borehole = Borehole.minimal(
@@ -132,27 +379,61 @@ def _run_constant_rate(
     resolved_fit_end = fit_end if fit_end is not None else cr_config.fit_end_idx
 
     try:
-        test = read_constant_rate_csv(
-            path=cr_config.csv_file,
-            borehole=borehole,
-            flowrate_m3h=cr_config.flowrate_m3h,
-        )
+        if test is None:
+            test = read_constant_rate_csv(
+                path=cr_config.csv_file,
+                borehole=borehole,
+                flowrate_m3h=cr_config.flowrate_m3h,
+                cache=cache,
+            )
+        test = _quality_control(test, cr_config.qc, borehole_config)
+        test = apply_decimation(test, cr_config.decimation)
         result = analyse_constant_rate(
             test,
             fit_start_idx=resolved_fit_start,
             fit_end_idx=resolved_fit_end,
+            window_mode=FitWindowMode(cr_config.fit_window),
+            radius_m=borehole_radius_m(borehole_config),
+            max_segments=cr_config.max_segments,
+            theis=cr_config.theis,
+            type_curve=cr_config.type_curve,
+            regression_method=RegressionMethod(cr_config.regression),
+            bootstrap=bootstrap_settings(cr_config.bootstrap),
+            monte_carlo=monte_carlo_settings(cr_config.monte_carlo),
         )
         fig_constant_preview = plot_constant_preview(test, title=f"Constant Rate Test — {test.borehole.name}")
         fig_constant_semilog = plot_constant_semilog(test, result, title=f"Constant Rate, semilog - {test.borehole.name}")
         figures = [fig_constant_preview, fig_constant_semilog]
+        if result.type_curve is not None:
+            figures.append(plot_type_curve_match(test, result, title=f"Type-curve match ({result.type_curve.family}) - {test.borehole.name}"))
+        if result.derivative is not None:
+            figures.append(plot_derivative_diagnostic(test, result.derivative, title=f"Derivative diagnostic - {test.borehole.name}"))
         deliver_plots(figures, outputs)
 
     except ValueError as e:
         typer.echo(f"Error (constant-rate): {e}", err=True)
         raise typer.Exit(code=1)
 
+    _display_quality_control(test.qc)
     _display_constant_rate(result, borehole_config.name)
 
+def _display_quality_control(qc: Optional[QCResult]) -> None:
+    """Render the readings rejected by each quality-control check and the gaps, if checked."""
+    if qc is None:
+        return
+    rejected = int((~qc.mask).sum())
+    table = Table(title=f"Quality control — {rejected} of {len(qc.mask)} readings rejected", show_header=True)
+    table.add_column("Check", justify="left")
+    table.add_column("Readings", justify="right")
+    table.add_column("Times (min)", justify="left")
+    for check, count in qc.counts.items():
+        times = qc.time_min[qc.flags[check]]
+        shown = ", ".join(f"{t:g}" for t in times[:5]) + (", …" if len(times) > 5 else "")
+        table.add_row(QC_CHECK_LABELS[check], str(count), shown or "—")
+    for gap in qc.gaps:
+        table.add_row("Gap (kept)", "—", f"{gap.start_min:g} – {gap.end_min:g}")
+    console.print(table)
+
 def _display_constant_rate(result: ConstantRateResult, borehole_name: str) -> None:
     """Render constant-rate results as a Rich table."""
     table = Table(title=f"Constant-Rate Test — {borehole_name}", show_header=True)
@@ -164,6 +445,45 @@ def _display_constant_rate(result: ConstantRateResult, borehole_name: str) -> No
     table.add_row("Pumping Flowrate", f"{result.flowrate_m3day / HOURS_PER_DAY:.2f}", "m³/h")
     table.add_row("Drawdown per log cycle", f"{result.fit.drawdown_per_log_cycle:.2f}", "m")
     table.add_row("R²", f"{result.fit.r_squared:.4f}", "")
+    _add_regression_row(table, result.regression_method)
+    _add_confidence_rows(table, result.confidence, COOPER_JACOB_INTERVAL_ROWS)
+    _add_monte_carlo_rows(table, result.monte_carlo, COOPER_JACOB_INTERVAL_ROWS)
+    if result.theis is not None:
+        table.add_row("Theis transmissivity", f"{result.theis.transmissivity_m2day:.2f}", "m²/day")
+        table.add_row("Theis storativity", f"{result.theis.storativity:.2e}", "")
+        table.add_row("Theis RMSE", f"{result.theis.rmse_m:.3f}", "m")
+    if result.type_curve is not None:
+        fit = result.type_curve
+        table.add_row(f"Type curve ({fit.family}) transmissivity", f"{fit.transmissivity_m2day:.2f}", "m²/day")
+        table.add_row(f"Type curve ({fit.family}) storativity", f"{fit.storativity:.2e}", "")
+        for name, value in fit.parameters.items():
+            table.add_row(f"Type curve ({fit.family}) {name}", f"{value:.3g}", "")
+        table.add_row(f"Type curve ({fit.family}) RMSE", f"{fit.rmse_m:.3f}", "m")
+    console.print(table)
+    _display_window_candidates(result.window_candidates)
+    _display_plateaus(result.derivative)
+    if result.segmentation is not None:
+        _display_segmentation(result.segmentation)
+
+def _display_segmentation(segmentation: SemilogSegmentation) -> None:
+    """Render the piecewise semi-log segments as a Rich table."""
+    table = Table(title=f"Semi-log segments ({len(segmentation.segments)} chosen by BIC)", show_header=True)
+    table.add_column("Segment", justify="right")
+    table.add_column("Window", justify="left")
+    table.add_column("From [min]", justify="right")
+    table.add_column("ds [m]", justify="right")
+    table.add_column("T [m²/day]", justify="right")
+    table.add_column("R²", justify="right")
+    breaks = [None, *segmentation.breakpoints_min]
+    for i, (seg, t_start) in enumerate(zip(segmentation.segments, breaks), start=1):
+        table.add_row(
+            str(i),
+            f"{seg.start_idx}–{seg.end_idx}",
+            f"{t_start:.1f}" if t_start is not None else "start",
+            f"{seg.fit.drawdown_per_log_cycle:.2f}",
+            f"{seg.transmissivity_m2day:.2f}" if seg.fit.slope > 0 else "—",
+            f"{seg.fit.r_squared:.4f}",
+        )
     console.print(table)
 
 def _run_recovery(
@@ -176,7 +496,9 @@ def _run_recovery(
         help="Output path(s) for plots in order: 1) raw preview, 2) analysis chart." \
         "Save plot to file (.html for interactive, .png/.svg for static). " \
         "If omitted, opens in browser."
-    )] = None
+    )] = None,
+    cache: Optional[ParsedDataCache] = None,
+    test: Optional[PumpingTest] = None,
 ) -> None:
     """Shared logic for recover analysis — used by both 'recover_rate' and 'run' commands."""
     borehole = Borehole.minimal(
@@ -188,26 +510,38 @@ def _run_recovery(
     resolved_fit_end = fit_end if fit_end is not None else r_config.fit_end_idx
 
     try:
-        test = read_recovery_csv(
-            path=r_config.csv_file,
-            borehole=borehole,
-            end_of_pumping_min=r_config.end_of_pumping_min,
-            flowrate_m3h=r_config.flowrate_m3h,
-        )
+        if test is None:
+            test = read_recovery_csv(
+                path=r_config.csv_file,
+                borehole=borehole,
+                end_of_pumping_min=r_config.end_of_pumping_min,
+                flowrate_m3h=r_config.flowrate_m3h,
+                cache=cache,
+            )
+        test = _quality_control(test, r_config.qc, borehole_config)
+        test = apply_decimation(test, r_config.decimation)
         result = analyse_recovery(
             test,
             fit_start_idx=resolved_fit_start,
             fit_end_idx=resolved_fit_end,
+            window_mode=FitWindowMode(r_config.fit_window),
+            method=RecoveryMethod(r_config.method),
+            regression_method=RegressionMethod(r_config.regression),
+            bootstrap=bootstrap_settings(r_config.bootstrap),
+            monte_carlo=monte_carlo_settings(r_config.monte_carlo),
         )
         fig_recovery_preview = plot_recovery_preview(test, title=f"Recovery Test — {test.borehole.name}")
         fig_recovery_semilog = plot_recovery_semilog(test, result, title=f"Recovery, semilog - {test.borehole.name}")
         figures = [fig_recovery_preview, fig_recovery_semilog]
+        if result.derivative is not None:
+            figures.append(plot_derivative_diagnostic(test, result.derivative, title=f"Recovery derivative diagnostic - {test.borehole.name}"))
         deliver_plots(figures, outputs)
         
     except ValueError as e:
         typer.echo(f"Error (recovery): {e}", err=True)
         raise typer.Exit(code=1)
 
+    _display_quality_control(test.qc)
     _display_recovery(result, borehole_config.name)
 
 def _display_recovery(result: RecoveryResult, borehole_name: str) -> None:
@@ -216,12 +550,107 @@ def _display_recovery(result: RecoveryResult, borehole_name: str) -> None:
     table.add_column("Parameter", justify="left")
     table.add_column("Value", justify="left")
     table.add_column("Units", justify="left")
+    table.add_row("Method", RECOVERY_METHOD_LABELS[result.method], "")
     table.add_row("Transmissivity", f"{result.transmissivity_m2day:.2f}", "m²/day")
     table.add_row("Estimated Yield", f"{result.estimated_yield_m3day:.2f}", "m³/day")
     table.add_row("Final recovery", f"{result.recovery_pcg:.2f}", "%")
     table.add_row("Pumping Flowrate", f"{result.flowrate_m3day / HOURS_PER_DAY:.2f}", "m³/h")
     table.add_row("Drawdown for 1 log cycle", f"{result.fit.drawdown_per_log_cycle:.2f}", "m")
     table.add_row("R² of Fit", f"{result.fit.r_squared:.4f}", "")
+    _add_regression_row(table, result.regression_method)
+    _add_confidence_rows(table, result.confidence, COOPER_JACOB_INTERVAL_ROWS)
+    _add_monte_carlo_rows(table, result.monte_carlo, COOPER_JACOB_INTERVAL_ROWS)
+    console.print(table)
+    _display_window_candidates(result.window_candidates)
+    _display_plateaus(result.derivative)
+
+def _add_regression_row(table: Table, method: RegressionMethod) -> None:
+    """Name the line estimator, if not the default least squares."""
+    if method != RegressionMethod.LEAST_SQUARES:
+        table.add_row("Regression", REGRESSION_METHOD_LABELS[method], "")
+
+def _add_confidence_rows(
+    table: Table,
+    confidence: Optional[BootstrapIntervals],
+    rows: list[tuple[str, str, str, str]],
+) -> None:
+    """Add the bootstrap confidence intervals, if computed."""
+    if confidence is None:
+        return
+    _add_interval_rows(table, confidence.intervals, f"{confidence.confidence:.0%} CI", rows)
+    table.add_row("Bootstrap replicates", f"{confidence.n_replicates} ({confidence.method.value})", "")
+
+def _add_monte_carlo_rows(
+    table: Table,
+    monte_carlo: Optional[MonteCarloResult],
+    rows: list[tuple[str, str, str, str]],
+) -> None:
+    """Add the spread of the results under the field-input errors, if propagated."""
+    if monte_carlo is None:
+        return
+    level = f"{monte_carlo.settings.confidence:.0%}"
+    _add_interval_rows(table, monte_carlo.intervals, f"{level} range (field errors)", rows)
+    table.add_row("Monte Carlo samples", str(monte_carlo.settings.n_samples), "")
+
+def _add_interval_rows(
+    table: Table,
+    intervals: dict[str, ConfidenceInterval],
+    suffix: str,
+    rows: list[tuple[str, str, str, str]],
+) -> None:
+    """Add a row per interval present, given as (result field, label, format, units)."""
+    for key, label, fmt, units in rows:
+        interval = intervals.get(key)
+        if interval is not None:
+            upper = "unbounded" if interval.upper == float("inf") else f"{interval.upper:{fmt}}"
+            table.add_row(f"{label} {suffix}", f"{interval.lower:{fmt}} – {upper}", units)
+
+def _display_window_candidates(candidates: list[FitWindowCandidate]) -> None:
+    """Render the ranked automatic fit windows (the first one is used), if any."""
+    if not candidates:
+        return
+    table = Table(title="Automatic fit windows (best first)", show_header=True)
+    table.add_column("Rank", justify="right")
+    table.add_column("Window", justify="left")
+    table.add_column("Points", justify="right")
+    table.add_column("Log cycles", justify="right")
+    table.add_column("R²", justify="right")
+    table.add_column("T [m²/day]", justify="right")
+    table.add_column("u at start", justify="right")
+    table.add_column("S", justify="right")
+    for rank, c in enumerate(candidates, start=1):
+        table.add_row(
+            str(rank),
+            f"{c.start_idx}–{c.end_idx}",
+            str(c.n_points),
+            f"{c.log_cycles:.2f}",
+            f"{c.r_squared:.4f}",
+            f"{c.transmissivity_m2day:.2f}",
+            f"{c.u_start:.1e}" if c.u_start is not None else "—",
+            f"{c.storativity:.1e}" if c.storativity is not None else "—",
+        )
+    console.print(table)
+
+def _display_plateaus(diagnostic: Optional[DerivativeDiagnostic]) -> None:
+    """Render the radial-flow plateaus of the derivative (the first one is used), if computed."""
+    if diagnostic is None:
+        return
+    table = Table(title="Radial-flow plateaus of the derivative (longest first)", show_header=True)
+    table.add_column("Rank", justify="right")
+    table.add_column("Window", justify="left")
+    table.add_column("Points", justify="right")
+    table.add_column("Log cycles", justify="right")
+    table.add_column("ds/d ln t [m]", justify="right")
+    table.add_column("T [m²/day]", justify="right")
+    for rank, p in enumerate(diagnostic.plateaus, start=1):
+        table.add_row(
+            str(rank),
+            f"{p.start_idx}–{p.end_idx}",
+            str(p.n_points),
+            f"{p.log_cycles:.2f}",
+            f"{p.derivative_m:.3f}",
+            f"{p.transmissivity_m2day:.2f}",
+        )
     console.print(table)
 
 def _run_step_drawdown(
@@ -232,31 +661,37 @@ def _run_step_drawdown(
         help="Output path(s) for plots in order: 1) raw preview, 2) analysis chart." \
         "Save plot to file (.html for interactive, .png/.svg for static). " \
         "If omitted, opens in browser."
-    )] = None
+    )] = None,
+    cache: Optional[ParsedDataCache] = None,
+    test: Optional[PumpingTest] = None,
 ) -> None:
     """Shared logic for step-drawdown analysis — used by both 'step_drawdown' and 'run' commands."""
     borehole = Borehole.minimal(
         name=borehole_config.name,
         static_level_mbd=borehole_config.static_level_mbd
     )
-    steps = [
-        Step(step_number=i, flowrate_m3h=s.flowrate_m3h, end_time_min=s.end_time_min)
-        for i, s in enumerate(sd_config.steps_raw, start=1)
-    ]
-
     try:
-        test = read_step_drawdown_csv(
-            path=sd_config.csv_file,
-            borehole=borehole,
-            steps=steps
-        )
+        if test is None:
+            test = read_step_drawdown_csv(
+                path=sd_config.csv_file,
+                borehole=borehole,
+                steps=step_definitions(sd_config, cache),
+                cache=cache,
+            )
+        test = _quality_control(test, sd_config.qc, borehole_config)
         result = analyse_step_drawdown(
-            test
+            test,
+            method=StepDrawdownMethod(sd_config.method),
+            regression_method=RegressionMethod(sd_config.regression),
+            bootstrap=bootstrap_settings(sd_config.bootstrap),
+            monte_carlo=monte_carlo_settings(sd_config.monte_carlo),
         )
         fig_step_preview = plot_step_preview(test, title=f"Step-Drawdown — {test.borehole.name}")
         fig_specific_drawdown = plot_specific_drawdown(test, result, title=f"Specific Drawdown - {test.borehole.name}")
         fig_losses_vs_q = plot_losses_vs_q(result, title=f"Linear and non-linear losses - {test.borehole.name}", q_max=result.critical_yield_m3h*1.1)
         figures = [fig_step_preview, fig_specific_drawdown, fig_losses_vs_q]
+        if result.superposition is not None:
+            figures.append(plot_superposition_fit(test, result, title=f"Eden-Hazel fit - {test.borehole.name}"))
         deliver_plots(figures, outputs)
         
 
@@ -264,6 +699,7 @@ def _run_step_drawdown(
         typer.echo(f"Error (step_drawdown): {e}", err=True)
         raise typer.Exit(code=1)
 
+    _display_quality_control(test.qc)
     _display_step_drawdown(result, borehole_config.name)
 
 def _display_step_drawdown(result: StepDrawdownResult, borehole_name: str) -> None:
@@ -280,6 +716,15 @@ def _display_step_drawdown(result: StepDrawdownResult, borehole_name: str) -> No
     table.add_row("Critical Yield", f"{result.critical_yield_m3h:.2f}", "m³/h")
     table.add_row("Estimated Safe Yield (80% of critical yield)", f"{result.critical_yield_m3h * SAFE_YIELD_FRACTION:.2f}", "m³/h")
     table.add_row("R² of Fit", f"{result.r_squared:.4f}", "")
+    _add_regression_row(table, result.regression_method)
+    if result.superposition is not None:
+        fit = result.superposition
+        table.add_row("Transmissivity (Eden-Hazel)", f"{fit.transmissivity_m2day:.2f}", "m²/day")
+        table.add_row("B quoted for a step of", f"{fit.reference_duration_min:.0f}", "min")
+        table.add_row("Readings fitted", str(fit.n_points_used), "")
+        table.add_row("RMSE", f"{fit.rmse_m:.3f}", "m")
+    _add_confidence_rows(table, result.confidence, STEP_DRAWDOWN_INTERVAL_ROWS)
+    _add_monte_carlo_rows(table, result.monte_carlo, STEP_DRAWDOWN_INTERVAL_ROWS)
     console.print(table)
     
     step_table = Table(title="Per-Step Results", show_header=True)
@@ -342,37 +787,143 @@ def deliver_plots(figures: list[go.Figure], outputs: Optional[list[Path]]) -> No
     for fig, path in zip(figures, outputs):
         deliver_plot(fig, path)
 
+def _apply_overrides(
+    config: BoreholeCampaignConfig,
+    flowrate: Optional[float],
+    bins_per_log_cycle: Optional[int],
+    decimation: Optional[DecimationMethod],
+    fit_window: Optional[FitWindowMode] = None,
+    segments: Optional[int] = None,
+    bootstrap: Optional[int] = None,
+    bootstrap_method: Optional[BootstrapMethod] = None,
+    regression: Optional[RegressionMethod] = None,
+    qc: Optional[bool] = None,
+) -> None:
+    """ CLI overrides take priority over config values. """
+    if flowrate is not None:
+        if config.constant_rate:
+            config.constant_rate.flowrate_m3h = flowrate
+        if config.recovery:
+            config.recovery.flowrate_m3h = flowrate
+    if bins_per_log_cycle is not None or decimation is not None:
+        for test_config in (config.constant_rate, config.recovery):
+            if test_config is None:
+                continue
+            current = test_config.decimation or DecimationConfig()
+            test_config.decimation = DecimationConfig(
+                bins_per_log_cycle=bins_per_log_cycle or current.bins_per_log_cycle,
+                method=decimation.value if decimation is not None else current.method,
+            )
+    if fit_window is not None:
+        for test_config in (config.constant_rate, config.recovery):
+            if test_config is not None:
+                test_config.fit_window = fit_window.value
+    if segments is not None and config.constant_rate:
+        config.constant_rate.max_segments = segments
+    if bootstrap is not None or bootstrap_method is not None:
+        for test_config in (config.constant_rate, config.recovery, config.step_drawdown):
+            if test_config is None:
+                continue
+            current = test_config.bootstrap or BootstrapConfig()
+            test_config.bootstrap = BootstrapConfig(
+                replicates=bootstrap or current.replicates,
+                method=bootstrap_method.value if bootstrap_method is not None else current.method,
+                confidence=current.confidence,
+                seed=current.seed,
+                workers=current.workers,
+            )
+    if regression is not None:
+        for test_config in (config.constant_rate, config.recovery, config.step_drawdown):
+            if test_config is not None:
+                test_config.regression = regression.value
+    if qc is not None:
+        for test_config in (config.constant_rate, config.recovery, config.step_drawdown):
+            if test_config is not None:
+                test_config.qc = (test_config.qc or QCConfig()) if qc else None
+
 @app.command()
 def run(
-    config_file: Annotated[Path, typer.Argument(help="Path to borehole config file (.json or .yaml).")],
+    config_files: Annotated[list[Path], typer.Argument(help="Path(s) to borehole config files (.json or .yaml).")],
     fit_start: Annotated[Optional[int], typer.Option(help="Override fit start index.")] = 1,
     fit_end: Annotated[Optional[int], typer.Option(help="Override fit end index.")] = None,
     flowrate: Annotated[Optional[float], typer.Option(help="Override pumping flowrate [m³/h].")] = None,
+    cache_dir: Annotated[Optional[Path], typer.Option(help="Cache parsed CSV data in this directory to speed up re-runs.")] = None,
+    bins_per_log_cycle: Annotated[Optional[int], typer.Option(help="Override log-time decimation: bins per log cycle.")] = None,
+    decimation: Annotated[Optional[DecimationMethod], typer.Option(help="Override how readings in a log-time bin are combined.")] = None,
+    workers: Annotated[Optional[int], typer.Option(help="Maximum number of processes used to load data files in parallel.")] = None,
+    fit_window: Annotated[Optional[FitWindowMode], typer.Option(help="Override how the fit window is chosen.")] = None,
+    segments: Annotated[Optional[int], typer.Option(help="Override the maximum number of semi-log segments (constant-rate).")] = None,
+    bootstrap: Annotated[Optional[int], typer.Option(help="Override the number of bootstrap replicates for confidence intervals (all tests).")] = None,
+    bootstrap_method: Annotated[Optional[BootstrapMethod], typer.Option(help="Override how bootstrap replicates are drawn.")] = None,
+    regression: Annotated[Optional[RegressionMethod], typer.Option(help="Override the line estimator (all tests).")] = None,
+    qc: Annotated[Optional[bool], typer.Option(help="Switch the quality-control checks on (with the configured or default thresholds) or off for all tests.")] = None,
 ):
-    """Run all configured tests for a borehole from a config file."""
+    """Run all configured tests for one or more boreholes from config files."""
+    configs = []
+    for config_file in config_files:
+        try:
+            raw = load_config_file(config_file)
+            config = validate_config(raw, config_file)
+        except (ValueError, FileNotFoundError) as e:
+            typer.echo(f"Config error ({config_file}): {e}", err=True)
+            raise typer.Exit(code=1)
+        _apply_overrides(config, flowrate, bins_per_log_cycle, decimation, fit_window, segments, bootstrap, bootstrap_method, regression, qc)
+        configs.append((config_file, config))
+
+    # Parse and validate every data file up front, in parallel; results keep config order
+    cache = ParsedDataCache(cache_dir) if cache_dir is not None else None
     try:
-        raw = load_config_file(config_file)
-        config = validate_config(raw, config_file)
-    except (ValueError, FileNotFoundError) as e:
-        typer.echo(f"Config error: {e}", err=True)
+        jobs_per_config = [campaign_jobs(config, cache) for _, config in configs]
+        loaded = iter(load_tests([job for jobs in jobs_per_config for job in jobs], max_workers=workers, cache=cache))
+    except ValueError as e:
+        typer.echo(f"Error: {e}", err=True)
         raise typer.Exit(code=1)
 
-    # Apply CLI overrides
-    if flowrate is not None:
-        if config.constant_rate:
-            config.constant_rate.flowrate_m3h = flowrate
-        if config.recovery:
-            config.recovery.flowrate_m3h = flowrate
+    failed = False
+    for (config_file, config), jobs in zip(configs, jobs_per_config):
+        console.print(f"\n[bold]Running tests for borehole: {config.borehole.name}[/bold]")
+        console.print(f"Config: {config_file.resolve()}\n")
+        for _ in jobs:
+            test = next(loaded)
+            if isinstance(test, LoadError):
+                typer.echo(f"Error ({test.test_type.value}): {test.path}: {test.message}", err=True)
+                failed = True
+                continue
+            # An analysis error is reported by the _run_* helper; carry on with the other tests
+            try:
+                if test.test_type == TestType.CONSTANT_RATE:
+                    _run_constant_rate(config.borehole, config.constant_rate, fit_start, fit_end, test=test)
+                elif test.test_type == TestType.RECOVERY:
+                    _run_recovery(config.borehole, config.recovery, fit_start, fit_end, test=test)
+                else:
+                    _run_step_drawdown(config.borehole, config.step_drawdown, test=test)
+            except typer.Exit:
+                failed = True
+
+    if failed:
+        raise typer.Exit(code=1)
 
-    console.print(f"\n[bold]Running tests for borehole: {config.borehole.name}[/bold]")
-    console.print(f"Config: {config_file.resolve()}\n")
-    # Run each configured test
-    if config.constant_rate:
-        _run_constant_rate(config.borehole, config.constant_rate, fit_start, fit_end)
-    if config.recovery:
-        _run_recovery(config.borehole, config.recovery, fit_start, fit_end)
-    if config.step_drawdown:
-        _run_step_drawdown(config.borehole, config.step_drawdown)
+@app.command()
+def build_type_curves(
+    family: Annotated[Optional[list[str]], typer.Option(help="Family to build; repeat for several. Default: all.")] = None,
+    force: Annotated[bool, typer.Option(help="Rebuild families that are already stored.")] = False,
+):
+    """Precompute the type-curve atlas used by --type-curve (otherwise built on first use)."""
+    atlas = default_atlas()
+    try:
+        built = atlas.build(family, force=force)
+    except ValueError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    table = Table(title=f"Type-curve atlas — {atlas.directory}", show_header=True)
+    table.add_column("Family", justify="left")
+    table.add_column("Curves", justify="right")
+    table.add_column("Status", justify="left")
+    for name in family or tabulated_family_names():
+        curves = atlas.table(name).curves
+        table.add_row(name, str(curves.size // curves.shape[-1]), "built" if name in built else "up to date")
+    console.print(table)
 
 
 if __name__ == "__main__":
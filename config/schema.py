@@ -22,6 +22,44 @@ class BoreholeConfig:
     gps: Optional[tuple[float, float]] = None  # (latitude, longitude)
     pump_type: Optional[str] = None    # Type and model of pump used for testing
 
+@dataclass
+class DecimationConfig:
+    """ Log-time resampling applied to the data before fitting and plotting. """
+    bins_per_log_cycle: int = 20
+    method: str = "median"  # "median" or "mean"
+
+@dataclass
+class BootstrapConfig:
+    """ Bootstrap confidence intervals on the results of a test. """
+    replicates: int = 2000
+    method: str = "residual"    # "residual" or "pairs"
+    confidence: float = 0.95
+    seed: Optional[int] = 0     # None = different replicates on every run
+    workers: Optional[int] = None   # processes for very large replicate counts; None = one
+
+@dataclass
+class MonteCarloConfig:
+    """ Field-input measurement errors propagated to the results by Monte Carlo sampling. """
+    samples: int = 10_000
+    flowrate_pct: float = 0.0           # error of each pumping rate [%]
+    static_level_m: float = 0.0
+    end_of_pumping_min: float = 0.0     # recovery only
+    step_time_min: float = 0.0          # step-drawdown only
+    distribution: str = "normal"        # "normal" (spreads are standard deviations) or "uniform" (half-widths)
+    confidence: float = 0.95
+    seed: Optional[int] = 0
+
+@dataclass
+class QCConfig:
+    """ Quality-control checks on the raw record; the pump depth comes from borehole.pump_depth_mbd. """
+    spike_window: int = 7               # readings in the rolling median/MAD window (odd)
+    spike_threshold: Optional[float] = 5.0  # in rolling MADs; None = no spike check
+    spike_min_m: float = 0.05
+    flatline_readings: Optional[int] = 5    # None = no flat-line check
+    flatline_min: float = 30.0
+    gap_factor: Optional[float] = 10.0  # None = no gap check
+    min_gap_min: float = 5.0
+
 @dataclass
 class ConstantRateConfig:
     """ Configuration for a constant rate pumping test. """
@@ -29,6 +67,15 @@ class ConstantRateConfig:
     flowrate_m3h: float
     fit_start_idx: int = 1
     fit_end_idx: Optional[int] = None
+    fit_window: str = "manual"  # "manual" (fit_start_idx/fit_end_idx), "auto" (window search) or "derivative" (radial-flow plateau)
+    max_segments: Optional[int] = None  # piecewise semi-log segmentation; None = off
+    theis: bool = False     # also fit the Theis curve (needs borehole.diameter_mm)
+    type_curve: Optional[str] = None    # type-curve atlas family to fit (needs borehole.diameter_mm); None = off
+    regression: str = "least_squares"   # "least_squares", "theil_sen" or "huber" (robust to logger spikes)
+    qc: Optional[QCConfig] = None   # None = every reading is analysed
+    decimation: Optional[DecimationConfig] = None   # None = use every reading
+    bootstrap: Optional[BootstrapConfig] = None     # None = no confidence intervals
+    monte_carlo: Optional[MonteCarloConfig] = None  # None = inputs taken as exact
 
 @dataclass
 class RecoveryConfig:
@@ -38,18 +85,30 @@ class RecoveryConfig:
     end_of_pumping_min: float
     fit_start_idx: int = 1
     fit_end_idx: Optional[int] = None
+    fit_window: str = "manual"  # "manual" (fit_start_idx/fit_end_idx), "auto" (window search) or "derivative" (radial-flow plateau)
+    method: str = "theis"   # "theis" (t/t'), "agarwal" (equivalent time) or "residual" (t')
+    regression: str = "least_squares"   # "least_squares", "theil_sen" or "huber" (robust to logger spikes)
+    qc: Optional[QCConfig] = None   # None = every reading is analysed
+    decimation: Optional[DecimationConfig] = None   # None = use every reading
+    bootstrap: Optional[BootstrapConfig] = None     # None = no confidence intervals
+    monte_carlo: Optional[MonteCarloConfig] = None  # None = inputs taken as exact
 
 @dataclass
 class StepConfig:
     """ Configuration for a single step in the step-drawdown test. """
     flowrate_m3h: float
-    end_time_min: float
+    end_time_min: Optional[float] = None    # None = detected from the level record (all steps or none)
 
 @dataclass
 class StepDrawdownConfig:
     """ Configuration for a step drawdown test. """
     csv_file: Path
     steps_raw: list[StepConfig]
+    method: str = "hantush_bierschenk"  # or "eden_hazel" (every reading, superposition)
+    regression: str = "least_squares"   # "least_squares", "theil_sen" (not with eden_hazel) or "huber"
+    qc: Optional[QCConfig] = None   # None = every reading is analysed
+    bootstrap: Optional[BootstrapConfig] = None     # None = no confidence intervals
+    monte_carlo: Optional[MonteCarloConfig] = None  # None = inputs taken as exact
 
 @dataclass
 class BoreholeCampaignConfig:
@@ -1,5 +1,5 @@
 # from loader import load_config_file
-from .schema import BoreholeCampaignConfig, BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepConfig, StepDrawdownConfig
+from .schema import BoreholeCampaignConfig, BoreholeConfig, ConstantRateConfig, RecoveryConfig, StepConfig, StepDrawdownConfig, DecimationConfig, BootstrapConfig, MonteCarloConfig, QCConfig
 from pathlib import Path
 from datetime import date
 from typing import Optional, Any
@@ -110,6 +110,148 @@ def _validate_csv_path(raw: dict, section: str, config_dir: Path) -> Path:
         )
     return csv_path
 
+DECIMATION_METHODS = ("median", "mean")
+
+def _validate_decimation(raw: dict, section: str) -> Optional[DecimationConfig]:
+    """Validates the optional 'decimation' subsection of a test section."""
+    decimation = _valid_field(raw, "decimation", dict, section, optional=True)
+    if decimation is None:
+        return None
+    section = f"{section}.decimation"
+    bins = _valid_field(decimation, "bins_per_log_cycle", int, section, optional=True) or 20
+    if bins < 1:
+        raise ValueError(f"'{section}.bins_per_log_cycle' must be positive, got {bins}.")
+    method = _valid_field(decimation, "method", str, section, optional=True) or "median"
+    if method not in DECIMATION_METHODS:
+        raise ValueError(
+            f"'{section}.method' must be one of {DECIMATION_METHODS}, got '{method}'."
+        )
+    return DecimationConfig(bins_per_log_cycle=bins, method=method)
+
+BOOTSTRAP_METHODS = ("residual", "pairs")
+
+def _validate_bootstrap(raw: dict, section: str) -> Optional[BootstrapConfig]:
+    """Validates the optional 'bootstrap' subsection of a test section."""
+    bootstrap = _valid_field(raw, "bootstrap", dict, section, optional=True)
+    if bootstrap is None:
+        return None
+    section = f"{section}.bootstrap"
+    replicates = _valid_field(bootstrap, "replicates", int, section, optional=True) or 2000
+    if replicates < 10:
+        raise ValueError(f"'{section}.replicates' must be at least 10, got {replicates}.")
+    method = _valid_field(bootstrap, "method", str, section, optional=True) or "residual"
+    if method not in BOOTSTRAP_METHODS:
+        raise ValueError(
+            f"'{section}.method' must be one of {BOOTSTRAP_METHODS}, got '{method}'."
+        )
+    confidence = _valid_number(bootstrap, "confidence", section, positive=True, optional=True) or 0.95
+    if confidence >= 1:
+        raise ValueError(f"'{section}.confidence' must be below 1, got {confidence}.")
+    seed = bootstrap.get("seed", 0)   # null = a different seed on every run
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        raise ValueError(f"'{section}.seed' must be a non-negative integer or null, got {seed!r}.")
+    workers = _valid_field(bootstrap, "workers", int, section, optional=True)
+    if workers is not None and workers < 1:
+        raise ValueError(f"'{section}.workers' must be positive, got {workers}.")
+    return BootstrapConfig(replicates=replicates, method=method, confidence=confidence, seed=seed, workers=workers)
+
+ERROR_DISTRIBUTIONS = ("normal", "uniform")
+
+def _validate_monte_carlo(raw: dict, section: str) -> Optional[MonteCarloConfig]:
+    """Validates the optional 'monte_carlo' subsection of a test section."""
+    monte_carlo = _valid_field(raw, "monte_carlo", dict, section, optional=True)
+    if monte_carlo is None:
+        return None
+    section = f"{section}.monte_carlo"
+    samples = _valid_field(monte_carlo, "samples", int, section, optional=True) or 10_000
+    if samples < 10:
+        raise ValueError(f"'{section}.samples' must be at least 10, got {samples}.")
+    spreads = {}
+    for key in ("flowrate_pct", "static_level_m", "end_of_pumping_min", "step_time_min"):
+        spreads[key] = _valid_number(monte_carlo, key, section, optional=True) or 0.0
+        if spreads[key] < 0:
+            raise ValueError(f"'{section}.{key}' cannot be negative, got {spreads[key]}.")
+    distribution = _valid_field(monte_carlo, "distribution", str, section, optional=True) or "normal"
+    if distribution not in ERROR_DISTRIBUTIONS:
+        raise ValueError(
+            f"'{section}.distribution' must be one of {ERROR_DISTRIBUTIONS}, got '{distribution}'."
+        )
+    confidence = _valid_number(monte_carlo, "confidence", section, positive=True, optional=True) or 0.95
+    if confidence >= 1:
+        raise ValueError(f"'{section}.confidence' must be below 1, got {confidence}.")
+    seed = monte_carlo.get("seed", 0)   # null = a different seed on every run
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        raise ValueError(f"'{section}.seed' must be a non-negative integer or null, got {seed!r}.")
+    return MonteCarloConfig(samples=samples, distribution=distribution, confidence=confidence, seed=seed, **spreads)
+
+def _validate_qc(raw: dict, section: str) -> Optional[QCConfig]:
+    """Validates the optional 'qc' subsection of a test section; a null threshold switches its check off."""
+    qc = _valid_field(raw, "qc", dict, section, optional=True)
+    if qc is None:
+        return None
+    section = f"{section}.qc"
+    defaults = QCConfig()
+    window = _valid_field(qc, "spike_window", int, section, optional=True) or defaults.spike_window
+    if window < 3 or window % 2 == 0:
+        raise ValueError(f"'{section}.spike_window' must be an odd number of at least 3, got {window}.")
+    checks = {}
+    for key in ("spike_threshold", "gap_factor"):
+        if key in qc and qc[key] is None:
+            checks[key] = None
+        else:
+            checks[key] = _valid_number(qc, key, section, positive=True, optional=True) or getattr(defaults, key)
+    if checks["gap_factor"] is not None and checks["gap_factor"] <= 1:
+        raise ValueError(f"'{section}.gap_factor' must be greater than 1, got {checks['gap_factor']}.")
+    flatline_readings = defaults.flatline_readings
+    if "flatline_readings" in qc:
+        flatline_readings = None if qc["flatline_readings"] is None else _valid_field(qc, "flatline_readings", int, section)
+    if flatline_readings is not None and flatline_readings < 2:
+        raise ValueError(f"'{section}.flatline_readings' must be at least 2, got {flatline_readings}.")
+    limits = {}
+    for key in ("spike_min_m", "flatline_min", "min_gap_min"):
+        limits[key] = _valid_number(qc, key, section, optional=True)
+        if limits[key] is None:
+            limits[key] = getattr(defaults, key)
+        elif limits[key] < 0:
+            raise ValueError(f"'{section}.{key}' cannot be negative, got {limits[key]}.")
+    return QCConfig(spike_window=window, flatline_readings=flatline_readings, **checks, **limits)
+
+FIT_WINDOW_MODES = ("manual", "auto", "derivative")
+
+def _validate_fit_window(raw: dict, section: str) -> str:
+    """Validates the optional 'fit_window' mode of a test section."""
+    mode = _valid_field(raw, "fit_window", str, section, optional=True) or "manual"
+    if mode not in FIT_WINDOW_MODES:
+        raise ValueError(
+            f"'{section}.fit_window' must be one of {FIT_WINDOW_MODES}, got '{mode}'."
+        )
+    return mode
+
+TYPE_CURVE_FAMILIES = (
+    "theis", "hantush_jacob", "boulton", "papadopulos_cooper",
+    "warren_root", "moench", "wellbore_storage_skin",
+)
+
+def _validate_type_curve(raw: dict, section: str) -> Optional[str]:
+    """Validates the optional 'type_curve' family of a test section."""
+    family = _valid_field(raw, "type_curve", str, section, optional=True)
+    if family is not None and family not in TYPE_CURVE_FAMILIES:
+        raise ValueError(
+            f"'{section}.type_curve' must be one of {TYPE_CURVE_FAMILIES}, got '{family}'."
+        )
+    return family
+
+REGRESSION_METHODS = ("least_squares", "theil_sen", "huber")
+
+def _validate_regression(raw: dict, section: str) -> str:
+    """Validates the optional 'regression' estimator of a test section."""
+    regression = _valid_field(raw, "regression", str, section, optional=True) or "least_squares"
+    if regression not in REGRESSION_METHODS:
+        raise ValueError(
+            f"'{section}.regression' must be one of {REGRESSION_METHODS}, got '{regression}'."
+        )
+    return regression
+
 def _validate_constant_rate(raw: dict, config_dir: Path) -> ConstantRateConfig:
     """Validates the 'constant_rate' section."""
     section = "constant_rate"
@@ -119,14 +261,36 @@ def _validate_constant_rate(raw: dict, config_dir: Path) -> ConstantRateConfig:
     flowrate = _valid_number(raw, "flowrate_m3h", section, positive=True)
     fit_start = _valid_field(raw, "fit_start_idx", int, section, optional=True) or 1
     fit_end = _valid_field(raw, "fit_end_idx", int, section, optional=True)
+    fit_window = _validate_fit_window(raw, section)
+    max_segments = _valid_field(raw, "max_segments", int, section, optional=True)
+    if max_segments is not None and max_segments < 1:
+        raise ValueError(f"'{section}.max_segments' must be positive, got {max_segments}.")
+    theis = _valid_field(raw, "theis", bool, section, optional=True) or False
+    type_curve = _validate_type_curve(raw, section)
+    regression = _validate_regression(raw, section)
+    qc = _validate_qc(raw, section)
+    decimation = _validate_decimation(raw, section)
+    bootstrap = _validate_bootstrap(raw, section)
+    monte_carlo = _validate_monte_carlo(raw, section)
 
     return ConstantRateConfig(
         csv_file=csv_file,
         flowrate_m3h=flowrate,
         fit_start_idx=fit_start,
-        fit_end_idx=fit_end
+        fit_end_idx=fit_end,
+        fit_window=fit_window,
+        max_segments=max_segments,
+        theis=theis,
+        type_curve=type_curve,
+        regression=regression,
+        qc=qc,
+        decimation=decimation,
+        bootstrap=bootstrap,
+        monte_carlo=monte_carlo,
     )
 
+RECOVERY_METHODS = ("theis", "agarwal", "residual")
+
 def _validate_recovery(raw: dict, config_dir: Path) -> RecoveryConfig:
     """Validates the 'recovery' section."""
     section = "recovery"
@@ -137,20 +301,40 @@ def _validate_recovery(raw: dict, config_dir: Path) -> RecoveryConfig:
     end_of_pumping = _valid_number(raw, "end_of_pumping_min", section, positive=True)
     fit_start = _valid_field(raw, "fit_start_idx", int, section, optional=True) or 1
     fit_end = _valid_field(raw, "fit_end_idx", int, section, optional=True)
+    fit_window = _validate_fit_window(raw, section)
+    qc = _validate_qc(raw, section)
+    decimation = _validate_decimation(raw, section)
+    bootstrap = _validate_bootstrap(raw, section)
+    monte_carlo = _validate_monte_carlo(raw, section)
+    method = _valid_field(raw, "method", str, section, optional=True) or "theis"
+    if method not in RECOVERY_METHODS:
+        raise ValueError(
+            f"'{section}.method' must be one of {RECOVERY_METHODS}, got '{method}'."
+        )
+    regression = _validate_regression(raw, section)
 
     return RecoveryConfig(
         csv_file=csv_file,
         flowrate_m3h=flowrate,
         end_of_pumping_min=end_of_pumping,
         fit_start_idx=fit_start,
-        fit_end_idx=fit_end
+        fit_end_idx=fit_end,
+        fit_window=fit_window,
+        qc=qc,
+        decimation=decimation,
+        method=method,
+        regression=regression,
+        bootstrap=bootstrap,
+        monte_carlo=monte_carlo,
     )
 
+STEP_DRAWDOWN_METHODS = ("hantush_bierschenk", "eden_hazel")
+
 def _validate_step(raw: dict, index: int) -> StepConfig:
     """Validates a single step entry."""
     section = f"steps[{index}]"
     flowrate = _valid_number(raw, "flowrate_m3h", section, positive=True)
-    end_time = _valid_number(raw, "end_time_min", section, positive=True)
+    end_time = _valid_number(raw, "end_time_min", section, positive=True, optional=True)
 
     return StepConfig(
         flowrate_m3h=flowrate,
@@ -171,10 +355,34 @@ def _validate_step_drawdown(raw: dict, config_dir: Path) -> StepDrawdownConfig:
         )
 
     steps = [_validate_step(s, i) for i, s in enumerate(steps_data, start=1)]
+    detected = [s.end_time_min is None for s in steps]
+    if any(detected) and not all(detected):
+        raise ValueError(
+            f"'{section}.steps' must give end_time_min for every step, or for none "
+            "(end times are then detected from the level record)."
+        )
+    method = _valid_field(raw, "method", str, section, optional=True) or "hantush_bierschenk"
+    if method not in STEP_DRAWDOWN_METHODS:
+        raise ValueError(
+            f"'{section}.method' must be one of {STEP_DRAWDOWN_METHODS}, got '{method}'."
+        )
+    regression = _validate_regression(raw, section)
+    if regression == "theil_sen" and method == "eden_hazel":
+        raise ValueError(
+            f"'{section}.regression' theil_sen fits a straight line only; use huber with eden_hazel."
+        )
+    qc = _validate_qc(raw, section)
+    bootstrap = _validate_bootstrap(raw, section)
+    monte_carlo = _validate_monte_carlo(raw, section)
 
     return StepDrawdownConfig(
         csv_file=csv_file,
-        steps_raw=steps
+        steps_raw=steps,
+        method=method,
+        regression=regression,
+        qc=qc,
+        bootstrap=bootstrap,
+        monte_carlo=monte_carlo,
     )
 
 def validate_config(raw: dict, config_path: Path) -> BoreholeCampaignConfig:
@@ -0,0 +1,249 @@
+from dataclasses import fields, is_dataclass
+from datetime import date
+from enum import Enum
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+import numpy as np
+
+from models import (
+    PumpingTest, Borehole, Step, TestType,
+    ConstantRateResult, RecoveryResult, StepDrawdownResult, ConfidenceInterval,
+)
+from in_out.csv_reader import REQUIRED_COLUMNS, MIN_ROWS, _validate_columns, _validate_steps
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+PARQUET_EXTENSIONS = [".parquet", ".pq"]
+ARROW_EXTENSIONS = [".arrow", ".feather", ".ipc"]
+
+def _require_pyarrow():
+    """ pyarrow is an optional dependency, only needed for Parquet/Arrow I/O. """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet/Arrow support requires pyarrow. "
+            "Install it with: pip install 'pumping-test[arrow]'"
+        )
+    return pyarrow
+
+# ----------------------------
+# Readers
+# ----------------------------
+
+def _read_table(source: "str | Path | pa.Table") -> "pa.Table":
+    """ Return source as an Arrow table, reading Parquet or Arrow IPC files by extension. """
+    pa = _require_pyarrow()
+    if isinstance(source, pa.Table):
+        return source
+    if isinstance(source, pa.RecordBatch):
+        return pa.Table.from_batches([source])
+
+    path = Path(source)
+    extension = path.suffix.lower()
+    try:
+        if extension in PARQUET_EXTENSIONS:
+            import pyarrow.parquet as pq
+            # Read only the required columns that exist, so a missing one is
+            # reported by the column check rather than by pyarrow
+            names = pq.read_schema(path).names
+            return pq.read_table(path, columns=[name for name in REQUIRED_COLUMNS if name in names])
+        if extension in ARROW_EXTENSIONS:
+            # Memory-mapped, so the column buffers are not copied; the map stays
+            # open for as long as the arrays reference it
+            return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    except (OSError, pa.ArrowException, ValueError) as e:
+        raise ValueError(f"Error reading Arrow/Parquet file '{path}': {e}")
+    raise ValueError(
+        f"Unsupported file extension '{extension}'. "
+        f"Expected one of: {PARQUET_EXTENSIONS + ARROW_EXTENSIONS}."
+    )
+
+def _column_to_numpy(table: "pa.Table", name: str) -> np.ndarray:
+    """
+    Hand over an Arrow column as a float64 NumPy array.
+    A single-chunk float64 column without nulls is passed zero-copy;
+    anything else (several chunks, integer type) is copied once.
+    """
+    pa = _require_pyarrow()
+    column = table.column(name)
+    if not (pa.types.is_floating(column.type) or pa.types.is_integer(column.type)):
+        raise ValueError(f"Column '{name}' must be numeric, got Arrow type {column.type}.")
+    if column.null_count:
+        raise ValueError(f"Missing values in required columns {REQUIRED_COLUMNS}. Check the table for incomplete data.")
+
+    if column.num_chunks == 1 and column.type == pa.float64():
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.combine_chunks().cast(pa.float64()).to_numpy(zero_copy_only=False)
+
+def _load_table_columns(source: "str | Path | pa.Table") -> tuple[np.ndarray, np.ndarray]:
+    """ Table counterpart of the CSV column checks; returns validated (time_min, level_mbd). """
+    table = _read_table(source)
+    missing = REQUIRED_COLUMNS - set(table.column_names)
+    if missing:
+        raise ValueError(
+            f"Missing required column(s): {missing}. "
+            f"Found: {table.column_names}."
+        )
+    if table.num_rows == 0:
+        raise ValueError("Table is empty. Please provide a table with data.")
+    if table.num_rows < MIN_ROWS:
+        raise ValueError(
+            f"Table contains only {table.num_rows} row(s). "
+            f"At least {MIN_ROWS} measurements are required."
+        )
+
+    time = _column_to_numpy(table, "time_min")
+    level = _column_to_numpy(table, "level_mbd")
+    _validate_columns(time, level)
+    return time, level
+
+def read_constant_rate_table(
+    source: "str | Path | pa.Table",
+    borehole: Borehole,
+    flowrate_m3h: float,
+    test_date: Optional[date] = None,
+    operator: Optional[str] = None
+) -> PumpingTest:
+    """
+    Read a constant-rate pumping test from a Parquet/Arrow file or an in-memory
+    Arrow table, with the same columns as the CSV reader (time_min, level_mbd).
+    """
+    time, level = _load_table_columns(source)
+
+    return PumpingTest.from_arrays(
+        borehole=borehole,
+        test_type=TestType.CONSTANT_RATE,
+        time_min=time,
+        level_mbd=level,
+        test_date=test_date,
+        operator=operator,
+        flowrate_m3h=flowrate_m3h
+    )
+
+def read_recovery_table(
+    source: "str | Path | pa.Table",
+    borehole: Borehole,
+    flowrate_m3h: float,
+    end_of_pumping_min: float,
+    test_date: Optional[date] = None,
+    operator: Optional[str] = None
+) -> PumpingTest:
+    """
+    Read a recovery test from a Parquet/Arrow file or an in-memory Arrow table.
+    time_min is the elapsed time since the start of the recovery phase (t').
+    """
+    time, level = _load_table_columns(source)
+
+    return PumpingTest.from_arrays(
+        borehole=borehole,
+        test_type=TestType.RECOVERY,
+        time_min=time,
+        level_mbd=level,
+        test_date=test_date,
+        operator=operator,
+        flowrate_m3h=flowrate_m3h,
+        end_of_pumping_min=end_of_pumping_min
+    )
+
+def read_step_drawdown_table(
+    source: "str | Path | pa.Table",
+    borehole: Borehole,
+    steps: list[Step],
+    test_date: Optional[date] = None,
+    operator: Optional[str] = None
+) -> PumpingTest:
+    """ Read a step-drawdown test from a Parquet/Arrow file or an in-memory Arrow table. """
+    time, level = _load_table_columns(source)
+    _validate_steps(steps, time)
+
+    return PumpingTest.from_arrays(
+        borehole=borehole,
+        test_type=TestType.STEP_DRAWDOWN,
+        time_min=time,
+        level_mbd=level,
+        test_date=test_date,
+        operator=operator,
+        steps=steps
+    )
+
+# ----------------------------
+# Writers
+# ----------------------------
+
+def _scalar(value):
+    """ A column value for a scalar field: Enums by their value, NumPy scalars as Python ones. """
+    if isinstance(value, Enum):
+        return value.value
+    return value.item() if isinstance(value, np.number) else value
+
+def _is_scalar(value) -> bool:
+    """ Whether a field holds a single column value. """
+    return value is None or isinstance(value, (bool, int, float, str, np.number, Enum))
+
+def _flatten(obj, prefix: str = "") -> dict:
+    """
+    Flatten a result dataclass into scalar columns. Nested dataclasses are
+    prefixed with their field name (e.g. fit_r_squared). The entries of a
+    dict of scalars or ConfidenceIntervals take the place of the dict's field
+    name, with _lower and _upper for an interval (e.g.
+    confidence_transmissivity_m2day_lower); lists and arrays are skipped.
+    """
+    row = {}
+    for f in fields(obj):
+        value = getattr(obj, f.name)
+        name = f"{prefix}{f.name}"
+        if is_dataclass(value):
+            row.update(_flatten(value, prefix=f"{name}_"))
+        elif isinstance(value, dict):
+            for key, entry in value.items():
+                column = f"{prefix}{_scalar(key)}"
+                if isinstance(entry, ConfidenceInterval):
+                    row[f"{column}_lower"] = entry.lower
+                    row[f"{column}_upper"] = entry.upper
+                elif _is_scalar(entry):
+                    row[column] = _scalar(entry)
+        elif _is_scalar(value):
+            row[name] = _scalar(value)
+    return row
+
+def result_to_table(
+    result: ConstantRateResult | RecoveryResult | StepDrawdownResult,
+    borehole_name: Optional[str] = None,
+) -> "pa.Table":
+    """
+    One-row Arrow table with the scalar results of an analysis.
+    Per-step rows of a step-drawdown test are exported by step_results_to_table.
+    """
+    pa = _require_pyarrow()
+    row = {"borehole": borehole_name} if borehole_name is not None else {}
+    row.update(_flatten(result))
+    return pa.Table.from_pylist([row])
+
+def step_results_to_table(result: StepDrawdownResult, borehole_name: Optional[str] = None) -> "pa.Table":
+    """ Arrow table with one row per step of a step-drawdown analysis. """
+    pa = _require_pyarrow()
+    rows = []
+    for sr in result.step_results:
+        row = {"borehole": borehole_name} if borehole_name is not None else {}
+        row.update(_flatten(sr))
+        rows.append(row)
+    return pa.Table.from_pylist(rows)
+
+def write_table(table: "pa.Table", path: str | Path) -> None:
+    """ Write an Arrow table as Parquet or Arrow IPC, chosen by file extension. """
+    pa = _require_pyarrow()
+    path = Path(path)
+    extension = path.suffix.lower()
+    if extension in PARQUET_EXTENSIONS:
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    elif extension in ARROW_EXTENSIONS:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path)
+    else:
+        raise ValueError(
+            f"Unsupported file extension '{extension}'. "
+            f"Expected one of: {PARQUET_EXTENSIONS + ARROW_EXTENSIONS}."
+        )
@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Optional, Sequence
+
+from models import PumpingTest, Borehole, Step, TestType
+from in_out.csv_reader import read_constant_rate_csv, read_recovery_csv, read_step_drawdown_csv
+from in_out.arrow_io import (
+    read_constant_rate_table, read_recovery_table, read_step_drawdown_table,
+    PARQUET_EXTENSIONS, ARROW_EXTENSIONS,
+)
+from in_out.cache import ParsedDataCache
+
+MAX_WORKERS = 8     # parsing is mostly I/O and memory bound; more processes rarely help
+
+@dataclass
+class LoadJob:
+    """ One test file to load, with the parameters its reader needs. """
+    path: Path
+    test_type: TestType
+    borehole: Borehole
+    flowrate_m3h: Optional[float] = None    # constant-rate and recovery
+    end_of_pumping_min: Optional[float] = None  # recovery
+    steps: list[Step] = field(default_factory=list)    # step-drawdown
+    test_date: Optional[date] = None
+    operator: Optional[str] = None
+
+@dataclass
+class LoadError:
+    """ A file that could not be loaded, in place of its PumpingTest. """
+    path: Path
+    test_type: TestType
+    message: str
+
+def _read_table_file(job: LoadJob) -> PumpingTest:
+    """ Parquet/Arrow files go through the arrow_io readers (pyarrow is optional). """
+    common = {"borehole": job.borehole, "test_date": job.test_date, "operator": job.operator}
+    if job.test_type == TestType.CONSTANT_RATE:
+        return read_constant_rate_table(job.path, flowrate_m3h=job.flowrate_m3h, **common)
+    if job.test_type == TestType.RECOVERY:
+        return read_recovery_table(
+            job.path, flowrate_m3h=job.flowrate_m3h, end_of_pumping_min=job.end_of_pumping_min, **common
+        )
+    return read_step_drawdown_table(job.path, steps=job.steps, **common)
+
+def _load_one(job: LoadJob, cache: Optional[ParsedDataCache] = None) -> PumpingTest | LoadError:
+    """ Load a single job, returning a LoadError for bad input instead of raising. """
+    try:
+        if Path(job.path).suffix.lower() in PARQUET_EXTENSIONS + ARROW_EXTENSIONS:
+            return _read_table_file(job)
+        common = {"borehole": job.borehole, "test_date": job.test_date, "operator": job.operator, "cache": cache}
+        if job.test_type == TestType.CONSTANT_RATE:
+            return read_constant_rate_csv(job.path, flowrate_m3h=job.flowrate_m3h, **common)
+        if job.test_type == TestType.RECOVERY:
+            return read_recovery_csv(
+                job.path, flowrate_m3h=job.flowrate_m3h, end_of_pumping_min=job.end_of_pumping_min, **common
+            )
+        return read_step_drawdown_csv(job.path, steps=job.steps, **common)
+    except (ValueError, ImportError, OSError) as e:
+        return LoadError(path=Path(job.path), test_type=job.test_type, message=str(e))
+
+def load_tests(
+    jobs: Sequence[LoadJob],
+    max_workers: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+) -> list[PumpingTest | LoadError]:
+    """
+    Parse and validate many test files concurrently in a process pool.
+
+    Every job yields either its PumpingTest or a LoadError with the reader's
+    message, so one bad file does not stop the others. Results come back in
+    the order of jobs, whatever order the workers finish in.
+
+    Args:
+        jobs:        Files to load.
+        max_workers: Upper bound on worker processes. Defaults to the number
+                     of CPUs, capped at MAX_WORKERS; never more than len(jobs).
+                     With one worker the files are loaded in this process.
+        cache:       Optional parsed-data cache shared by all workers.
+
+    Returns:
+        One PumpingTest or LoadError per job, in job order.
+    """
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f"Number of workers must be a positive integer, got {max_workers}.")
+    workers = min(max_workers or min(os.cpu_count() or 1, MAX_WORKERS), len(jobs))
+    if workers <= 1:
+        return [_load_one(job, cache) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_load_one, jobs, [cache] * len(jobs)))
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import shutil
+import time
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+CACHE_FORMAT_VERSION = 1  # bump when the parser or validation rules change
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3   # 2 GB
+DEFAULT_MAX_AGE_DAYS = 30.0
+CACHE_DIR_ENV = "PUMPING_TEST_CACHE_DIR"
+SECONDS_PER_DAY = 86_400.0
+STALE_TMP_SECONDS = 3_600.0     # temporary directories older than this were left by a failed store
+
+@dataclass
+class ParsedDataCache:
+    """
+    On-disk cache of validated time/level arrays, keyed by the SHA-256 of the
+    source file content.
+
+    Each entry is a directory holding one .npy file per column, so a repeat
+    load memory-maps the arrays back without parsing or re-validating the CSV.
+    Entries are evicted by age, then least recently used first once the cache
+    grows beyond max_bytes. The cache is best effort: a directory that cannot
+    be read or written behaves as an empty cache rather than failing the read.
+    """
+    directory: Path
+    max_bytes: int = DEFAULT_MAX_BYTES
+    max_age_days: float = DEFAULT_MAX_AGE_DAYS
+
+    def __post_init__(self):
+        self.directory = Path(self.directory)
+        if self.max_bytes <= 0:
+            raise ValueError(f"Cache size limit must be positive, got {self.max_bytes}.")
+        if self.max_age_days <= 0:
+            raise ValueError(f"Cache maximum age must be positive, got {self.max_age_days}.")
+
+    @property
+    def _root(self) -> Path:
+        return self.directory / f"v{CACHE_FORMAT_VERSION}"
+
+    def key_for(self, path: str | Path) -> str:
+        """ Content hash of a file, used as the cache key. """
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    def load(self, key: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Return memory-mapped (time_min, level_mbd) for key, or None on a miss.
+        An entry that cannot be read back (truncated or corrupt files, columns
+        of different lengths) is deleted, so the next store replaces it.
+        """
+        entry = self._root / key
+        if not entry.is_dir():
+            return None
+        try:
+            time_min = np.load(entry / "time_min.npy", mmap_mode="r")
+            level_mbd = np.load(entry / "level_mbd.npy", mmap_mode="r")
+        except (OSError, ValueError):
+            time_min = level_mbd = None
+        if time_min is None or time_min.ndim != 1 or time_min.shape != level_mbd.shape:
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        try:
+            os.utime(entry)     # mark as recently used
+        except OSError:
+            pass
+        return time_min, level_mbd
+
+    def store(self, key: str, time_min: np.ndarray, level_mbd: np.ndarray) -> None:
+        """
+        Write validated arrays for key, then evict stale entries.
+        The entry is written to a temporary directory and renamed into place,
+        so concurrent readers never see a half-written entry. An existing
+        entry for key is kept if it loads, and replaced if it does not.
+        The store is skipped if the cache directory cannot be written.
+        """
+        entry = self._root / key
+        tmp = self._root / f".{key}.{os.getpid()}.tmp"
+        try:
+            self._root.mkdir(parents=True, exist_ok=True)
+            tmp.mkdir(exist_ok=True)
+            np.save(tmp / "time_min.npy", np.ascontiguousarray(time_min, dtype=np.float64))
+            np.save(tmp / "level_mbd.npy", np.ascontiguousarray(level_mbd, dtype=np.float64))
+            try:
+                tmp.rename(entry)
+            except OSError:
+                # Either another process stored the same file first, or a corrupt
+                # entry is in the way: load deletes the latter, so retry once
+                if self.load(key) is None:
+                    tmp.rename(entry)
+            self.evict()
+        except OSError:
+            pass
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def evict(self) -> None:
+        """
+        Remove entries older than max_age_days, then oldest-used entries until
+        under max_bytes. Temporary directories older than STALE_TMP_SECONDS
+        (left by a store that failed or was killed) are removed too.
+        """
+        if not self._root.exists():
+            return
+        now = time.time()
+        entries = []
+        for entry in self._root.iterdir():
+            if not entry.is_dir():
+                continue
+            last_used = entry.stat().st_mtime
+            if entry.name.startswith("."):
+                if now - last_used > STALE_TMP_SECONDS:
+                    shutil.rmtree(entry, ignore_errors=True)
+                continue
+            if now - last_used > self.max_age_days * SECONDS_PER_DAY:
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((last_used, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+def default_cache() -> ParsedDataCache:
+    """ Cache in $PUMPING_TEST_CACHE_DIR, or ~/.cache/pumping-test if it is not set. """
+    directory = os.environ.get(CACHE_DIR_ENV) or Path.home() / ".cache" / "pumping-test"
+    return ParsedDataCache(directory=Path(directory))
@@ -1,19 +1,59 @@
-import pandas as pd
+import warnings
+import numpy as np
 from pathlib import Path
-from models import PumpingTest, Borehole, Measurement, Step, TestType
-from typing import Optional
-from datetime import date
+from models import PumpingTest, Borehole, Step, TestType, ClockJump, MeasurementTable
+from in_out.stream_reader import read_csv_columns_chunked, DEFAULT_CHUNK_ROWS
+from in_out.cache import ParsedDataCache
+from in_out.timestamps import parse_timestamps, timestamps_to_elapsed
+from dataclasses import replace
+from typing import Optional, TYPE_CHECKING
+from datetime import date, datetime
+
+if TYPE_CHECKING:
+    import pandas as pd     # imported lazily at runtime, only for the fallback path
 
 REQUIRED_COLUMNS = {"time_min", "level_mbd"}
 MIN_ROWS = 3  # absolute floor — not meaningful below this
+STREAMING_THRESHOLD_BYTES = 64 * 1024 ** 2  # larger files are read in chunks
+
+def _read_simple_csv(path: Path) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """
+    Fast path for the common two-column layout (time_min,level_mbd in either
+    order, optional UTF-8 BOM), parsed with NumPy instead of pandas.
+
+    Returns None for any other layout, or as soon as anything looks wrong
+    (non-numeric or missing values, too few rows, bad time series), so that the
+    pandas path can report the problem with the usual error message.
+    """
+    try:
+        with open(path, encoding="utf-8-sig") as f:
+            names = [name.strip() for name in f.readline().split(",")]
+            if len(names) != 2 or set(names) != REQUIRED_COLUMNS:
+                return None
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")     # header-only files warn about empty input
+                data = np.loadtxt(f, delimiter=",", dtype=np.float64, comments=None, ndmin=2)
+    except (OSError, UnicodeDecodeError, ValueError):
+        return None
+
+    if data.shape[0] < MIN_ROWS or data.shape[1] != 2 or not np.isfinite(data).all():
+        return None
+    time = np.ascontiguousarray(data[:, names.index("time_min")])
+    level = np.ascontiguousarray(data[:, names.index("level_mbd")])
+    if (time < 0).any() or (np.diff(time) <= 0).any():
+        return None
+    return time, level
 
-def _load_and_validate_csv(path: str | Path) -> pd.DataFrame:
+def _load_and_validate_csv(path: str | Path, timestamp_column: Optional[str] = None) -> "pd.DataFrame":
     """
     Load CSV file and perform file and column level checks.
-    Returns a clean DataFrame with time_min and level_mbd columns.
+    Returns a clean DataFrame with time_min and level_mbd columns, or with
+    timestamp_column and level_mbd when the time is logged as timestamps.
     This is shared by all test types.
     """
+    import pandas as pd
     path = Path(path)
+    required = REQUIRED_COLUMNS if timestamp_column is None else {timestamp_column, "level_mbd"}
     try:
         df = pd.read_csv(path)
     except Exception as e:
@@ -26,12 +66,12 @@ def _load_and_validate_csv(path: str | Path) -> pd.DataFrame:
     # Check for encoding issues or wrong delimiters (e.g., semicolons instead of commas)
     if df.shape[1] < 2:
         raise ValueError(
-            f"CSV file has {df.shape[1]} column(s). Expected at least 2 columns: {REQUIRED_COLUMNS}. "
+            f"CSV file has {df.shape[1]} column(s). Expected at least 2 columns: {required}. "
             "Check for encoding issues or wrong delimiters (e.g., semicolons instead of commas)."    
         )
 
     # Check for required columns presence and typos
-    missing = REQUIRED_COLUMNS - set(df.columns)
+    missing = required - set(df.columns)
     if missing:
         raise ValueError(
             f"Missing required column(s): {missing}. "
@@ -39,7 +79,7 @@ def _load_and_validate_csv(path: str | Path) -> pd.DataFrame:
         )
     
     # Check for data types
-    for col in REQUIRED_COLUMNS:
+    for col in required - {timestamp_column}:
         if not pd.api.types.is_numeric_dtype(df[col]):
             non_numeric = df[col][pd.to_numeric(df[col], errors='coerce').isna()]
             raise ValueError(
@@ -48,8 +88,8 @@ def _load_and_validate_csv(path: str | Path) -> pd.DataFrame:
             )
     
     # Check for missing values in required columns
-    if df[list(REQUIRED_COLUMNS)].isnull().any().any():
-        raise ValueError(f"Missing values in required columns {REQUIRED_COLUMNS}. Check CSV for incomplete data.")
+    if df[list(required)].isnull().any().any():
+        raise ValueError(f"Missing values in required columns {required}. Check CSV for incomplete data.")
     
     # Check for minimum number of rows
     if len(df) < MIN_ROWS:
@@ -58,46 +98,190 @@ def _load_and_validate_csv(path: str | Path) -> pd.DataFrame:
             f"At least {MIN_ROWS} measurements are required."
         )
     
-    return df[list(REQUIRED_COLUMNS)].copy()
+    return df[list(required)].copy()
 
-def _validate_time_series(time: pd.Series) -> None:
+def _validate_time_series(time: "pd.Series | np.ndarray") -> None:
     """
     Validate that time values are non-negative, non-duplicate,
     and monotonically increasing.
+    Accepts a pandas Series or any array-like column.
     """
+    time = np.asarray(time)
     if (time < 0).any():
         raise ValueError(f"Negative time value(s) found: {time[time < 0].tolist()}.")
-    if time.duplicated().any():
-        dupes = time[time.duplicated()].tolist()
-        raise ValueError(f"Duplicate time value(s) found: {dupes}.")
-    if not time.is_monotonic_increasing:   # this is a property, not a method
-        raise ValueError("Time values must be monotonically increasing.")
+    if (np.diff(time) > 0).all():
+        return  # strictly increasing: nothing else to check
+    _, first_occurrence = np.unique(time, return_index=True)
+    if len(first_occurrence) < len(time):
+        duplicated = np.ones(len(time), dtype=bool)
+        duplicated[first_occurrence] = False
+        raise ValueError(f"Duplicate time value(s) found: {time[duplicated].tolist()}.")
+    raise ValueError("Time values must be monotonically increasing.")
+
+def _validate_columns(time: np.ndarray, level: np.ndarray) -> None:
+    """
+    Validate the parsed time_min and level_mbd columns, whatever the source
+    (CSV, Parquet/Arrow): every value is a finite number, and the time series
+    passes _validate_time_series.
+    """
+    for name, values in (("time_min", time), ("level_mbd", level)):
+        values = np.asarray(values, dtype=np.float64)
+        if np.isnan(values).any():
+            raise ValueError(f"Missing values in required columns {REQUIRED_COLUMNS}. Check for incomplete data.")
+        if np.isinf(values).any():
+            raise ValueError(f"Infinite value(s) in column '{name}' at row(s) {np.flatnonzero(np.isinf(values)).tolist()}.")
+    _validate_time_series(time)
+
+def _validate_steps(steps: list[Step], time: np.ndarray) -> None:
+    """ Check the step definitions against the measured time range. """
+    # Check that end_time_min exists in the measurements data
+    max_time = time.max()
+    for step in steps:
+        if step.end_time_min > max_time:
+            raise ValueError(
+                f"Step {step.step_number} end time ({step.end_time_min} min) "
+                f"exceeds the maximum time in the CSV ({max_time} min)."
+            )
+    
+    # Check that there's at least one measurement per step
+    if len(time) < len(steps):
+        raise ValueError(
+            f"CSV contains {len(time)} row(s) but {len(steps)} steps are defined. "
+            "There must be at least one measurement per step."
+        )
+
+def _parse_columns(path: Path, chunk_rows: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parse and validate the time_min and level_mbd columns of a CSV file.
+
+    Plain time_min,level_mbd files are parsed with NumPy alone. Other layouts
+    fall back to pandas: files larger than STREAMING_THRESHOLD_BYTES, or any
+    file when chunk_rows is given, are streamed in chunks so that no full
+    DataFrame copy is held.
+    """
+    if chunk_rows is None:
+        columns = _read_simple_csv(path)
+        if columns is not None:
+            return columns
+        if path.is_file() and path.stat().st_size > STREAMING_THRESHOLD_BYTES:
+            chunk_rows = DEFAULT_CHUNK_ROWS
+    if chunk_rows is not None:
+        time, level = read_csv_columns_chunked(path, chunk_rows=chunk_rows, min_rows=MIN_ROWS)
+    else:
+        df = _load_and_validate_csv(path)
+        time, level = df["time_min"].to_numpy(dtype=float), df["level_mbd"].to_numpy(dtype=float)
+    _validate_columns(time, level)
+    return time, level
+
+def _load_columns(
+    path: str | Path,
+    chunk_rows: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Load the validated time_min and level_mbd columns of a CSV file as float64 arrays.
+    With a cache, a file whose content was already parsed is memory-mapped
+    back from disk instead of being parsed again.
+    """
+    path = Path(path)
+    if cache is None:
+        return _parse_columns(path, chunk_rows)
+
+    try:
+        key = cache.key_for(path)
+    except OSError as e:
+        raise ValueError(f"Error reading CSV file '{path}': {e}")
+    cached = cache.load(key)
+    if cached is not None:
+        return cached
+    time, level = _parse_columns(path, chunk_rows)
+    cache.store(key, time, level)
+    return time, level
+
+def _load_timestamped_columns(
+    path: str | Path,
+    timestamp_column: str,
+    start_time: Optional[datetime] = None,
+    timestamp_format: Optional[str] = None,
+    correct_clock_jumps: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[ClockJump]]:
+    """
+    Load a CSV file that logs wall-clock timestamps instead of elapsed time.
+    The timestamps are parsed and converted to elapsed minutes since start_time
+    in one vectorised pass (see in_out.timestamps).
+
+    Returns:
+        (time_min, level_mbd, timestamps, clock_jumps) for the readings at or
+        after start_time.
+    """
+    df = _load_and_validate_csv(path, timestamp_column)
+    try:
+        timestamps = parse_timestamps(df[timestamp_column], timestamp_format)
+    except ValueError as e:
+        raise ValueError(f"Column '{timestamp_column}' of '{path}': {e}")
+    time, keep, clock_jumps = timestamps_to_elapsed(timestamps, start_time, correct_clock_jumps)
+    if keep.sum() < MIN_ROWS:
+        raise ValueError(
+            f"CSV contains only {int(keep.sum())} row(s) after the start of the test. "
+            f"At least {MIN_ROWS} measurements are required."
+        )
+    level = df["level_mbd"].to_numpy(dtype=float)[keep]
+    _validate_columns(time, level)
+    return time, level, timestamps[keep], clock_jumps
+
+def _read_columns(
+    path: str | Path,
+    chunk_rows: Optional[int],
+    cache: Optional[ParsedDataCache],
+    timestamp_column: Optional[str],
+    start_time: Optional[datetime],
+    timestamp_format: Optional[str],
+    correct_clock_jumps: bool,
+) -> dict:
+    """ Columns and clock jumps of a CSV file as keyword arguments for PumpingTest.from_arrays. """
+    if timestamp_column is None:
+        time, level = _load_columns(path, chunk_rows, cache)
+        return {"time_min": time, "level_mbd": level}
+    time, level, timestamps, clock_jumps = _load_timestamped_columns(
+        path, timestamp_column, start_time, timestamp_format, correct_clock_jumps
+    )
+    return {"time_min": time, "level_mbd": level, "timestamp": timestamps, "clock_jumps": clock_jumps}
 
 def read_constant_rate_csv(
     path: str | Path,
     borehole: Borehole,
     flowrate_m3h: float,
     test_date: Optional[date] = None,
-    operator: Optional[str] = None
+    operator: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+    timestamp_column: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    timestamp_format: Optional[str] = None,
+    correct_clock_jumps: bool = False
 ) -> PumpingTest:
     """
     Read a constant-rate pumping test from a CSV file and return a PumpingTest object.
     The CSV file must contain at least the following columns:
         - time_min: Elapsed time in minutes since the start of the test
         - level_mbd: Water level in meters below datum (mbd)
-    """
-    df = _load_and_validate_csv(path)
-    _validate_time_series(df["time_min"])
+    Set chunk_rows to stream the file in chunks of that many rows (large files
+    are streamed automatically). With a cache, previously parsed file content
+    is loaded from disk without parsing.
 
-    measurements = [
-        Measurement(time_min=float(row.time_min), level_mbd=float(row.level_mbd))
-        for row in df.itertuples(index=False)
-    ]
+    For logger files with wall-clock time, set timestamp_column (and usually
+    start_time) instead of providing time_min: the timestamps are converted to
+    elapsed minutes and kept on the test, and clock jumps are reported in
+    test.clock_jumps (shifted out of the time axis with correct_clock_jumps).
+    """
+    columns = _read_columns(
+        path, chunk_rows, cache, timestamp_column, start_time, timestamp_format, correct_clock_jumps
+    )
 
-    return PumpingTest(
+    return PumpingTest.from_arrays(
         borehole=borehole,
         test_type=TestType.CONSTANT_RATE,
-        measurements=measurements,
+        **columns,
         test_date=test_date,
         operator=operator,
         flowrate_m3h=flowrate_m3h
@@ -109,7 +293,13 @@ def read_recovery_csv(
     flowrate_m3h: float,
     end_of_pumping_min: float,
     test_date: Optional[date] = None,
-    operator: Optional[str] = None
+    operator: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+    timestamp_column: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    timestamp_format: Optional[str] = None,
+    correct_clock_jumps: bool = False
 ) -> PumpingTest:
     """
     Read a recovery test from a CSV file and return a PumpingTest object.
@@ -118,19 +308,23 @@ def read_recovery_csv(
         - level_mbd: Water level in meters below datum (mbd)
     
     The end_of_pumping_min parameter is the elapsed time at which pumping stopped and recovery started.
-    """
-    df = _load_and_validate_csv(path)
-    _validate_time_series(df["time_min"])
+    Set chunk_rows to stream the file in chunks of that many rows (large files
+    are streamed automatically). With a cache, previously parsed file content
+    is loaded from disk without parsing.
 
-    measurements = [
-        Measurement(time_min=float(row.time_min), level_mbd=float(row.level_mbd))
-        for row in df.itertuples(index=False)
-    ]
+    For logger files with wall-clock time, set timestamp_column (and usually
+    start_time) instead of providing time_min: the timestamps are converted to
+    elapsed minutes and kept on the test, and clock jumps are reported in
+    test.clock_jumps (shifted out of the time axis with correct_clock_jumps).
+    """
+    columns = _read_columns(
+        path, chunk_rows, cache, timestamp_column, start_time, timestamp_format, correct_clock_jumps
+    )
 
-    return PumpingTest(
+    return PumpingTest.from_arrays(
         borehole=borehole,
         test_type=TestType.RECOVERY,
-        measurements=measurements,
+        **columns,
         test_date=test_date,
         operator=operator,
         flowrate_m3h=flowrate_m3h,
@@ -142,7 +336,13 @@ def read_step_drawdown_csv(
     borehole: Borehole,
     steps: list[Step],
     test_date: Optional[date] = None,
-    operator: Optional[str] = None
+    operator: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+    timestamp_column: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    timestamp_format: Optional[str] = None,
+    correct_clock_jumps: bool = False
 ) -> PumpingTest:
     """
     Read a step-drawdown test from a CSV file and return a PumpingTest object.
@@ -150,36 +350,129 @@ def read_step_drawdown_csv(
         - time_min: Elapsed time in minutes since the start of the test
         - level_mbd: Water level in meters below datum (mbd)
     The steps parameter is a list of Step objects defining the flowrate and end time of each step.
-    """
-    df = _load_and_validate_csv(path)
-    _validate_time_series(df["time_min"])
-
-    # Check that end_time_min exists in the measurements data
-    max_time = df["time_min"].max()
-    for step in steps:
-        if step.end_time_min > max_time:
-            raise ValueError(
-                f"Step {step.step_number} end time ({step.end_time_min} min) "
-                f"exceeds the maximum time in the CSV ({max_time} min)."
-            )
-    
-    # Check that there's at least one measurement per step
-    if len(df) < len(steps):
-        raise ValueError(
-            f"CSV contains {len(df)} row(s) but {len(steps)} steps are defined. "
-            "There must be at least one measurement per step."
-        )
+    Set chunk_rows to stream the file in chunks of that many rows (large files
+    are streamed automatically). With a cache, previously parsed file content
+    is loaded from disk without parsing.
 
-    measurements = [
-        Measurement(time_min=float(row.time_min), level_mbd=float(row.level_mbd))
-        for row in df.itertuples(index=False)
-    ]
+    For logger files with wall-clock time, set timestamp_column (and usually
+    start_time) instead of providing time_min: the timestamps are converted to
+    elapsed minutes and kept on the test, and clock jumps are reported in
+    test.clock_jumps (shifted out of the time axis with correct_clock_jumps).
+    """
+    columns = _read_columns(
+        path, chunk_rows, cache, timestamp_column, start_time, timestamp_format, correct_clock_jumps
+    )
+    _validate_steps(steps, columns["time_min"])
 
-    return PumpingTest(
+    return PumpingTest.from_arrays(
         borehole=borehole,
         test_type=TestType.STEP_DRAWDOWN,
-        measurements=measurements,
+        **columns,
         test_date=test_date,
         operator=operator,
         steps=steps
-    )
\ No newline at end of file
+    )
+
+def read_level_record(
+    path: str | Path,
+    chunk_rows: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read the validated (time_min, level_mbd) columns of a CSV file without
+    building a test, e.g. to detect the step end times or the pump stop
+    (analysis.step_detection) before calling read_step_drawdown_csv or
+    read_pumping_and_recovery_csv. With a cache the second read is a
+    memory-mapped load.
+    """
+    return _load_columns(path, chunk_rows, cache)
+
+def read_pumping_and_recovery_csv(
+    path: str | Path,
+    borehole: Borehole,
+    flowrate_m3h: float,
+    end_of_pumping_min: float,
+    test_date: Optional[date] = None,
+    operator: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    cache: Optional[ParsedDataCache] = None,
+    timestamp_column: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    timestamp_format: Optional[str] = None,
+    correct_clock_jumps: bool = False
+) -> tuple[PumpingTest, PumpingTest]:
+    """
+    Read a logger file holding a constant-rate test followed by its recovery,
+    and return the (constant-rate, recovery) pair of PumpingTest objects.
+    The CSV file has the same columns as for read_constant_rate_csv, with
+    time_min counted from the start of pumping throughout.
+
+    end_of_pumping_min is the elapsed time at which pumping stopped; if it is
+    not known, detect it with analysis.step_detection.detect_pump_stop on the
+    columns of read_level_record and split those with
+    split_pumping_and_recovery instead, so the file is parsed only once.
+
+    Raises:
+        ValueError: On invalid data, or if either phase holds fewer than
+                    MIN_ROWS readings.
+    """
+    columns = _read_columns(
+        path, chunk_rows, cache, timestamp_column, start_time, timestamp_format, correct_clock_jumps
+    )
+    clock_jumps = columns.pop("clock_jumps", [])
+    return split_pumping_and_recovery(
+        MeasurementTable(**columns), borehole, flowrate_m3h, end_of_pumping_min,
+        test_date=test_date, operator=operator, clock_jumps=clock_jumps,
+    )
+
+def split_pumping_and_recovery(
+    table: MeasurementTable,
+    borehole: Borehole,
+    flowrate_m3h: float,
+    end_of_pumping_min: float,
+    test_date: Optional[date] = None,
+    operator: Optional[str] = None,
+    clock_jumps: Optional[list[ClockJump]] = None,
+) -> tuple[PumpingTest, PumpingTest]:
+    """
+    Split an already-read record of a constant-rate test followed by its
+    recovery at end_of_pumping_min into the (constant-rate, recovery) pair.
+
+    Both tests share the table's columns as views, and only the recovery time
+    axis is re-based to t' (time since pumping stopped), so the reading at the
+    stop is in both. Clock jumps are passed on to the test they fall in.
+
+    Raises:
+        ValueError: If either phase holds fewer than MIN_ROWS readings.
+    """
+    clock_jumps = clock_jumps or []
+    time = table.time_min
+
+    pumping_end = int(np.searchsorted(time, end_of_pumping_min, side="right"))
+    recovery_start = int(np.searchsorted(time, end_of_pumping_min, side="left"))
+    for phase, n in (("pumping", pumping_end), ("recovery", len(time) - recovery_start)):
+        if n < MIN_ROWS:
+            raise ValueError(
+                f"The {phase} phase holds only {n} reading(s) with the end of pumping "
+                f"at {end_of_pumping_min:g} min. At least {MIN_ROWS} measurements are required."
+            )
+
+    recovery = table[recovery_start:]
+    common = {"borehole": borehole, "test_date": test_date, "operator": operator, "flowrate_m3h": flowrate_m3h}
+    pumping_test = PumpingTest(
+        test_type=TestType.CONSTANT_RATE,
+        measurements=table[:pumping_end],
+        clock_jumps=[jump for jump in clock_jumps if jump.index < pumping_end],
+        **common,
+    )
+    recovery_test = PumpingTest(
+        test_type=TestType.RECOVERY,
+        measurements=replace(recovery, time_min=recovery.time_min - end_of_pumping_min),
+        end_of_pumping_min=end_of_pumping_min,
+        clock_jumps=[
+            replace(jump, index=jump.index - recovery_start)
+            for jump in clock_jumps if jump.index >= recovery_start
+        ],
+        **common,
+    )
+    return pumping_test, recovery_test
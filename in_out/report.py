@@ -2,9 +2,10 @@ from docx import Document
 from docx.shared import Inches, Pt
 from io import BytesIO
 import tempfile, os
+import numpy as np
 from models import PumpingTest
 from runner import ConstantRateSession, RecoverySession, StepDrawdownSession
-from analysis.interpretation import interpret_constant_rate, interpret_recovery, interpret_step_drawdown
+from analysis.interpretation import interpret_constant_rate, interpret_recovery, interpret_step_drawdown, interpret_quality
 
 def generate_report(session) -> BytesIO:
     doc = Document()
@@ -16,7 +17,19 @@ def generate_report(session) -> BytesIO:
         doc.add_paragraph(f"Date: {session.test.test_date}")
     if session.test.operator:
         doc.add_paragraph(f"Operator: {session.test.operator}")
+    timestamps = session.test.measurements.timestamp
+    if timestamps is not None:
+        first, last = np.datetime_as_string(timestamps[[0, -1]], unit="s")
+        doc.add_paragraph(f"Logged: {first.replace('T', ' ')} to {last.replace('T', ' ')}")
+    for jump in session.test.clock_jumps:
+        doc.add_paragraph(
+            f"Note: logger clock jump of {jump.offset_min:+.1f} min at {jump.timestamp:%Y-%m-%d %H:%M:%S}."
+        )
     
+    if session.test.qc is not None:
+        doc.add_heading("Data Quality", level=1)
+        doc.add_paragraph(interpret_quality(session.test.qc).replace("**", ""))
+
     doc.add_heading("Results", level=1)
     
     # Results table
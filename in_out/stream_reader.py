@@ -0,0 +1,112 @@
+import numpy as np
+from pathlib import Path
+from typing import Iterator
+
+# pandas is imported inside the functions below: it is only needed for files
+# that are actually streamed, and importing it dominates CLI start-up time.
+
+DEFAULT_CHUNK_ROWS = 250_000  # rows per chunk, about 4 MB per float64 column
+
+def _check_header(path: Path, columns: tuple[str, ...]) -> None:
+    """ Read only the header line and check the required columns are present. """
+    import pandas as pd
+    try:
+        header = pd.read_csv(path, nrows=0)
+    except Exception as e:
+        raise ValueError(f"Error reading CSV file '{path}': {e}")
+
+    if header.shape[1] < 2:
+        raise ValueError(
+            f"CSV file has {header.shape[1]} column(s). Expected at least 2 columns: {set(columns)}. "
+            "Check for encoding issues or wrong delimiters (e.g., semicolons instead of commas)."
+        )
+    missing = set(columns) - set(header.columns)
+    if missing:
+        raise ValueError(
+            f"Missing required column(s): {missing}. "
+            f"Found: {list(header.columns)}."
+        )
+
+def iter_csv_chunks(
+    path: str | Path,
+    columns: tuple[str, ...],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[dict[str, np.ndarray]]:
+    """
+    Yield bounded-size chunks of a CSV file as float64 arrays, one per column.
+    Only the requested columns are parsed; each chunk is checked for non-numeric
+    and missing values before it is handed over.
+    """
+    import pandas as pd
+    path = Path(path)
+    if chunk_rows < 1:
+        raise ValueError(f"chunk_rows must be a positive integer, got {chunk_rows}.")
+    _check_header(path, columns)
+
+    try:
+        reader = pd.read_csv(path, usecols=list(columns), chunksize=chunk_rows)
+        for chunk in reader:
+            if chunk.empty:     # header-only file
+                continue
+            for col in columns:
+                if not pd.api.types.is_numeric_dtype(chunk[col]):
+                    non_numeric = chunk[col][pd.to_numeric(chunk[col], errors='coerce').isna()]
+                    raise ValueError(
+                        f"Column '{col}' must be numeric. "
+                        f"Found non-numeric value(s): {non_numeric.tolist()}"
+                    )
+            if chunk[list(columns)].isnull().any().any():
+                raise ValueError(f"Missing values in required columns {set(columns)}. Check CSV for incomplete data.")
+            yield {col: chunk[col].to_numpy(dtype=np.float64) for col in columns}
+    except pd.errors.ParserError as e:
+        raise ValueError(f"Error reading CSV file '{path}': {e}")
+
+def read_csv_columns_chunked(
+    path: str | Path,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    min_rows: int = 3,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stream a time_min/level_mbd CSV in bounded-size chunks and return the
+    validated columns as (time_min, level_mbd) float64 arrays.
+
+    Time is checked for negative, duplicate and non-monotonic values inside each
+    chunk and across chunk boundaries, so a bad file fails at the first offending
+    chunk. No full pandas copy of the file is ever held: only the parsed float
+    columns are kept and joined once at the end.
+
+    Raises:
+        ValueError: With the same messages as the in-memory CSV reader.
+    """
+    time_parts: list[np.ndarray] = []
+    level_parts: list[np.ndarray] = []
+    last_time = None    # last time value of the previous chunk
+
+    for chunk in iter_csv_chunks(path, ("time_min", "level_mbd"), chunk_rows):
+        time = chunk["time_min"]
+        if (time < 0).any():
+            raise ValueError(f"Negative time value(s) found: {time[time < 0].tolist()}.")
+
+        # Prepend the previous chunk's last value so steps across the boundary are checked too
+        joined = time if last_time is None else np.concatenate(([last_time], time))
+        steps = np.diff(joined)
+        if (steps == 0).any():
+            dupes = joined[1:][steps == 0]
+            raise ValueError(f"Duplicate time value(s) found: {dupes.tolist()}.")
+        if (steps < 0).any():
+            raise ValueError("Time values must be monotonically increasing.")
+
+        last_time = time[-1]
+        time_parts.append(time)
+        level_parts.append(chunk["level_mbd"])
+
+    n_rows = sum(len(part) for part in time_parts)
+    if n_rows == 0:
+        raise ValueError("CSV file is empty. Please provide a file with data.")
+    if n_rows < min_rows:
+        raise ValueError(
+            f"CSV contains only {n_rows} row(s). "
+            f"At least {min_rows} measurements are required."
+        )
+
+    return np.concatenate(time_parts), np.concatenate(level_parts)
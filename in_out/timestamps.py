@@ -0,0 +1,121 @@
+import numpy as np
+from datetime import datetime, timezone
+from typing import Optional
+
+from models import ClockJump
+
+# pandas is imported inside parse_timestamps: it is only needed for files that
+# actually carry wall-clock timestamps.
+
+DEFAULT_JUMP_FACTOR = 10.0      # an interval this many times its neighbours is a jump...
+DEFAULT_MIN_JUMP_MIN = 30.0     # ...if it is also at least this many minutes off
+NS_PER_MINUTE = np.timedelta64(60_000_000_000, "ns")
+
+def parse_timestamps(values, timestamp_format: Optional[str] = None) -> np.ndarray:
+    """
+    Parse a column of timestamps into a datetime64[ns] array in one vectorised pass.
+
+    Without timestamp_format the format is inferred once from the first value and
+    applied to the whole column; values that do not follow it raise instead of
+    falling back to slow per-row parsing. Timestamps carrying a UTC offset are
+    converted to UTC, so offset-aware files show no daylight-saving jumps.
+
+    Raises:
+        ValueError: If the values cannot be parsed or any value is missing.
+    """
+    import pandas as pd
+    try:
+        parsed = pd.to_datetime(pd.Series(values), format=timestamp_format, utc=True)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cannot parse timestamps: {e}")
+    missing = np.flatnonzero(parsed.isna().to_numpy())
+    if missing.size:
+        raise ValueError(f"Missing timestamp(s) at row(s) {missing.tolist()}.")
+    return parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+
+def _as_datetime64(value: datetime) -> np.datetime64:
+    """ A naive datetime is taken as-is, an aware one is converted to UTC like the parsed column. """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, "ns")
+
+def detect_clock_jumps(
+    timestamps: np.ndarray,
+    jump_factor: float = DEFAULT_JUMP_FACTOR,
+    min_jump_min: float = DEFAULT_MIN_JUMP_MIN,
+) -> list[ClockJump]:
+    """
+    Find clock jumps in a series of logger timestamps.
+
+    Every backward step is a jump. A forward step is a jump when it is more than
+    jump_factor times the longer of its two neighbouring intervals and at least
+    min_jump_min longer than it, so that log-spaced or irregular sampling is not
+    mistaken for a jump. The offset is the step minus that neighbouring interval.
+    """
+    intervals = np.diff(timestamps) / NS_PER_MINUTE
+    if intervals.size == 0:
+        return []
+    previous = np.concatenate(([np.nan], intervals[:-1]))
+    following = np.concatenate((intervals[1:], [np.nan]))
+    with np.errstate(invalid="ignore"):
+        local = np.nan_to_num(np.fmax(previous, following), nan=0.0)
+        forward = (intervals > jump_factor * local) & (intervals - local >= min_jump_min) & (local > 0)
+    jumps = np.flatnonzero((intervals < 0) | forward)
+    return [
+        ClockJump(
+            index=int(i + 1),
+            timestamp=timestamps[i + 1].astype("datetime64[us]").item(),
+            offset_min=float(intervals[i] - local[i]),
+        )
+        for i in jumps
+    ]
+
+def timestamps_to_elapsed(
+    timestamps: np.ndarray,
+    start_time: Optional[datetime] = None,
+    correct_clock_jumps: bool = False,
+    jump_factor: float = DEFAULT_JUMP_FACTOR,
+    min_jump_min: float = DEFAULT_MIN_JUMP_MIN,
+) -> tuple[np.ndarray, np.ndarray, list[ClockJump]]:
+    """
+    Convert logger timestamps to elapsed minutes since the start of the test.
+
+    Readings logged before start_time are dropped; without start_time the first
+    reading is the start. Clock jumps are always detected. With
+    correct_clock_jumps, every later reading is shifted back by the size of the
+    jump; otherwise forward jumps are left in (a long gap may be genuine) and a
+    backward jump, which would make time run backwards, raises.
+
+    Returns:
+        (time_min, keep, clock_jumps): elapsed time of the kept readings, the
+        boolean mask of kept rows, and the jumps (row indices refer to kept rows).
+
+    Raises:
+        ValueError: On a backward clock jump without correct_clock_jumps, or
+                    when no reading is logged at or after start_time.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+    if start_time is None:
+        keep = np.ones(len(timestamps), dtype=bool)
+        origin = timestamps[0] if len(timestamps) else None
+    else:
+        origin = _as_datetime64(start_time)
+        keep = timestamps >= origin
+    if not keep.any():
+        raise ValueError(f"No reading is logged at or after the start of the test ({start_time}).")
+
+    kept = timestamps[keep]
+    clock_jumps = detect_clock_jumps(kept, jump_factor, min_jump_min)
+    time_min = (kept - origin) / NS_PER_MINUTE
+
+    if correct_clock_jumps and clock_jumps:
+        correction = np.zeros(len(kept))
+        correction[[j.index for j in clock_jumps]] = [j.offset_min for j in clock_jumps]
+        time_min = time_min - np.cumsum(correction)
+    elif any(j.offset_min < 0 for j in clock_jumps):
+        backward = [f"{j.timestamp} ({j.offset_min:+.1f} min)" for j in clock_jumps if j.offset_min < 0]
+        raise ValueError(
+            f"Logger clock went back at: {', '.join(backward)}. "
+            "Enable clock-jump correction or fix the timestamps in the file."
+        )
+    return time_min, keep, clock_jumps
@@ -0,0 +1,179 @@
+import numpy as np
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+from models import PumpingTest, Borehole, Step, TestType
+from in_out.csv_reader import MIN_ROWS, _validate_time_series, _validate_steps
+from in_out.timestamps import parse_timestamps, timestamps_to_elapsed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+KPA_PER_M_WATER = 9.80665   # ρ·g for fresh water (1000 kg/m³ · 9.80665 m/s²), in kPa per metre of head
+PRESSURE_UNITS_TO_KPA = {
+    "kpa": 1.0,
+    "hpa": 0.1,
+    "mbar": 0.1,
+    "bar": 100.0,
+    "psi": 6.894757,
+    "mh2o": KPA_PER_M_WATER,
+    "cmh2o": KPA_PER_M_WATER / 100.0,
+}
+DEFAULT_BARO_TOLERANCE_MIN = 30.0   # furthest barometric reading allowed from a logger reading
+
+def _read_pressure_log(
+    path: str | Path,
+    timestamp_column: str,
+    pressure_column: str,
+    timestamp_format: Optional[str],
+) -> "pd.DataFrame":
+    """
+    Read a logger export into a DataFrame with 'timestamp' (datetime64) and
+    'pressure' (float64) columns, in logged order. Timestamps are parsed in one
+    vectorised call; no per-row parsing.
+    """
+    import pandas as pd
+    path = Path(path)
+    try:
+        df = pd.read_csv(path, usecols=[timestamp_column, pressure_column])
+    except Exception as e:
+        raise ValueError(f"Error reading logger file '{path}': {e}")
+    if df.empty:
+        raise ValueError(f"Logger file '{path}' is empty.")
+
+    try:
+        timestamps = parse_timestamps(df[timestamp_column], timestamp_format)
+    except ValueError as e:
+        raise ValueError(f"Column '{timestamp_column}' of '{path}': {e}")
+    pressure = pd.to_numeric(df[pressure_column], errors="coerce")
+    if pressure.isna().any():
+        bad_rows = np.flatnonzero(pressure.isna().to_numpy())
+        raise ValueError(f"Missing or non-numeric pressure values in '{path}' at row(s) {bad_rows.tolist()}.")
+
+    return pd.DataFrame({"timestamp": timestamps, "pressure": pressure.to_numpy(dtype=np.float64)})
+
+def compensate_pressure(
+    logger: "pd.DataFrame",
+    baro: "pd.DataFrame",
+    tolerance_min: float = DEFAULT_BARO_TOLERANCE_MIN,
+) -> np.ndarray:
+    """
+    Subtract barometric pressure from absolute logger pressure.
+
+    The two loggers record at different times, so each logger reading is paired
+    with the nearest barometric reading by a vectorised merge-asof. The result
+    keeps the logged order of the logger readings.
+
+    Returns:
+        Compensated pressure (water column above the sensor), in logger units.
+
+    Raises:
+        ValueError: If a logger reading has no barometric reading within tolerance_min.
+    """
+    import pandas as pd
+    # merge_asof needs both sides sorted; the row order is restored afterwards
+    merged = pd.merge_asof(
+        logger.reset_index(names="row").sort_values("timestamp", kind="stable"),
+        baro.rename(columns={"pressure": "baro_pressure"}).sort_values("timestamp", kind="stable"),
+        on="timestamp",
+        direction="nearest",
+        tolerance=pd.Timedelta(minutes=tolerance_min),
+    ).sort_values("row").reset_index(drop=True)
+    unmatched = merged["baro_pressure"].isna().to_numpy()
+    if unmatched.any():
+        raise ValueError(
+            f"{int(unmatched.sum())} logger reading(s) have no barometric reading within "
+            f"{tolerance_min} min, first at {merged['timestamp'][np.argmax(unmatched)]}. "
+            "Check that the barometric logger covers the whole test."
+        )
+    return (merged["pressure"] - merged["baro_pressure"]).to_numpy(dtype=np.float64)
+
+def read_transducer_logs(
+    logger_path: str | Path,
+    baro_path: str | Path,
+    borehole: Borehole,
+    test_type: TestType,
+    sensor_depth_mbgl: float,
+    start_time: Optional[datetime] = None,
+    pressure_unit: str = "kpa",
+    timestamp_column: str = "timestamp",
+    pressure_column: str = "pressure",
+    timestamp_format: Optional[str] = None,
+    baro_tolerance_min: float = DEFAULT_BARO_TOLERANCE_MIN,
+    correct_clock_jumps: bool = False,
+    flowrate_m3h: Optional[float] = None,
+    end_of_pumping_min: Optional[float] = None,
+    steps: Optional[list[Step]] = None,
+    test_date: Optional[date] = None,
+    operator: Optional[str] = None,
+) -> PumpingTest:
+    """
+    Build a PumpingTest from a raw absolute-pressure transducer export and a
+    separate barometric logger file, without a spreadsheet preprocessing step.
+
+        head     = (P_logger - P_baro) / (ρ·g)
+        level    = sensor_depth_mbgl + datum_height_m - head    [mbd]
+
+    where the sensor depth is measured below ground level and the borehole datum
+    sits datum_height_m above ground.
+
+    Args:
+        logger_path:        CSV with timestamp and absolute pressure columns.
+        baro_path:          CSV with timestamp and barometric pressure columns (same names and unit).
+        borehole:           Borehole the transducer was installed in.
+        test_type:          Type of test; the matching parameters below are required.
+        sensor_depth_mbgl:  Depth of the pressure sensor below ground level [m].
+        start_time:         Start of the test (start of recovery for recovery tests).
+                            Defaults to the first logger reading; earlier readings are dropped.
+        pressure_unit:      Unit of both pressure columns, one of PRESSURE_UNITS_TO_KPA.
+        correct_clock_jumps: Shift logger clock jumps out of the time axis (see in_out.timestamps).
+
+    Returns:
+        PumpingTest with elapsed time in minutes and level in meters below datum.
+
+    Raises:
+        ValueError: On unreadable files, unknown units, unmatched barometric
+                    readings, or the usual measurement and time-series checks.
+    """
+    unit = pressure_unit.lower()
+    if unit not in PRESSURE_UNITS_TO_KPA:
+        raise ValueError(
+            f"Unsupported pressure unit '{pressure_unit}'. "
+            f"Expected one of: {list(PRESSURE_UNITS_TO_KPA)}."
+        )
+    if sensor_depth_mbgl <= 0:
+        raise ValueError(f"Sensor depth must be positive, got {sensor_depth_mbgl}.")
+
+    logger = _read_pressure_log(logger_path, timestamp_column, pressure_column, timestamp_format)
+    baro = _read_pressure_log(baro_path, timestamp_column, pressure_column, timestamp_format)
+
+    timestamps = logger["timestamp"].to_numpy()
+    time_min, keep, clock_jumps = timestamps_to_elapsed(timestamps, start_time, correct_clock_jumps)
+    if keep.sum() < MIN_ROWS:
+        raise ValueError(
+            f"Logger contains only {int(keep.sum())} reading(s) after the start of the test. "
+            f"At least {MIN_ROWS} measurements are required."
+        )
+    logger = logger[keep].reset_index(drop=True)
+
+    head_m = compensate_pressure(logger, baro, baro_tolerance_min) * PRESSURE_UNITS_TO_KPA[unit] / KPA_PER_M_WATER
+    level_mbd = sensor_depth_mbgl + borehole.datum_height_m - head_m
+
+    _validate_time_series(time_min)
+    if test_type == TestType.STEP_DRAWDOWN:
+        _validate_steps(steps or [], time_min)
+
+    return PumpingTest.from_arrays(
+        borehole=borehole,
+        test_type=test_type,
+        time_min=time_min,
+        level_mbd=level_mbd,
+        timestamp=timestamps[keep],
+        clock_jumps=clock_jumps,
+        test_date=test_date,
+        operator=operator,
+        steps=steps or [],
+        flowrate_m3h=flowrate_m3h,
+        end_of_pumping_min=end_of_pumping_min,
+    )
@@ -1,8 +1,8 @@
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 import numpy as np
-from datetime import date
+from datetime import date, datetime
 
 
 # ----------------------------
@@ -15,6 +15,50 @@ class TestType(Enum):
     CONSTANT_RATE = "constant_rate"
     RECOVERY = "recovery"
 
+class DecimationMethod(Enum):
+    """ How the readings that fall into one log-time bin are combined. """
+    MEDIAN = "median"
+    MEAN = "mean"
+
+class FitWindowMode(Enum):
+    """ How the semi-log fit window is chosen. """
+    MANUAL = "manual"   # fit_start_idx / fit_end_idx as given
+    AUTO = "auto"       # best-ranked window from analysis.window_search
+    DERIVATIVE = "derivative"   # longest radial-flow plateau of the Bourdet derivative (analysis.derivative)
+
+class RecoveryMethod(Enum):
+    """ Which recovery plot is fitted (see analysis.recovery.recovery_axes). """
+    THEIS = "theis"         # residual drawdown s' against t/t'
+    AGARWAL = "agarwal"     # recovery s_p - s' against the equivalent time t_p t' / (t_p + t')
+    RESIDUAL = "residual"   # residual drawdown s' against t' (t' small beside t_p)
+
+class BootstrapMethod(Enum):
+    """ How bootstrap replicates of a regression are drawn (analysis.bootstrap). """
+    RESIDUAL = "residual"   # fitted values plus resampled residuals; the readings' times are kept
+    PAIRS = "pairs"         # readings resampled with replacement, time and drawdown together
+
+class RegressionMethod(Enum):
+    """ Estimator of a straight-line fit (analysis.regression, analysis.robust). """
+    LEAST_SQUARES = "least_squares"
+    THEIL_SEN = "theil_sen"     # median of the pairwise slopes
+    HUBER = "huber"             # Huber M-estimate, large residuals down-weighted
+
+class ErrorDistribution(Enum):
+    """ Shape of a field-input measurement error (analysis.monte_carlo). """
+    NORMAL = "normal"       # spread is the standard deviation
+    UNIFORM = "uniform"     # spread is the half-width
+
+class QCCheck(Enum):
+    """ Quality-control checks that can reject a reading (analysis.quality). """
+    SPIKE = "spike"             # far from the rolling median of its neighbours
+    FLATLINE = "flatline"       # repeats the previous level for too long (stuck sensor)
+    BELOW_PUMP = "below_pump"   # water level below the pump intake
+
+class StepDrawdownMethod(Enum):
+    """ How the step-drawdown coefficients B and C are estimated. """
+    HANTUSH_BIERSCHENK = "hantush_bierschenk"   # s/Q = B + CQ from the drawdown at the end of each step
+    EDEN_HAZEL = "eden_hazel"   # every reading, superposed Cooper-Jacob time function (analysis.step_drawdown)
+
 # ----------------------------
 # Core domain objects
 # ----------------------------
@@ -97,6 +141,45 @@ class Measurement:
         """ Calculate drawdown relative to the static water level."""
         return self.level_mbd - static_level_mbd
 
+    @staticmethod
+    def batch_validate(
+        time_min: np.ndarray,
+        level_mbd: np.ndarray,
+        temperature_c: Optional[np.ndarray] = None,
+        ph: Optional[np.ndarray] = None,
+        turbidity_ntu: Optional[np.ndarray] = None,
+        conductivity_us_cm: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Run the same range checks as __post_init__ over whole columns at once.
+        NaN readings pass, as they do for a single Measurement.
+
+        Raises:
+            ValueError: Listing every failed check with all offending row indices,
+                        rather than stopping at the first bad row.
+        """
+        checks = [
+            (time_min, lambda c: c < 0, "Time cannot be negative"),
+            (level_mbd, lambda c: c < 0, "Water level cannot be negative"),
+            (temperature_c, lambda c: (c < -50) | (c > 150), "Temperature is out of realistic range (-50 to 150 °C)"),
+            (ph, lambda c: (c < 0) | (c > 14), "pH value is out of valid range (0-14)"),
+            (turbidity_ntu, lambda c: c < 0, "Turbidity cannot be negative"),
+            (conductivity_us_cm, lambda c: c < 0, "Conductivity cannot be negative"),
+        ]
+        errors = []
+        for column, is_invalid, message in checks:
+            if column is None:
+                continue
+            column = np.asarray(column, dtype=np.float64)
+            bad_rows = np.flatnonzero(is_invalid(column))
+            if bad_rows.size:
+                errors.append(
+                    f"{message} at row(s) {bad_rows.tolist()}, "
+                    f"got {column[bad_rows].tolist()}."
+                )
+        if errors:
+            raise ValueError("Invalid measurement(s): " + " ".join(errors))
+
 @dataclass
 class Step:
     """ Represents a single step in a step-drawdown test. """
@@ -111,7 +194,241 @@ class Step:
             raise ValueError(f"Flowrate must be positive, got {self.flowrate_m3h}.")
         if self.end_time_min <= 0:
             raise ValueError(f"End time must be positive, got {self.end_time_min}.")
-        
+
+@dataclass
+class ClockJump:
+    """
+    A jump in the logger clock (e.g. a daylight-saving shift or a manual reset),
+    found where one sampling interval is far off its neighbours.
+    """
+    index: int  # Row of the first reading after the jump
+    timestamp: datetime # Logged timestamp of that reading
+    offset_min: float   # Size of the jump in minutes, negative when the clock went back
+
+# ----------------------------
+# Columnar measurement store
+# ----------------------------
+
+OPTIONAL_CHANNELS = ("temperature_c", "ph", "turbidity_ntu", "conductivity_us_cm")
+
+def _as_column(values, name: str) -> np.ndarray:
+    """ Return values as a contiguous, read-only 1-D float64 array. """
+    column = np.ascontiguousarray(values, dtype=np.float64)
+    if column.ndim != 1:
+        raise ValueError(f"Column '{name}' must be one-dimensional, got shape {column.shape}.")
+    # Freeze a view rather than the input itself, so the caller's array stays writeable
+    column = column.view()
+    column.flags.writeable = False
+    return column
+
+@dataclass(eq=False)
+class MeasurementTable:
+    """
+    Columnar store of the measurements of a test: one contiguous float64 array
+    per channel instead of one Measurement object per row.
+
+    Optional channels are None when they were not recorded at all; missing
+    readings within a recorded channel are NaN. Rows are only materialised as
+    Measurement objects when indexed or iterated, so a MeasurementTable can be
+    used wherever a list[Measurement] was expected.
+
+    Tests read from wall-clock logger files keep the original timestamps in a
+    datetime64 column alongside the elapsed time, for reporting. A decimated
+    table records in point_counts how many raw readings each row stands for.
+    """
+    time_min: np.ndarray    # Elapsed time since the start of the test in minutes
+    level_mbd: np.ndarray   # Measured water level in meters below datum (mbd)
+    temperature_c: Optional[np.ndarray] = None
+    ph: Optional[np.ndarray] = None
+    turbidity_ntu: Optional[np.ndarray] = None
+    conductivity_us_cm: Optional[np.ndarray] = None
+    timestamp: Optional[np.ndarray] = None  # Logged wall-clock time of each reading (datetime64)
+    point_counts: Optional[np.ndarray] = None   # Raw readings folded into each row by decimation
+
+    def __post_init__(self):
+        self.time_min = _as_column(self.time_min, "time_min")
+        self.level_mbd = _as_column(self.level_mbd, "level_mbd")
+        if len(self.level_mbd) != len(self.time_min):
+            raise ValueError(
+                f"Column 'level_mbd' has {len(self.level_mbd)} value(s) "
+                f"but 'time_min' has {len(self.time_min)}."
+            )
+        for name in OPTIONAL_CHANNELS:
+            values = getattr(self, name)
+            if values is None:
+                continue
+            column = _as_column(values, name)
+            if len(column) != len(self.time_min):
+                raise ValueError(
+                    f"Column '{name}' has {len(column)} value(s) "
+                    f"but 'time_min' has {len(self.time_min)}."
+                )
+            setattr(self, name, column)
+        if self.timestamp is not None:
+            timestamp = np.ascontiguousarray(self.timestamp, dtype="datetime64[ns]").view()
+            timestamp.flags.writeable = False
+            if timestamp.shape != self.time_min.shape:
+                raise ValueError(
+                    f"Column 'timestamp' has {len(timestamp)} value(s) "
+                    f"but 'time_min' has {len(self.time_min)}."
+                )
+            self.timestamp = timestamp
+        if self.point_counts is not None:
+            counts = np.ascontiguousarray(self.point_counts, dtype=np.int64).view()
+            counts.flags.writeable = False
+            if counts.shape != self.time_min.shape:
+                raise ValueError(
+                    f"Column 'point_counts' has {len(counts)} value(s) "
+                    f"but 'time_min' has {len(self.time_min)}."
+                )
+            if (counts < 1).any():
+                raise ValueError("Every row must stand for at least one raw reading.")
+            self.point_counts = counts
+        Measurement.batch_validate(
+            self.time_min, self.level_mbd,
+            **{name: getattr(self, name) for name in OPTIONAL_CHANNELS},
+        )
+
+    @classmethod
+    def from_measurements(cls, measurements: Iterable[Measurement]) -> "MeasurementTable":
+        """ Build a table from per-row Measurement objects (None becomes NaN). """
+        measurements = list(measurements)
+        channels = {}
+        for name in OPTIONAL_CHANNELS:
+            values = [getattr(m, name) for m in measurements]
+            if all(v is None for v in values):
+                channels[name] = None
+            else:
+                channels[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return cls(
+            time_min=np.array([m.time_min for m in measurements], dtype=np.float64),
+            level_mbd=np.array([m.level_mbd for m in measurements], dtype=np.float64),
+            **channels,
+        )
+
+    def __len__(self) -> int:
+        return len(self.time_min)
+
+    def __iter__(self) -> Iterator[Measurement]:
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def __getitem__(self, index):
+        """
+        An integer index returns a Measurement, a slice returns a MeasurementTable
+        of views and a boolean or integer array a MeasurementTable of copies.
+        """
+        if isinstance(index, (slice, np.ndarray)):
+            return MeasurementTable(
+                time_min=self.time_min[index],
+                level_mbd=self.level_mbd[index],
+                **{
+                    name: None if getattr(self, name) is None else getattr(self, name)[index]
+                    for name in OPTIONAL_CHANNELS
+                },
+                timestamp=None if self.timestamp is None else self.timestamp[index],
+                point_counts=None if self.point_counts is None else self.point_counts[index],
+            )
+        return self._row(index)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MeasurementTable):
+            return NotImplemented
+        for name in ("time_min", "level_mbd") + OPTIONAL_CHANNELS + ("timestamp", "point_counts"):
+            a, b = getattr(self, name), getattr(other, name)
+            if (a is None) != (b is None):
+                return False
+            if a is not None and not np.array_equal(a, b, equal_nan=a.dtype.kind == "f"):
+                return False
+        return True
+
+    def __setstate__(self, state: dict):
+        """ Unpickled arrays are writeable copies; freeze them again (e.g. after a worker process). """
+        self.__dict__.update(state)
+        for name in ("time_min", "level_mbd") + OPTIONAL_CHANNELS + ("timestamp", "point_counts"):
+            column = getattr(self, name)
+            if column is not None:
+                column.flags.writeable = False
+
+    def _row(self, i: int) -> Measurement:
+        """ Materialise row i as a Measurement. """
+        i = range(len(self))[i]     # normalises negative indices and raises IndexError
+        optional = {}
+        for name in OPTIONAL_CHANNELS:
+            column = getattr(self, name)
+            value = None if column is None else float(column[i])
+            optional[name] = None if value is None or np.isnan(value) else value
+        return Measurement(
+            time_min=float(self.time_min[i]),
+            level_mbd=float(self.level_mbd[i]),
+            **optional,
+        )
+
+
+# ----------------------------
+# Quality control
+# ----------------------------
+
+@dataclass
+class QCSettings:
+    """
+    Thresholds of the quality-control checks run on the raw record of a test
+    (analysis.quality). A check whose threshold is None is skipped.
+    """
+    spike_window: int = 7       # readings in the rolling median/MAD window (odd)
+    spike_threshold: Optional[float] = 5.0  # departure from the rolling median that makes a spike, in rolling MADs (scaled to σ)
+    spike_min_m: float = 0.05   # smallest departure flagged as a spike, whatever the MAD
+    flatline_readings: Optional[int] = 5    # identical consecutive levels...
+    flatline_min: float = 30.0  # ...lasting at least this long make a flat line
+    gap_factor: Optional[float] = 10.0  # an interval this many times its neighbours is a gap...
+    min_gap_min: float = 5.0    # ...if it is also at least this many minutes longer
+    pump_depth_mbd: Optional[float] = None  # levels deeper than the pump intake are rejected; None = not checked
+
+    def __post_init__(self):
+        if self.spike_window < 3 or self.spike_window % 2 == 0:
+            raise ValueError(f"Spike window must be an odd number of at least 3 readings, got {self.spike_window}.")
+        if self.spike_threshold is not None and self.spike_threshold <= 0:
+            raise ValueError(f"Spike threshold must be positive, got {self.spike_threshold}.")
+        if self.flatline_readings is not None and self.flatline_readings < 2:
+            raise ValueError(f"A flat line needs at least 2 readings, got {self.flatline_readings}.")
+        if self.gap_factor is not None and self.gap_factor <= 1:
+            raise ValueError(f"Gap factor must be greater than 1, got {self.gap_factor}.")
+        if self.pump_depth_mbd is not None and self.pump_depth_mbd <= 0:
+            raise ValueError(f"Pump depth must be positive, got {self.pump_depth_mbd}.")
+
+@dataclass
+class DataGap:
+    """ An interval of the record with no readings, much longer than the sampling around it. """
+    index: int          # row of the first reading after the gap
+    start_min: float    # time of the last reading before the gap
+    end_min: float
+
+@dataclass
+class QCResult:
+    """
+    Outcome of the quality-control checks on the raw record of a test: one
+    boolean array per check, True where the check rejects the reading, and the
+    gaps in the record. Gaps are reported only; they reject no reading.
+    """
+    settings: QCSettings
+    time_min: np.ndarray = field(repr=False)    # raw record the checks ran on
+    level_mbd: np.ndarray = field(repr=False)
+    flags: dict[QCCheck, np.ndarray] = field(repr=False)
+    gaps: list[DataGap] = field(default_factory=list)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """ True for the readings that pass every check. """
+        rejected = np.zeros(len(self.time_min), dtype=bool)
+        for flagged in self.flags.values():
+            rejected |= flagged
+        return ~rejected
+
+    @property
+    def counts(self) -> dict[QCCheck, int]:
+        """ Readings rejected by each check (a reading may fail several). """
+        return {check: int(flagged.sum()) for check, flagged in self.flags.items()}
+
 # ----------------------------
 # Pumping test configurations
 # ----------------------------
@@ -126,7 +443,7 @@ class PumpingTest:
     """
     borehole: Borehole
     test_type: TestType
-    measurements: list[Measurement]
+    measurements: MeasurementTable | list[Measurement]  # a list is converted to a MeasurementTable
     test_date: Optional[date] = None # ISO format date of the test (YYYY-MM-DD)
     operator: Optional[str] = None  # Name of the person conducting the test
 
@@ -138,11 +455,72 @@ class PumpingTest:
     flowrate_m3h: Optional[float] = None # Average pumping rate
     end_of_pumping_min: Optional[float] = None   # Elapsed time at the end of pumping phase (start of recovery) in minutes
 
+    # Clock jumps found while converting logger timestamps to elapsed time
+    clock_jumps: list[ClockJump] = field(default_factory=list)
+
+    # Quality control of the raw record, when run; measurements then hold only the readings that passed
+    qc: Optional[QCResult] = None
+
+    # Drawdown is cached together with the static level it was computed from;
+    # both caches are cleared whenever measurements is assigned
+    _drawdown_cache: Optional[tuple[float, np.ndarray]] = field(default=None, init=False, repr=False, compare=False)
+    # Recovery time transforms, keyed by method, static level and end of pumping (see analysis.recovery)
+    _recovery_cache: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
     def __post_init__(self):
-        if not self.measurements:
+        if not isinstance(self.measurements, MeasurementTable):
+            self.measurements = MeasurementTable.from_measurements(self.measurements)
+        if not len(self.measurements):
             raise ValueError("A pumping test must have at least one measurement.")
         self._validate_for_test_type()
+
+    def __setattr__(self, name, value):
+        if name == "measurements":
+            # Both caches derive from the measurements; a new table invalidates them
+            object.__setattr__(self, "_drawdown_cache", None)
+            object.__setattr__(self, "_recovery_cache", {})
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        borehole: Borehole,
+        test_type: TestType,
+        time_min: np.ndarray,
+        level_mbd: np.ndarray,
+        temperature_c: Optional[np.ndarray] = None,
+        ph: Optional[np.ndarray] = None,
+        turbidity_ntu: Optional[np.ndarray] = None,
+        conductivity_us_cm: Optional[np.ndarray] = None,
+        timestamp: Optional[np.ndarray] = None,
+        **kwargs,
+    ) -> "PumpingTest":
+        """
+        Build a test directly from whole columns, without creating per-row
+        Measurement objects. All range checks run vectorised and report every
+        offending row at once (see Measurement.batch_validate).
+
+        Remaining keyword arguments (test_date, operator, steps, flowrate_m3h,
+        end_of_pumping_min, clock_jumps) are passed on to the constructor.
+        """
+        table = MeasurementTable(
+            time_min=time_min,
+            level_mbd=level_mbd,
+            temperature_c=temperature_c,
+            ph=ph,
+            turbidity_ntu=turbidity_ntu,
+            conductivity_us_cm=conductivity_us_cm,
+            timestamp=timestamp,
+        )
+        return cls(borehole=borehole, test_type=test_type, measurements=table, **kwargs)
     
+    def __getstate__(self) -> dict:
+        """ The drawdown and recovery caches are not pickled; they are rebuilt on first use. """
+        state = self.__dict__.copy()
+        state["_drawdown_cache"] = None
+        state["_recovery_cache"] = {}
+        return state
+
     def _validate_for_test_type(self):
         if self.test_type == TestType.STEP_DRAWDOWN:
             if len(self.steps) < 3:
@@ -158,19 +536,23 @@ class PumpingTest:
     
     @property
     def time_series(self) -> np.ndarray:
-        """ Elapsed time as a numpy array in minutes."""
-        return np.array([m.time_min for m in self.measurements])
+        """ Elapsed time as a read-only numpy array in minutes."""
+        return self.measurements.time_min
     
     @property
     def level_series(self) -> np.ndarray:
-        """ Measured water levels as a numpy array in meters below datum (mbd)."""
-        return np.array([m.level_mbd for m in self.measurements])
+        """ Measured water levels as a read-only numpy array in meters below datum (mbd)."""
+        return self.measurements.level_mbd
     
     @property
     def drawdown_series(self) -> np.ndarray:
-        """ Drawdown series calculated from measurements and borehole static level. """
+        """ Drawdown series calculated from measurements and borehole static level (read-only, cached). """
         sl = self.borehole.static_level_mbd
-        return np.array([m.drawdown(sl) for m in self.measurements])
+        if self._drawdown_cache is None or self._drawdown_cache[0] != sl:
+            drawdown = self.measurements.level_mbd - sl
+            drawdown.flags.writeable = False
+            self._drawdown_cache = (sl, drawdown)
+        return self._drawdown_cache[1]
 
 # ----------------------------
 # Results objects
@@ -193,6 +575,96 @@ class DrawdownFit:
     n_points_used: int  # how many points were included in the fit
     r_squared: float    # R² value of the fit, indicating goodness of fit
 
+@dataclass
+class FitWindowCandidate:
+    """
+    A candidate semi-log fit window scored by the automatic window search.
+    Indices follow fit_start_idx / fit_end_idx (end exclusive).
+    """
+    start_idx: int
+    end_idx: int
+    n_points: int
+    log_cycles: float   # span of the window in log10 of the time axis
+    r_squared: float
+    adjusted_r_squared: float   # R² penalised for the two fitted parameters; used for ranking
+    transmissivity_m2day: float
+    storativity: Optional[float] = None     # from the intercept; needs the borehole radius
+    u_start: Optional[float] = None     # Cooper-Jacob u at the first time in the window
+
+@dataclass
+class SemilogSegment:
+    """ One straight-line segment of a piecewise semi-log fit (indices end exclusive). """
+    start_idx: int
+    end_idx: int
+    fit: DrawdownFit
+    transmissivity_m2day: float     # Cooper-Jacob T from this segment's slope
+
+@dataclass
+class SemilogSegmentation:
+    """
+    Optimal piecewise straight-line fit of drawdown vs ln(t), with the number
+    of segments chosen by BIC. Used to spot flow regimes (wellbore storage,
+    radial flow, boundaries) in a constant-rate test.
+    """
+    segments: list[SemilogSegment]
+    breakpoints_min: list[float]    # time of the first reading of each segment after the first [min]
+    bic_by_segments: list[float]    # BIC for 1, 2, ... segments (inf where no valid split exists)
+
+@dataclass
+class RadialFlowPlateau:
+    """
+    A run of readings over which the Bourdet derivative is flat, i.e. infinite-acting
+    radial flow. Indices follow fit_start_idx / fit_end_idx (end exclusive).
+    """
+    start_idx: int
+    end_idx: int
+    n_points: int
+    log_cycles: float   # span of the plateau in log10 of the time axis
+    derivative_m: float     # median ds/d ln t over the plateau [m]
+    transmissivity_m2day: float     # Q / (4π ds/d ln t)
+
+@dataclass
+class DerivativeDiagnostic:
+    """
+    Bourdet derivative of drawdown against ln of the fit time axis (elapsed time,
+    or t/t' for recovery), used to identify flow regimes on a log-log plot.
+    """
+    smoothing: float    # Bourdet L [ln units]
+    derivative_m: np.ndarray    # ds/d ln t per reading [m]; NaN where undefined
+    flat: np.ndarray    # per reading: the derivative is locally flat
+    plateaus: list[RadialFlowPlateau]   # longest first
+
+@dataclass
+class TheisFit:
+    """
+    Theis type-curve fit of drawdown vs time, s = Q/(4πT) W(u), u = r²S/(4Tt).
+    Unlike Cooper-Jacob it uses the early-time data too.
+    """
+    transmissivity_m2day: float
+    storativity: float
+    radius_m: float     # distance from the pumped well at which levels were measured
+    rmse_m: float       # root-mean-square residual [m]
+    r_squared: float
+    n_points_used: int
+    iterations: int
+    converged: bool
+
+@dataclass
+class TypeCurveFit:
+    """
+    Fit of a tabulated type-curve family (analysis.type_curves) to drawdown vs
+    time: T, S and the family's shape parameters (e.g. r/B for leaky aquifers).
+    """
+    family: str
+    transmissivity_m2day: float
+    storativity: float
+    parameters: dict[str, float]    # shape parameters by name
+    radius_m: float     # distance from the pumped well at which levels were measured
+    rmse_m: float       # root-mean-square residual [m]
+    r_squared: float
+    n_points_used: int
+    converged: bool
+
 @dataclass
 class StepResult:
     """
@@ -206,6 +678,96 @@ class StepResult:
     nonlinear_loss_m: float        # CQ²
     efficiency_pct: float          # BQ / (BQ + CQ²) * 100
 
+@dataclass
+class SuperpositionFit:
+    """
+    Eden-Hazel fit of every step-drawdown reading,
+        s(t) = a H(t) + b Q(t) + C Q(t)²,   H(t) = Σ ΔQ_i log10(t - t_i),
+    with the sum over the rate changes ΔQ_i made at times t_i before t.
+    Flowrates in m³/h and times in minutes.
+    """
+    time_coeff: float   # a [m/(m³/h) per log cycle]; T = 0.183 * 24 / a
+    rate_coeff: float   # b [m/(m³/h)]
+    well_loss_coeff: float  # C [m/(m³/h)²]
+    transmissivity_m2day: float
+    reference_duration_min: float   # step length at which B = a log10(t) + b is quoted
+    rmse_m: float       # root-mean-square residual [m]
+    r_squared: float
+    n_points_used: int
+
+@dataclass
+class BootstrapSettings:
+    """ A request for bootstrap confidence intervals, passed to the analyses. """
+    n_replicates: int = 2000
+    method: BootstrapMethod = BootstrapMethod.RESIDUAL
+    confidence: float = 0.95    # two-sided, e.g. 0.95 for the 2.5-97.5 percentile interval
+    seed: Optional[int] = 0     # None = different replicates on every run
+    workers: Optional[int] = None   # processes for very large replicate counts; None = this process
+
+    def __post_init__(self):
+        if self.n_replicates < 10:
+            raise ValueError(f"At least 10 bootstrap replicates are needed, got {self.n_replicates}.")
+        if not 0 < self.confidence < 1:
+            raise ValueError(f"Confidence level must be between 0 and 1, got {self.confidence}.")
+        if self.workers is not None and self.workers < 1:
+            raise ValueError(f"Number of workers must be a positive integer, got {self.workers}.")
+
+@dataclass
+class ConfidenceInterval:
+    """ Percentile bootstrap interval of one result value. """
+    lower: float
+    upper: float
+
+@dataclass
+class BootstrapIntervals:
+    """
+    Percentile confidence intervals from bootstrap replicates of a fit, keyed by
+    the name of the result field they bound (e.g. "transmissivity_m2day").
+    Replicates giving no finite value (e.g. a degenerate resample) are left out
+    of that value's interval.
+    """
+    method: BootstrapMethod
+    n_replicates: int
+    confidence: float
+    intervals: dict[str, ConfidenceInterval]
+
+@dataclass
+class MonteCarloSettings:
+    """
+    Measurement errors of the field inputs, propagated through an analysis by
+    Monte Carlo sampling (analysis.monte_carlo). Each spread is a standard
+    deviation or a half-width, depending on the distribution; zero means exact.
+    """
+    n_samples: int = 10_000
+    flowrate_pct: float = 0.0           # of each pumping rate, in percent
+    static_level_m: float = 0.0
+    end_of_pumping_min: float = 0.0     # recovery
+    step_time_min: float = 0.0          # each step end time (step-drawdown)
+    distribution: ErrorDistribution = ErrorDistribution.NORMAL
+    confidence: float = 0.95            # two-sided, for the reported intervals
+    seed: Optional[int] = 0             # None = different samples on every run
+
+    def __post_init__(self):
+        if self.n_samples < 10:
+            raise ValueError(f"At least 10 Monte Carlo samples are needed, got {self.n_samples}.")
+        if not 0 < self.confidence < 1:
+            raise ValueError(f"Confidence level must be between 0 and 1, got {self.confidence}.")
+        spreads = (self.flowrate_pct, self.static_level_m, self.end_of_pumping_min, self.step_time_min)
+        if any(spread < 0 for spread in spreads):
+            raise ValueError("Measurement error spreads cannot be negative.")
+
+@dataclass
+class MonteCarloResult:
+    """
+    Distributions of result values under the field-input errors, keyed by the
+    name of the result field (e.g. "transmissivity_m2day"). Samples for which
+    the analysis is undefined (e.g. step end times drawn out of order) are NaN
+    and left out of the intervals.
+    """
+    settings: MonteCarloSettings
+    intervals: dict[str, ConfidenceInterval]    # percentile intervals at settings.confidence
+    samples: dict[str, np.ndarray] = field(repr=False)  # one value per sample
+
 @dataclass
 class StepDrawdownResult:
     """ Results from analyzing a step-drawdown test. """
@@ -214,6 +776,10 @@ class StepDrawdownResult:
     critical_yield_m3h: float   # Flowrate at which linear and non-linear losses are equal [m3/h]
     r_squared: float    # R² of the B-C fit
     step_results: list[StepResult]    # Data for each step: Hantush-Bierschenk calculations, specific drawdown, etc.
+    superposition: Optional[SuperpositionFit] = None    # Eden-Hazel fit, when that method was used
+    confidence: Optional[BootstrapIntervals] = None     # on B, C and the critical yield, when requested
+    monte_carlo: Optional[MonteCarloResult] = None      # spread from field-input errors, when requested
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES    # estimator of the fitted lines
 
     def specific_drawdown_at(self, flowrate_m3h: float) -> float:
         """ Calculate specific drawdown at given flowrate """
@@ -229,12 +795,37 @@ class ConstantRateResult:
     fit2: Optional[DrawdownFit] = None                  # second fit, if requested
     transmissivity2_m2day: Optional[float] = None       # T from second fit
     estimated_yield2_m3day: Optional[float] = None      # yield from second fit
+    window_candidates: list[FitWindowCandidate] = field(default_factory=list)   # ranked, when the window was chosen automatically
+    segmentation: Optional[SemilogSegmentation] = None  # piecewise fit, when requested
+    theis: Optional[TheisFit] = None    # Theis type-curve fit, when requested
+    type_curve: Optional[TypeCurveFit] = None   # atlas type-curve fit, when requested
+    derivative: Optional[DerivativeDiagnostic] = None   # when the window was chosen from the derivative
+    confidence: Optional[BootstrapIntervals] = None     # on T and the yield of the main fit, when requested
+    monte_carlo: Optional[MonteCarloResult] = None      # spread from field-input errors, when requested
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES    # estimator of the fitted lines
+
+@dataclass
+class RecoveryAxes:
+    """
+    One recovery plot: the time axis and the response fitted against it.
+    Both arrays are read-only and shared between the analysis and the plots.
+    """
+    method: RecoveryMethod
+    time_axis: np.ndarray   # t/t', equivalent time [min] or t' [min]; NaN where undefined
+    response_m: np.ndarray  # residual drawdown s' (Theis) or recovery s_p - s' [m]
+    end_drawdown_m: float   # drawdown s_p at the end of pumping (first recovery reading)
 
 @dataclass
 class RecoveryResult:
-    """Results of a recovery test analysis (Theis recovery method)."""
+    """Results of a recovery test analysis (Theis, Agarwal or residual-drawdown method)."""
     fit: DrawdownFit
     recovery_pcg: float
     transmissivity_m2day: float
     estimated_yield_m3day: float
-    flowrate_m3day: float
\ No newline at end of file
+    flowrate_m3day: float
+    window_candidates: list[FitWindowCandidate] = field(default_factory=list)   # ranked, when the window was chosen automatically
+    derivative: Optional[DerivativeDiagnostic] = None   # when the window was chosen from the derivative
+    method: RecoveryMethod = RecoveryMethod.THEIS
+    confidence: Optional[BootstrapIntervals] = None     # on T and the yield, when requested
+    monte_carlo: Optional[MonteCarloResult] = None      # spread from field-input errors, when requested
+    regression_method: RegressionMethod = RegressionMethod.LEAST_SQUARES    # estimator of the fitted lines
\ No newline at end of file
@@ -1,6 +1,6 @@
 import numpy as np
 import plotly.graph_objects as go
-from models import DrawdownFit
+from models import DrawdownFit, PumpingTest, QCCheck
 
 # Consistent colour palette across all plots
 COLOURS = {
@@ -9,6 +9,16 @@ COLOURS = {
     "linear":   "#ff7f0e",   # orange — BQ (linear losses)
     "total":    "#1f77b4",   # blue — BQ + CQ² (total losses)
     "critical": "#2ca02c",   # green — critical yield marker
+    "segment":  "#7f7f7f",   # grey — piecewise segments and breakpoints
+    "theis":    "#17becf",   # cyan — Theis type curve
+    "type_curve": "#bcbd22", # olive — fitted atlas type curve
+    "derivative": "#8c564b", # brown — Bourdet derivative
+    "rejected": "#9467bd",   # purple — readings rejected by quality control
+}
+QC_MARKERS = {
+    QCCheck.SPIKE: ("x", "Spike"),
+    QCCheck.FLATLINE: ("line-ew-open", "Flat-lined sensor"),
+    QCCheck.BELOW_PUMP: ("triangle-down-open", "Below pump intake"),
 }
 
 def generate_fit_line(
@@ -27,6 +37,28 @@ def generate_fit_line(
     return x_range, y_range
 
 
+def add_rejected_readings(fig: go.Figure, test: PumpingTest, drawdown: bool = False) -> None:
+    """
+    Mark the readings rejected by quality control (test.qc), one trace per
+    check, as water level or, with drawdown, as drawdown. Mutates fig in place.
+    """
+    if test.qc is None:
+        return
+    for check, flagged in test.qc.flags.items():
+        if not flagged.any():
+            continue
+        symbol, label = QC_MARKERS[check]
+        level = test.qc.level_mbd[flagged]
+        fig.add_trace(
+            go.Scatter(
+                x=test.qc.time_min[flagged],
+                y=level - test.borehole.static_level_mbd if drawdown else level,
+                mode="markers",
+                name=f"Rejected: {label}",
+                marker=dict(color=COLOURS["rejected"], symbol=symbol, size=9),
+            )
+        )
+
 def apply_default_layout(fig: go.Figure, title: str, x_label: str, y_label: str) -> None:
     """Apply consistent layout to any figure. Mutates fig in place."""
     fig.update_layout(
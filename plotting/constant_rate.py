@@ -1,7 +1,8 @@
 import plotly.graph_objects as go
-import plotly.express as px
-from plotting.common import COLOURS, apply_default_layout
+from plotting.common import COLOURS, add_rejected_readings, apply_default_layout
 from models import PumpingTest, ConstantRateResult
+from analysis.theis import theis_drawdown
+from analysis.type_curves import curves_for, type_curve_drawdown
 from typing import Optional
 import numpy as np
 
@@ -22,6 +23,7 @@ def plot_constant_preview(
             marker=dict(color=COLOURS["data"])
         )
     )
+    add_rejected_readings(fig, test)
     y_min = test.level_series[0] if scale_axis else 0
     fig.update_yaxes(range=[None, y_min], autorange = "max reversed")
     apply_default_layout(
@@ -48,6 +50,7 @@ def plot_constant_semilog(
             marker=dict(color=COLOURS["data"]),
         )
     )
+    add_rejected_readings(fig, test, drawdown=True)
 
     t_line = np.linspace(test.time_series[1], test.time_series[-1], 200)
 
@@ -76,6 +79,59 @@ def plot_constant_semilog(
             )
         )
 
+    # Theis type curve — only if fitted; drawn over the whole record
+    if result.theis is not None:
+        t_theis = np.geomspace(test.time_series[1], test.time_series[-1], 200)
+        s_theis = theis_drawdown(
+            t_theis, result.theis.transmissivity_m2day, result.theis.storativity,
+            result.theis.radius_m, result.flowrate_m3day,
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=t_theis,
+                y=s_theis,
+                mode="lines",
+                name=f"Theis — T={result.theis.transmissivity_m2day:.1f} m²/day, S={result.theis.storativity:.1e}",
+                line=dict(color=COLOURS["theis"], width=1.5),
+            )
+        )
+
+    # Type curve (atlas or Laplace model) — only if fitted; drawn over the whole record
+    if result.type_curve is not None:
+        tc = result.type_curve
+        t_tc = np.geomspace(test.time_series[1], test.time_series[-1], 200)
+        s_tc = type_curve_drawdown(
+            curves_for(tc.family), t_tc, tc.transmissivity_m2day, tc.storativity,
+            tc.parameters, tc.radius_m, result.flowrate_m3day,
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=t_tc,
+                y=s_tc,
+                mode="lines",
+                name=f"{tc.family} — T={tc.transmissivity_m2day:.1f} m²/day, S={tc.storativity:.1e}",
+                line=dict(color=COLOURS["type_curve"], width=1.5),
+            )
+        )
+
+    # Piecewise segments — only if segmentation found more than one regime
+    if result.segmentation is not None and len(result.segmentation.segments) > 1:
+        time = test.time_series
+        for i, seg in enumerate(result.segmentation.segments, start=1):
+            t_seg = np.geomspace(time[seg.start_idx], time[seg.end_idx - 1], 50)
+            T_label = f"T={seg.transmissivity_m2day:.1f} m²/day" if seg.fit.slope > 0 else "no drawdown increase"
+            fig.add_trace(
+                go.Scatter(
+                    x=t_seg,
+                    y=seg.fit.slope * np.log(t_seg) + seg.fit.intercept,
+                    mode="lines",
+                    name=f"Segment {i} — {T_label}",
+                    line=dict(color=COLOURS["segment"], width=2, dash="dot"),
+                )
+            )
+        for t_break in result.segmentation.breakpoints_min:
+            fig.add_vline(x=np.log10(t_break), line=dict(color=COLOURS["segment"], width=1, dash="dash"))
+
     fig.update_xaxes(
         type="log",
         minor=dict(showgrid=True, gridcolor="lightgrey", gridwidth=0.5),
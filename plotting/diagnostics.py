@@ -0,0 +1,73 @@
+import plotly.graph_objects as go
+from plotting.common import COLOURS, apply_default_layout
+from models import PumpingTest, TestType, DerivativeDiagnostic
+from typing import Optional
+
+
+def plot_derivative_diagnostic(
+    test: PumpingTest,
+    diagnostic: DerivativeDiagnostic,
+    title: Optional[str] = None,
+) -> go.Figure:
+    """
+    Log-log diagnostic plot: drawdown and its Bourdet derivative against time,
+    with the radial-flow plateaus drawn at their derivative level. For recovery
+    the derivative is taken against the recovery method's time axis and plotted against t'.
+    """
+    fig = go.Figure()
+    time = test.time_series
+    derivative = diagnostic.derivative_m
+    shown = (time > 0) & (derivative > 0)    # a log axis cannot show the rest
+
+    fig.add_trace(
+        go.Scatter(
+            x=time[time > 0],
+            y=test.drawdown_series[time > 0],
+            mode="markers",
+            name="Drawdown",
+            marker=dict(color=COLOURS["data"]),
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=time[shown],
+            y=derivative[shown],
+            mode="markers",
+            name=f"Derivative ds/d ln t (L={diagnostic.smoothing:g})",
+            marker=dict(color=COLOURS["derivative"], symbol="triangle-up"),
+        )
+    )
+    flat = shown & diagnostic.flat
+    fig.add_trace(
+        go.Scatter(
+            x=time[flat],
+            y=derivative[flat],
+            mode="markers",
+            name="Flat derivative",
+            marker=dict(color=COLOURS["derivative"], symbol="triangle-up", size=10, line=dict(color="black", width=1)),
+        )
+    )
+
+    for i, plateau in enumerate(diagnostic.plateaus, start=1):
+        t_plateau = time[plateau.start_idx:plateau.end_idx]
+        t_plateau = t_plateau[t_plateau > 0]
+        fig.add_trace(
+            go.Scatter(
+                x=[t_plateau.min(), t_plateau.max()],
+                y=[plateau.derivative_m] * 2,
+                mode="lines",
+                name=f"Plateau {i} — T={plateau.transmissivity_m2day:.1f} m²/day",
+                line=dict(color=COLOURS["fit"], width=2, dash="dash" if i > 1 else "solid"),
+            )
+        )
+
+    fig.update_xaxes(type="log", minor=dict(showgrid=True, gridcolor="lightgrey", gridwidth=0.5), showgrid=True)
+    fig.update_yaxes(type="log", minor=dict(showgrid=True, gridcolor="lightgrey", gridwidth=0.5), showgrid=True)
+    recovery = test.test_type == TestType.RECOVERY
+    apply_default_layout(
+        fig=fig,
+        title=title,
+        x_label="Time since pumping stopped t' [min] - log scale" if recovery else "Elapsed time [min] - log scale",
+        y_label="Residual drawdown and derivative [m]" if recovery else "Drawdown and derivative [m]",
+    )
+    return fig
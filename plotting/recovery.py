@@ -1,6 +1,7 @@
 import plotly.graph_objects as go
-from plotting.common import COLOURS, apply_default_layout
-from models import PumpingTest, RecoveryResult
+from plotting.common import COLOURS, add_rejected_readings, apply_default_layout
+from models import PumpingTest, RecoveryResult, RecoveryMethod
+from analysis.recovery import recovery_axes
 from typing import Optional
 import numpy as np
 
@@ -21,6 +22,7 @@ def plot_recovery_preview(
             marker=dict(color=COLOURS["data"])
         )
     )
+    add_rejected_readings(fig, test)
     y_min = test.level_series[-1] if scale_axis else 0
     fig.update_yaxes(range=[None, y_min], autorange = "max reversed")
     apply_default_layout(
@@ -36,30 +38,38 @@ def plot_recovery_semilog(
     result: RecoveryResult,
     title: Optional[str] = None
 ) -> go.Figure:
+    """
+    Semi-log recovery plot of the method the result was fitted with, drawn from
+    the same cached time transform as the analysis (analysis.recovery.recovery_axes).
+    Residual drawdown is plotted downwards; the Agarwal recovery upwards.
+    """
     fig = go.Figure()
-
-    # Compute t/t' ratio — same as in analyse_recovery
-    t_prime = test.time_series
-    t = test.end_of_pumping_min + t_prime
-    time_ratio = t / t_prime
+    axes = recovery_axes(test, result.method)
+    time_axis = axes.time_axis
+    # The residual-drawdown fit is made on the recovery s_p - s'; draw it back as s'
+    residual = result.method == RecoveryMethod.RESIDUAL
+    y = test.drawdown_series if result.method != RecoveryMethod.AGARWAL else axes.response_m
 
     fig.add_trace(
         go.Scatter(
-            x=time_ratio,
-            y=test.drawdown_series,
+            x=time_axis,
+            y=y,
             mode="markers",
-            name="Drawdown semi-log",
+            name="Drawdown semi-log" if result.method == RecoveryMethod.THEIS else "Recovery data",
             marker=dict(color=COLOURS["data"])
         )
     )
 
-    # Fit line over the t/t' range — skip index 0 where t'=0
-    ratio_line = np.linspace(time_ratio[1], time_ratio[-1], 200)
-    s_line = result.fit.slope * np.log(ratio_line) + result.fit.intercept
+    # Fit line over the defined part of the time axis (t' = 0 has none)
+    shown = time_axis[np.isfinite(time_axis) & (time_axis > 0)]
+    axis_line = np.geomspace(shown.min(), shown.max(), 200)
+    s_line = result.fit.slope * np.log(axis_line) + result.fit.intercept
+    if residual:
+        s_line = axes.end_drawdown_m - s_line
 
     fig.add_trace(
         go.Scatter(
-            x=ratio_line,
+            x=axis_line,
             y=s_line,
             mode="lines",
             name=f"Cooper-Jacob fit (R²={result.fit.r_squared:.3f})",
@@ -67,7 +77,8 @@ def plot_recovery_semilog(
         )
     )
 
-    fig.update_yaxes(range=[None, 0], autorange = "max reversed")
+    if result.method != RecoveryMethod.AGARWAL:
+        fig.update_yaxes(range=[None, 0], autorange = "max reversed")
     fig.update_xaxes(
         type="log",
         minor=dict(
@@ -80,11 +91,16 @@ def plot_recovery_semilog(
         showgrid=True,
         gridcolor="lightgrey",
     )
-    # fig.update_yaxes(autorange="reversed")
+    labels = {
+        RecoveryMethod.THEIS: ("t/t' [-] (log scale)", "Drawdown [m]"),
+        RecoveryMethod.AGARWAL: ("Equivalent time t_p·t'/(t_p + t') [min] (log scale)", "Recovery s_p − s' [m]"),
+        RecoveryMethod.RESIDUAL: ("Time since pumping stopped t' [min] (log scale)", "Residual drawdown s' [m]"),
+    }
+    x_label, y_label = labels[result.method]
     apply_default_layout(
         fig=fig,
         title=title,
-        x_label="t/t' [-] (log scale)",
-        y_label="Drawdown [m]"
+        x_label=x_label,
+        y_label=y_label
     )
-    return fig
\ No newline at end of file
+    return fig
@@ -1,7 +1,8 @@
 
 import plotly.graph_objects as go
-from plotting.common import COLOURS, apply_default_layout
+from plotting.common import COLOURS, add_rejected_readings, apply_default_layout
 from models import PumpingTest, StepDrawdownResult
+from analysis.step_drawdown import eden_hazel_drawdown
 from typing import Optional
 import numpy as np
 
@@ -22,6 +23,7 @@ def plot_step_preview(
             marker=dict(color=COLOURS["data"])
         )
     )
+    add_rejected_readings(fig, test)
     y_min = test.level_series[0] if scale_axis else 0
     fig.update_yaxes(range=[None, y_min], autorange = "max reversed")
     apply_default_layout(
@@ -132,6 +134,47 @@ def plot_losses_vs_q(
     )
     return fig
 
+def plot_superposition_fit(
+    test: PumpingTest,
+    result: StepDrawdownResult,
+    title: Optional[str] = None,
+) -> go.Figure:
+    """ Every reading against time with the Eden-Hazel superposition model over the pumping period. """
+    fit = result.superposition
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Scatter(
+            x=test.time_series,
+            y=test.drawdown_series,
+            mode="markers",
+            name="Drawdown",
+            marker=dict(color=COLOURS["data"])
+        )
+    )
+
+    t_line = np.linspace(0, test.steps[-1].end_time_min, 1000)[1:]
+    fig.add_trace(
+        go.Scatter(
+            x=t_line,
+            y=eden_hazel_drawdown(t_line, test.steps, fit),
+            mode="lines",
+            name=f"Eden-Hazel — T={fit.transmissivity_m2day:.1f} m²/day (R²={fit.r_squared:.3f})",
+            line=dict(color=COLOURS["fit"], width=1.5),
+        )
+    )
+    for step in test.steps[:-1]:
+        fig.add_vline(x=step.end_time_min, line=dict(color=COLOURS["segment"], width=1, dash="dash"))
+
+    fig.update_yaxes(autorange="reversed")
+    apply_default_layout(
+        fig=fig,
+        title=title,
+        x_label="Elapsed time [min]",
+        y_label="Drawdown [m]",
+    )
+    return fig
+
 """
 
 def plot_losses(
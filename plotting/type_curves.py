@@ -0,0 +1,77 @@
+import plotly.graph_objects as go
+from plotting.common import COLOURS, apply_default_layout
+from models import PumpingTest, ConstantRateResult
+from analysis.type_curves import TypeCurveAtlas, curves_for, inverse_u_grid
+from typing import Optional
+import numpy as np
+
+FAMILY_CURVES = 5   # reference curves drawn for the first shape parameter
+
+def plot_type_curve_match(
+    test: PumpingTest,
+    result: ConstantRateResult,
+    atlas: Optional[TypeCurveAtlas] = None,
+    title: Optional[str] = None,
+) -> go.Figure:
+    """
+    Classical log-log type-curve match: W against 1/u for a spread of the
+    family's first shape parameter (others at their fitted values), with the
+    fitted curve highlighted and the readings converted with the fitted T and S:
+        1/u = 4Tt/(r²S),    W = 4πT s / Q.
+    """
+    fit = result.type_curve
+    if fit is None:
+        raise ValueError("The result has no type-curve fit to plot.")
+    curves = curves_for(fit.family, atlas)
+    specs = curves.family.parameters
+    fitted = tuple(fit.parameters[p.name] for p in specs)
+    inverse_u = inverse_u_grid()
+    fig = go.Figure()
+
+    if specs:
+        grid = specs[0].grid
+        for value in grid[np.linspace(0, len(grid) - 1, FAMILY_CURVES).round().astype(int)]:
+            w, _, _ = curves.evaluate(inverse_u, (value, *fitted[1:]), derivatives=False)
+            fig.add_trace(
+                go.Scatter(
+                    x=inverse_u,
+                    y=w,
+                    mode="lines",
+                    name=f"{specs[0].name} = {value:.2g}",
+                    line=dict(color=COLOURS["segment"], width=1),
+                )
+            )
+
+    w, _, _ = curves.evaluate(inverse_u, fitted, derivatives=False)
+    label = ", ".join(f"{name}={value:.2g}" for name, value in fit.parameters.items())
+    fig.add_trace(
+        go.Scatter(
+            x=inverse_u,
+            y=w,
+            mode="lines",
+            name=f"Fitted {fit.family}" + (f" — {label}" if label else ""),
+            line=dict(color=COLOURS["type_curve"], width=2.5),
+        )
+    )
+
+    t_day = test.time_series / 1440.0
+    usable = (t_day > 0) & (test.drawdown_series > 0)
+    fig.add_trace(
+        go.Scatter(
+            x=4 * fit.transmissivity_m2day * t_day[usable] / (fit.radius_m ** 2 * fit.storativity),
+            y=4 * np.pi * fit.transmissivity_m2day * test.drawdown_series[usable] / result.flowrate_m3day,
+            mode="markers",
+            name=f"Drawdown — T={fit.transmissivity_m2day:.1f} m²/day, S={fit.storativity:.1e}",
+            marker=dict(color=COLOURS["data"]),
+        )
+    )
+
+    fig.update_xaxes(type="log", minor=dict(showgrid=True, gridcolor="lightgrey", gridwidth=0.5), showgrid=True)
+    fig.update_yaxes(type="log", range=[-2, np.log10(w.max()) + 0.2])
+    apply_default_layout(
+        fig=fig,
+        title=title,
+        x_label="1/u = 4Tt/(r²S) - log scale",
+        y_label="W = 4πTs/Q - log scale",
+    )
+    return fig